@@ -1,17 +1,62 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import hmac
 import logging
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from email.utils import format_datetime
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from fastapi import BackgroundTasks, FastAPI, Query, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
-from gh_trending_analytics.cache import ResultCache
+from fastapi import FastAPI, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from gh_trending_analytics.access_log import AccessLog
+from gh_trending_analytics.cache import CachedResponse, ResultCache
+from gh_trending_analytics.canonical import (
+    CANONICAL_TOP_K,
+    CanonicalQuery,
+    canonical_day,
+    canonical_search,
+    canonical_toplist,
+)
+from gh_trending_analytics.encoding import (
+    ARROW_STREAM_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    TABLE_MEDIA_TYPES,
+    available_encodings,
+    encode_json,
+    negotiate_encoding,
+    negotiate_media_type,
+)
 from gh_trending_analytics.errors import InvalidRequestError, NotFoundError
 from gh_trending_analytics.manifest import Manifest
+from gh_trending_analytics.metrics import METRICS_MEDIA_TYPE, LoopLagMonitor, MetricsRegistry
+from gh_trending_analytics.prewarm import PrewarmPolicy, PrewarmPool
+from gh_trending_analytics.profiling import ProfileStore, RequestProfiler, propagate, stage
 from gh_trending_analytics.query import DuckDBQueryService, QueryConfig
+from gh_trending_analytics.tables import (
+    arrow_stream_chunks,
+    encode_table,
+    ndjson_chunks,
+    parquet_chunks,
+    table_to_records,
+)
 from gh_trending_analytics.utils import CacheKey, ValidationError, parse_bool
+from starlette.datastructures import MutableHeaders
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 
 def _error_response(error: str, message: str, hint: str | None = None) -> dict[str, Any]:
@@ -69,69 +114,536 @@ def _date_hint(manifest: Manifest, kind: str, *, limit: int = 5) -> str | None:
     return f"Try one of: {sample}"
 
 
-def create_app(*, analytics_root: Path) -> FastAPI:
+ADMIN_TOKEN_ENV = "GH_TRENDING_ADMIN_TOKEN"
+PROFILE_HEADER = "x-profile-token"
+PROFILE_PARAM = "profile_token"
+BATCH_MAX_QUERIES = 20
+BATCH_WORKERS = 8
+# Stale-entry refreshes get their own unbounded queue: the prewarm pool drops and
+# defers work, which would leave stale entries to hit the hard TTL.
+REFRESH_WORKERS = 2
+# Longer spans are not scanned into memory; their specs each run on their own plan.
+BATCH_SCAN_MAX_DAYS = 92
+PREWARM_LIMIT = 200
+CACHE_SOFT_TTL_SECONDS = 300.0
+CACHE_HARD_TTL_SECONDS = 3600.0
+PREWARM_SECONDS = 30.0
+PREWARM_CPU_SECONDS = 20.0
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def _etag_for(version: str, key: str) -> str:
+    digest = hashlib.sha1(f"{version}:{key}".encode()).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def _variant_etag(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _matching_etag(if_none_match: str | None, etag: str, encodings: list[str]) -> str | None:
+    """Weak comparison of ``If-None-Match`` against ``etag`` and its per-encoding variants.
+
+    Returns the matched tag so a 304 can repeat the variant the client holds, or None.
+    ``*`` never matches: validators are computed before the representation is loaded,
+    so honouring it would answer 304 for days and ranges that do not exist.
+    """
+    if not if_none_match:
+        return None
+    accepted = {etag, *(_variant_etag(etag, encoding) for encoding in encodings)}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in accepted:
+            return candidate
+    return None
+
+
+def _http_date(value: str) -> str:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return format_datetime(parsed, usegmt=True)
+
+
+def _is_historical(manifest: Manifest, kinds: list[str], through: str | None) -> bool:
+    """True when every date up to ``through`` precedes each kind's latest available date."""
+    if not through or not kinds:
+        return False
+    for kind in kinds:
+        manifest_kind = manifest.kinds.get(kind)
+        if manifest_kind is None or manifest_kind.max_date is None:
+            return False
+        if through >= manifest_kind.max_date:
+            return False
+    return True
+
+
+STREAM_FORMATS = {
+    "ndjson": NDJSON_MEDIA_TYPE,
+    "arrow": ARROW_STREAM_MEDIA_TYPE,
+    "parquet": PARQUET_MEDIA_TYPE,
+}
+
+
+def _parse_stream_format(value: str | None, accept: str | None) -> str:
+    if value is None:
+        return negotiate_media_type(accept, list(STREAM_FORMATS.values()))
+    if value not in STREAM_FORMATS:
+        raise InvalidRequestError("format must be 'ndjson', 'arrow' or 'parquet'")
+    return STREAM_FORMATS[value]
+
+
+def _require(**params: str | None) -> tuple[str, ...]:
+    missing = [name for name, value in params.items() if value is None]
+    if missing:
+        raise InvalidRequestError(f"Missing required parameter: {missing[0]}")
+    return tuple(params.values())
+
+
+@dataclass
+class _ToplistPlan:
+    """A parsed ranked-list request: its cache identity, row loader and response shape."""
+
+    prefix: str
+    payload: dict[str, Any]
+    query: CanonicalQuery
+    kinds: list[str]
+    through: str
+    load: Callable[[dict[str, Any], dict[str, Any] | None], pa.Table]
+    render: Callable[[list[dict[str, Any]]], dict[str, Any]]
+    shares_scan: bool = True
+
+
+class _ProfileMiddleware:
+    """Profiles admin requests (see :class:`RequestProfiler`).
+
+    A plain ASGI middleware rather than an ``http`` one: those run the rest of the app
+    in a new task, while the sampler needs the task that actually serves the route.
+    """
+
+    def __init__(self, app, *, is_admin: Callable[[Request], bool], profiles: ProfileStore):
+        self._app = app
+        self._is_admin = is_admin
+        self._profiles = profiles
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"].startswith("/debug/")
+            or not self._is_admin(Request(scope))
+        ):
+            await self._app(scope, receive, send)
+            return
+        profiler = RequestProfiler(scope["path"])
+
+        async def send_profiled(message) -> None:
+            if message["type"] == "http.response.start":
+                profiler.stop()
+                profile = profiler.result()
+                self._profiles.add(profile)
+                headers = MutableHeaders(scope=message)
+                headers["Server-Timing"] = profiler.timer.server_timing()
+                headers["X-Profile-Id"] = profile.id
+                headers["Link"] = f'</debug/profiles/{profile.id}>; rel="profile"'
+            await send(message)
+
+        with profiler:
+            await self._app(scope, receive, send_profiled)
+
+
+@lru_cache(maxsize=1)
+def _templates():
+    # Jinja2 is only needed by the HTML pages, so load it on first render.
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory=Path(__file__).parent / "templates")
+
+
+def create_app(
+    *,
+    analytics_root: Path,
+    slow_query_seconds: float | None = None,
+    profile_slow_queries: bool = False,
+    admin_token: str | None = None,
+    access_log_path: Path | None = None,
+    prewarm_limit: int = PREWARM_LIMIT,
+    prewarm_seconds: float = PREWARM_SECONDS,
+    prewarm_cpu_seconds: float = PREWARM_CPU_SECONDS,
+    prewarm_policy: PrewarmPolicy | None = None,
+    presence_matrix: bool = False,
+) -> FastAPI:
     logger = logging.getLogger("gh_trending_web.cache")
     manifest = Manifest.load(analytics_root / "parquet" / "manifest.json")
+    metrics = MetricsRegistry()
     query_service = DuckDBQueryService(
-        QueryConfig(analytics_root=analytics_root, manifest=manifest)
+        QueryConfig(
+            analytics_root=analytics_root,
+            manifest=manifest,
+            metrics=metrics,
+            slow_query_seconds=slow_query_seconds,
+            profile_slow_queries=profile_slow_queries,
+        )
+    )
+    requests_in_flight = metrics.gauge(
+        "gh_trending_http_requests_in_flight", "HTTP requests currently being handled."
+    )
+    prewarm_pool = PrewarmPool(busy=lambda: requests_in_flight.value() > 0)
+    loop_lag = LoopLagMonitor()
+    refresh_executor = ThreadPoolExecutor(
+        max_workers=REFRESH_WORKERS, thread_name_prefix="gh-trending-refresh"
     )
-    cache = ResultCache(max_size=2048, default_ttl=300.0)
+    cache = ResultCache(
+        max_size=2048,
+        default_ttl=CACHE_SOFT_TTL_SECONDS,
+        hard_ttl=CACHE_HARD_TTL_SECONDS,
+        submit=lambda key, fn: refresh_executor.submit(fn),
+    )
+    access_log = AccessLog.load(access_log_path) if access_log_path else AccessLog()
+    prewarm_policy = prewarm_policy or PrewarmPolicy()
+
+    @asynccontextmanager
+    async def _lifespan(_: FastAPI):
+        lag_task = asyncio.create_task(loop_lag.run())
+        if presence_matrix:
+            # Queries use the rollup paths until each kind's matrix has loaded.
+            for kind in sorted(manifest.kinds):
+                prewarm_pool.submit(
+                    f"presence_matrix:{kind}", partial(query_service.load_presence_matrix, kind)
+                )
+        for spec in prewarm_policy.startup_specs(manifest):
+            prewarm_pool.submit(
+                _cache_key("prewarm", spec), partial(_prewarm_spec, spec), group="startup"
+            )
+        # The name index takes a full read of every search partition; build it before
+        # the first search instead of inside it.
+        prewarm_pool.submit("search_index", query_service.load_search_index)
+        if len(access_log):
+            prewarm_pool.submit("access_log_replay", _prewarm_from_access_log)
+        yield
+        lag_task.cancel()
+        prewarm_pool.shutdown()
+        refresh_executor.shutdown(wait=False, cancel_futures=True)
+        access_log.flush()
+
+    app = FastAPI(lifespan=_lifespan)
 
-    app = FastAPI()
-    templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
     app.state.cache = cache
+    app.state.access_log = access_log
+    app.state.prewarm_pool = prewarm_pool
+    app.state.refresh_executor = refresh_executor
     app.state.manifest = manifest
     app.state.query_service = query_service
+    app.state.metrics = metrics
+    admin_token = admin_token or os.environ.get(ADMIN_TOKEN_ENV) or None
+    profiles = ProfileStore()
+    app.state.profiles = profiles
+
+    request_seconds = metrics.histogram(
+        "gh_trending_http_request_duration_seconds",
+        "HTTP request latency per route.",
+        ("route", "method", "status"),
+    )
+    # Handlers query DuckDB on the event loop, so loop lag rather than the thread pool
+    # is what requests queue behind.
+    metrics.callback(
+        "gh_trending_event_loop_lag_seconds",
+        "Seconds the event loop is running behind schedule.",
+        lambda: [((), loop_lag.lag())],
+    )
+    metrics.callback(
+        "gh_trending_cache_events_total",
+        "Result cache events.",
+        lambda: [
+            (("hit",), cache.stats.hits),
+            (("miss",), cache.stats.misses),
+            (("set",), cache.stats.sets),
+            (("eviction",), cache.stats.evictions),
+            (("expiration",), cache.stats.expirations),
+            (("stale_serve",), cache.stats.stale_serves),
+            (("refresh",), cache.stats.refreshes),
+            (("refresh_failure",), cache.stats.refresh_failures),
+        ],
+        labels=("event",),
+        kind="counter",
+    )
+    metrics.callback(
+        "gh_trending_cache_entries",
+        "Entries held by the result cache.",
+        lambda: [((), cache.size())],
+    )
+    metrics.callback(
+        "gh_trending_prewarm_total",
+        "Cache prewarm attempts by outcome.",
+        lambda: [
+            (("success",), cache.stats.prewarm_success),
+            (("failure",), cache.stats.prewarm_failure),
+        ],
+        labels=("outcome",),
+        kind="counter",
+    )
+    metrics.callback(
+        "gh_trending_prewarm_tasks_total",
+        "Prewarm pool task events.",
+        lambda: [
+            ((event,), getattr(prewarm_pool.stats, event))
+            for event in ("submitted", "deduplicated", "dropped", "cancelled", "failed")
+        ],
+        labels=("event",),
+        kind="counter",
+    )
+    metrics.callback(
+        "gh_trending_prewarm_queue_depth",
+        "Prewarm tasks waiting for a worker.",
+        lambda: [((), prewarm_pool.queue_depth())],
+    )
+
+    def _is_admin(request: Request) -> bool:
+        supplied = request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_PARAM)
+        if admin_token is None or not supplied:
+            return False
+        return hmac.compare_digest(supplied.encode(), admin_token.encode())
+
+    # Added before the latency middleware so it runs inside it, in the route's own task.
+    app.add_middleware(_ProfileMiddleware, is_admin=_is_admin, profiles=profiles)
+
+    @app.middleware("http")
+    async def _observe_latency(request: Request, call_next):
+        started = time.perf_counter()
+        status = 500
+        requests_in_flight.inc()
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            requests_in_flight.dec()
+            route = request.scope.get("route")
+            request_seconds.observe(
+                time.perf_counter() - started,
+                route=getattr(route, "path", "unmatched"),
+                method=request.method,
+                status=str(status),
+            )
 
     def _cache_key(prefix: str, payload: dict[str, Any]) -> str:
         return CacheKey(prefix, payload).as_str()
 
-    def _cached_day(kind: str, date: str, language: str) -> list[dict[str, Any]]:
-        key = _cache_key(
-            "day",
-            {"kind": kind, "date": date, "language": language},
+    manifest_version = manifest.version
+    encodings = available_encodings()
+    last_modified = _http_date(manifest.generated_at)
+
+    def _validators(key: str, kinds: list[str], through: str | None) -> dict[str, str]:
+        historical = _is_historical(manifest, kinds, through)
+        return {
+            "ETag": _etag_for(manifest_version, key),
+            "Last-Modified": last_modified,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if historical else REVALIDATE_CACHE_CONTROL,
+            "Vary": "Accept, Accept-Encoding",
+        }
+
+    def _encode(payload: dict[str, Any], headers: dict[str, str]) -> CachedResponse:
+        return CachedResponse(
+            body=encode_json(payload), media_type=JSON_MEDIA_TYPE, headers=headers
         )
-        cached = cache.get(key)
-        if cached is not None:
-            return cached
-        entries = query_service.get_day(kind, date, language)
-        cache.set(key, entries)
-        return entries
-
-    def _cached_toplist(prefix: str, payload: dict[str, Any], loader) -> Any:
-        key = _cache_key(prefix, payload)
-        cached = cache.get(key)
-        if cached is not None:
-            return cached
-        result = loader()
-        cache.set(key, result)
-        return result
+
+    def _raw_response(request: Request, cached: CachedResponse) -> Response:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"), encodings)
+        compressed = cached.variant(encoding)
+        if compressed is None:
+            return Response(
+                content=cached.body, media_type=cached.media_type, headers=cached.headers
+            )
+        headers = dict(cached.headers)
+        headers["Content-Encoding"] = encoding
+        if "ETag" in headers:
+            headers["ETag"] = _variant_etag(headers["ETag"], encoding)
+        return Response(content=compressed, media_type=cached.media_type, headers=headers)
+
+    def _cached_response(
+        request: Request,
+        prefix: str,
+        key_payload: dict[str, Any],
+        build_payload,
+        *,
+        kinds: list[str],
+        through: str | None,
+        build_table=None,
+    ) -> Response:
+        """Serve a cached representation, building it on a miss.
+
+        With ``build_table`` (returning the typed rows and the envelope metadata) the
+        response may also be negotiated to Arrow IPC or Parquet via ``Accept``; each
+        representation is cached under its own key and ETag.
+        """
+        media_type = JSON_MEDIA_TYPE
+        if build_table is not None:
+            media_type = negotiate_media_type(request.headers.get("accept"), TABLE_MEDIA_TYPES)
+        if media_type != JSON_MEDIA_TYPE:
+            key_payload = {**key_payload, "media_type": media_type}
+        key = _cache_key(prefix, key_payload)
+        headers = _validators(key, kinds, through)
+        matched = _matching_etag(request.headers.get("if-none-match"), headers["ETag"], encodings)
+        if matched is not None:
+            return Response(status_code=304, headers={**headers, "ETag": matched})
+
+        def build() -> CachedResponse:
+            if media_type == JSON_MEDIA_TYPE:
+                payload = build_payload()
+                with stage("serialization"):
+                    return _encode(payload, headers)
+            table, metadata = build_table()
+            with stage("serialization"):
+                body = encode_table(table, media_type, metadata)
+            return CachedResponse(body=body, media_type=media_type, headers=headers)
+
+        with stage("cache_lookup"):
+            cached = cache.get(key)
+        if cached is None:
+            cached = build()
+            cache.set(key, cached, refresh=build)
+        return _raw_response(request, cached)
+
+    def _canonical_rows(query: CanonicalQuery, loader) -> pa.Table:
+        key = query.key()
+        with stage("cache_lookup"):
+            rows = cache.get(key)
+        if rows is None:
+            rows = loader(query.params)
+            cache.set(key, rows, refresh=partial(loader, query.params))
+        return query.slice(rows)
+
+    def _day_key(kind: str, date: str, language: str) -> str:
+        return _cache_key("day", {"kind": kind, "date": date, "language": language})
+
+    def _day_payload(kind: str, date: str, language: str) -> dict[str, Any]:
+        return {
+            "kind": kind,
+            "date": date,
+            "language": language,
+            "entries": query_service.get_day(kind, date, language),
+        }
 
     def _neighbor_dates(kind: str, current_date: str) -> tuple[str | None, str | None]:
-        if kind not in manifest.kinds:
-            return None, None
-        dates = manifest.kinds[kind].dates
-        if current_date not in dates:
+        manifest_kind = manifest.kinds.get(kind)
+        if manifest_kind is None or not manifest_kind.has_date(current_date):
             return None, None
-        idx = dates.index(current_date)
-        prev_date = dates[idx - 1] if idx > 0 else None
-        next_date = dates[idx + 1] if idx < len(dates) - 1 else None
-        return prev_date, next_date
+        return manifest_kind.neighbors(current_date)
+
+    def _build_day(kind: str, date: str, language: str) -> CachedResponse:
+        key = _day_key(kind, date, language)
+        return _encode(_day_payload(kind, date, language), _validators(key, [kind], date))
 
     def _prewarm_day(kind: str, date: str, language: str) -> None:
-        key = _cache_key("day", {"kind": kind, "date": date, "language": language})
-        if cache.get(key) is not None:
+        key = _day_key(kind, date, language)
+        if key in cache:
             return
         try:
-            entries = query_service.get_day(kind, date, language)
+            cached = _build_day(kind, date, language)
         except Exception:
             cache.stats.prewarm_failure += 1
             logger.info("prewarm_failure kind=%s date=%s language=%s", kind, date, language)
             return
-        cache.set(key, entries)
+        cache.set(key, cached, refresh=partial(_build_day, kind, date, language))
         cache.stats.prewarm_success += 1
         logger.info("prewarm_success kind=%s date=%s language=%s", kind, date, language)
 
+    def _day_language_keys(kind: str, date: str) -> list[str]:
+        manifest_kind = manifest.kinds.get(kind)
+        if manifest_kind is None:
+            return []
+        languages = manifest_kind.languages_by_date.get(date, manifest_kind.languages)
+        return [
+            _day_key(kind, date, "__all__" if language is None else language)
+            for language in languages
+        ]
+
+    def _prewarm_day_languages(kind: str, date: str) -> None:
+        """Cache every language's list for ``date`` from a single scan."""
+        try:
+            tables = query_service.get_day_tables(kind, date)
+        except Exception:
+            cache.stats.prewarm_failure += 1
+            logger.info("prewarm_failure kind=%s date=%s language=*", kind, date)
+            return
+        for language, table in tables.items():
+            key = _day_key(kind, date, language)
+            if key in cache:
+                continue
+            payload = {
+                "kind": kind,
+                "date": date,
+                "language": language,
+                "entries": table_to_records(table),
+            }
+            cache.set(
+                key,
+                _encode(payload, _validators(key, [kind], date)),
+                refresh=partial(_build_day, kind, date, language),
+            )
+            cache.stats.prewarm_success += 1
+        logger.info("prewarm_success kind=%s date=%s language=*", kind, date)
+
+    def _prewarm_after_day(kind: str, date: str, language: str) -> None:
+        """Queue what ``prewarm_policy`` expects next, cancelling targets of earlier views."""
+        group = f"day:{kind}"
+        targets: dict[str, Callable[[], None]] = {}
+        if prewarm_policy.day_languages and not all(
+            key in cache for key in _day_language_keys(kind, date)
+        ):
+            key = _cache_key("day_languages", {"kind": kind, "date": date})
+            targets[key] = partial(_prewarm_day_languages, kind, date)
+        if prewarm_policy.neighbor_days:
+            for target_date in _neighbor_dates(kind, date):
+                if not target_date:
+                    continue
+                for lang in {language, "__all__"}:
+                    key = _day_key(kind, target_date, lang)
+                    targets[key] = partial(_prewarm_day, kind, target_date, lang)
+        prewarm_pool.cancel_group(group, keep=targets)
+        for key, task in targets.items():
+            prewarm_pool.submit(key, task, group=group)
+
+    def _prewarm_spec(spec: dict[str, Any]) -> None:
+        if spec.get("op") == "day":
+            _prewarm_day(spec["kind"], spec["date"], spec["language"])
+            return
+        if spec.get("op") == "day_languages":
+            _prewarm_day_languages(spec["kind"], spec["date"])
+            return
+        try:
+            plan = _plan_spec(spec)
+            key = _cache_key(plan.prefix, plan.payload)
+            if key in cache:
+                return
+            cached = _build_toplist(plan, key)
+        except Exception:
+            cache.stats.prewarm_failure += 1
+            logger.info("prewarm_failure spec=%s", spec)
+            return
+        cache.set(key, cached, refresh=partial(_build_toplist, plan, key))
+        cache.stats.prewarm_success += 1
+
+    def _prewarm_from_access_log() -> None:
+        """Replay the most frequent and recent logged requests into the empty cache.
+
+        Stops once ``prewarm_seconds`` of wall time or ``prewarm_cpu_seconds`` of process
+        CPU time is spent; process CPU includes live traffic, so a busy server stops early.
+        """
+        started = time.monotonic()
+        started_cpu = time.process_time()
+        for _, spec in access_log.top(prewarm_limit):
+            prewarm_pool.defer()
+            if (
+                time.monotonic() - started > prewarm_seconds
+                or time.process_time() - started_cpu > prewarm_cpu_seconds
+            ):
+                logger.info("prewarm_budget_exhausted")
+                break
+            _prewarm_spec(spec)
+
+    app.state.prewarm_from_access_log = _prewarm_from_access_log
+
     @app.exception_handler(InvalidRequestError)
     async def _invalid_request_handler(_: Request, exc: InvalidRequestError) -> JSONResponse:
         return JSONResponse(status_code=400, content=_error_response("invalid_request", str(exc)))
@@ -140,6 +652,45 @@ def create_app(*, analytics_root: Path) -> FastAPI:
     async def _not_found_handler(_: Request, exc: NotFoundError) -> JSONResponse:
         return JSONResponse(status_code=404, content=_error_response("not_found", str(exc)))
 
+    def _forbidden() -> JSONResponse:
+        return JSONResponse(
+            status_code=403, content=_error_response("forbidden", "Admin token required")
+        )
+
+    @app.get("/debug/profiles/{profile_id}")
+    async def debug_profile(request: Request, profile_id: str, format: str = "speedscope"):
+        if not _is_admin(request):
+            return _forbidden()
+        profile = profiles.get(profile_id)
+        if profile is None:
+            raise NotFoundError(f"Unknown profile: {profile_id}")
+        if format == "collapsed":
+            return Response(content=profile.collapsed(), media_type="text/plain")
+        if format == "summary":
+            return profile.summary()
+        if format != "speedscope":
+            raise InvalidRequestError("format must be 'speedscope', 'collapsed' or 'summary'")
+        return profile.speedscope()
+
+    @app.get("/metrics")
+    async def metrics_endpoint():
+        return Response(content=metrics.render(), media_type=METRICS_MEDIA_TYPE)
+
+    @app.get("/debug/slow-queries")
+    async def debug_slow_queries(request: Request):
+        if not _is_admin(request):
+            return _forbidden()
+        return {
+            "threshold_seconds": slow_query_seconds,
+            "queries": query_service.slow_queries(),
+        }
+
+    @app.get("/debug/query-plans")
+    async def debug_query_plans(request: Request):
+        if not _is_admin(request):
+            return _forbidden()
+        return {"plans": query_service.recent_plans()}
+
     @app.get("/repositories", response_class=HTMLResponse)
     async def repositories(request: Request, date: str | None = None, language: str | None = None):
         kind = "repository"
@@ -157,7 +708,7 @@ def create_app(*, analytics_root: Path) -> FastAPI:
         else:
             selected_language = normalized[0] if normalized else "__all__"
 
-        return templates.TemplateResponse(
+        return _templates().TemplateResponse(
             "day.html",
             {
                 "request": request,
@@ -188,7 +739,7 @@ def create_app(*, analytics_root: Path) -> FastAPI:
         else:
             selected_language = normalized[0] if normalized else "__all__"
 
-        return templates.TemplateResponse(
+        return _templates().TemplateResponse(
             "day.html",
             {
                 "request": request,
@@ -203,55 +754,182 @@ def create_app(*, analytics_root: Path) -> FastAPI:
         )
 
     @app.get("/api/v1/dates")
-    async def api_dates(kind: str = Query(...)):
+    async def api_dates(request: Request, kind: str = Query(...)):
         try:
             dates = query_service.list_dates(kind)
         except InvalidRequestError as exc:
             return JSONResponse(status_code=400, content=_error_response("invalid_kind", str(exc)))
+        media_type = negotiate_media_type(request.headers.get("accept"), TABLE_MEDIA_TYPES)
+        if media_type != JSON_MEDIA_TYPE:
+            import pyarrow as pa
+
+            table = pa.table({"date": pa.array(dates, type=pa.string()).cast(pa.date32())})
+            body = encode_table(table, media_type, {"kind": kind})
+            return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
         return {"kind": kind, "dates": dates}
 
+    @app.get("/api/v1/search")
+    async def api_search(
+        request: Request,
+        q: str = Query(
+            ...,
+            description=(
+                "Case-insensitive name to look up. At least 2 characters; a 2-character "
+                "query only matches names starting with it, longer ones match anywhere."
+            ),
+        ),
+        kind: str | None = Query(None),
+        start: str | None = Query(None),
+        end: str | None = Query(None),
+        language: str | None = Query(None),
+        limit: str | None = Query(None),
+    ):
+        limit_value = _parse_limit(limit)
+        query = canonical_search(
+            q=q, kind=kind, start=start, end=end, language=language, limit=limit_value
+        )
+        payload = {
+            "q": q,
+            "kind": kind,
+            "start": start,
+            "end": end,
+            "language": language,
+            "limit": limit_value,
+        }
+
+        def rows() -> pa.Table:
+            return _canonical_rows(
+                query,
+                lambda params: query_service.search_table(
+                    params["q"],
+                    kind=params["kind"],
+                    start=params["start"],
+                    end=params["end"],
+                    language=params["language"],
+                    limit=CANONICAL_TOP_K,
+                ),
+            )
+
+        def envelope(count: int) -> dict[str, Any]:
+            response: dict[str, Any] = {"q": q, "count": count}
+            for field, value in [
+                ("kind", kind),
+                ("start", start),
+                ("end", end),
+                ("language", language),
+            ]:
+                if value is not None:
+                    response[field] = value
+            return response
+
+        def build() -> dict[str, Any]:
+            results = table_to_records(rows())
+            return {**envelope(len(results)), "results": results}
+
+        def build_table() -> tuple[pa.Table, dict[str, Any]]:
+            table = rows()
+            return table, envelope(table.num_rows)
+
+        return _cached_response(
+            request, "search", payload, build, kinds=[], through=None, build_table=build_table
+        )
+
     @app.get("/api/v1/day")
     async def api_day(
-        background_tasks: BackgroundTasks,
+        request: Request,
         kind: str = Query(...),
         date: str = Query(...),
         language: str | None = Query(None),
     ):
+        canonical = canonical_day(kind, date, language)
+        selected_date = canonical["date"]
+        selected_language = canonical["language"]
         try:
-            entries = _cached_day(kind, date, language or "__all__")
+            response = _cached_response(
+                request,
+                "day",
+                canonical,
+                lambda: _day_payload(kind, selected_date, selected_language),
+                kinds=[kind],
+                through=selected_date,
+                build_table=lambda: (
+                    query_service.get_day_table(kind, selected_date, selected_language),
+                    {"kind": kind, "date": selected_date, "language": selected_language},
+                ),
+            )
         except NotFoundError as exc:
             return JSONResponse(
                 status_code=404,
                 content=_error_response("date_not_found", str(exc), _date_hint(manifest, kind)),
             )
-        prev_date, next_date = _neighbor_dates(kind, date)
-        languages = {language or "__all__"}
-        languages.add("__all__")
-        for target_date in [prev_date, next_date]:
-            if not target_date:
-                continue
-            for lang in languages:
-                background_tasks.add_task(_prewarm_day, kind, target_date, lang)
-        return {
-            "kind": kind,
-            "date": date,
-            "language": language or "__all__",
-            "entries": entries,
-        }
+        _record_access(response, _cache_key("day", canonical), {"op": "day", **canonical})
+        _prewarm_after_day(kind, selected_date, selected_language)
+        return response
 
-    @app.get("/api/v1/top/reappearing")
-    async def api_top_reappearing(
-        kind: str = Query(...),
-        start: str = Query(...),
-        end: str = Query(...),
-        language: str | None = Query(None),
-        presence: str | None = Query(None),
-        include_all_languages: str | None = Query(None),
-        limit: str | None = Query(None),
-    ):
+    def _record_access(response: Response, key: str, spec: dict[str, Any]) -> None:
+        # Only served requests are worth replaying; 304s count as served.
+        if response.status_code < 400:
+            access_log.record(key, spec)
+
+    def _record_toplist(plan: _ToplistPlan) -> None:
+        spec = {"op": plan.prefix.removeprefix("top_"), **plan.payload}
+        access_log.record(plan.query.key(), spec)
+
+    def _build_toplist(plan: _ToplistPlan, key: str) -> CachedResponse:
+        rows = _canonical_rows(plan.query, partial(plan.load, scans=None))
+        return _encode(
+            plan.render(table_to_records(rows)), _validators(key, plan.kinds, plan.through)
+        )
+
+    def _toplist_response(request: Request, plan: _ToplistPlan) -> Response:
+        def rows() -> pa.Table:
+            return _canonical_rows(plan.query, lambda params: plan.load(params, None))
+
+        def build() -> dict[str, Any]:
+            return plan.render(table_to_records(rows()))
+
+        def build_table() -> tuple[pa.Table, dict[str, Any]]:
+            metadata = plan.render([])
+            del metadata["results"]
+            return rows(), metadata
+
+        response = _cached_response(
+            request,
+            plan.prefix,
+            plan.payload,
+            build,
+            kinds=plan.kinds,
+            through=plan.through,
+            build_table=build_table,
+        )
+        _record_toplist(plan)
+        return response
+
+    def _plan_reappearing(
+        *,
+        kind: str | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        language: str | None = None,
+        presence: str | None = None,
+        include_all_languages: str | None = None,
+        limit: str | None = None,
+    ) -> _ToplistPlan:
+        kind, start, end = _require(kind=kind, start=start, end=end)
         presence_mode = _parse_presence(presence)
         include_all = _parse_include_all_languages(include_all_languages, default=False)
         limit_value = _parse_limit(limit)
+        query = canonical_toplist(
+            manifest,
+            "top_reappearing",
+            kind=kind,
+            start=start,
+            end=end,
+            limit=limit_value,
+            language=language,
+            presence=presence_mode,
+            include_all_languages=include_all,
+        )
         payload = {
             "kind": kind,
             "start": start,
@@ -261,41 +939,57 @@ def create_app(*, analytics_root: Path) -> FastAPI:
             "include_all_languages": include_all,
             "limit": limit_value,
         }
-        results = _cached_toplist(
-            "top_reappearing",
-            payload,
-            lambda: query_service.top_reappearing(
+
+        def load(params: dict[str, Any], scans) -> pa.Table:
+            return query_service.top_reappearing_table(
                 kind,
-                start,
-                end,
-                language=language,
+                params["start"],
+                params["end"],
+                language=params["language"],
                 presence=presence_mode,
                 include_all_languages=include_all,
-                limit=limit_value,
-            ),
+                limit=CANONICAL_TOP_K,
+                scans=scans,
+            )
+
+        def render(results: list[dict[str, Any]]) -> dict[str, Any]:
+            response = {
+                "kind": kind,
+                "start": start,
+                "end": end,
+                "presence": presence_mode,
+                "include_all_languages": include_all,
+                "results": results,
+            }
+            if language is not None:
+                response["language"] = language
+            return response
+
+        return _ToplistPlan(
+            "top_reappearing", payload, query, [kind], query.params["end"], load, render
         )
-        payload = {
-            "kind": kind,
-            "start": start,
-            "end": end,
-            "presence": presence_mode,
-            "include_all_languages": include_all,
-            "results": results,
-        }
-        if language is not None:
-            payload["language"] = language
-        return payload
 
-    @app.get("/api/v1/top/owners")
-    async def api_top_owners(
-        start: str = Query(...),
-        end: str = Query(...),
-        language: str | None = Query(None),
-        include_all_languages: str | None = Query(None),
-        limit: str | None = Query(None),
-    ):
+    def _plan_owners(
+        *,
+        start: str | None = None,
+        end: str | None = None,
+        language: str | None = None,
+        include_all_languages: str | None = None,
+        limit: str | None = None,
+    ) -> _ToplistPlan:
+        start, end = _require(start=start, end=end)
         include_all = _parse_include_all_languages(include_all_languages, default=False)
         limit_value = _parse_limit(limit)
+        query = canonical_toplist(
+            manifest,
+            "top_owners",
+            kind="repository",
+            start=start,
+            end=end,
+            limit=limit_value,
+            language=language,
+            include_all_languages=include_all,
+        )
         payload = {
             "start": start,
             "end": end,
@@ -303,37 +997,52 @@ def create_app(*, analytics_root: Path) -> FastAPI:
             "include_all_languages": include_all,
             "limit": limit_value,
         }
-        results = _cached_toplist(
-            "top_owners",
-            payload,
-            lambda: query_service.top_owners(
-                start,
-                end,
-                language=language,
+
+        def load(params: dict[str, Any], scans) -> pa.Table:
+            return query_service.top_owners_table(
+                params["start"],
+                params["end"],
+                language=params["language"],
                 include_all_languages=include_all,
-                limit=limit_value,
-            ),
+                limit=CANONICAL_TOP_K,
+                scans=scans,
+            )
+
+        def render(results: list[dict[str, Any]]) -> dict[str, Any]:
+            response = {
+                "start": start,
+                "end": end,
+                "include_all_languages": include_all,
+                "results": results,
+            }
+            if language is not None:
+                response["language"] = language
+            return response
+
+        return _ToplistPlan(
+            "top_owners", payload, query, ["repository"], query.params["end"], load, render
         )
-        payload = {
-            "start": start,
-            "end": end,
-            "include_all_languages": include_all,
-            "results": results,
-        }
-        if language is not None:
-            payload["language"] = language
-        return payload
 
-    @app.get("/api/v1/top/languages")
-    async def api_top_languages(
-        start: str = Query(...),
-        end: str = Query(...),
-        kind: str | None = Query(None),
-        include_all_languages: str | None = Query(None),
-        limit: str | None = Query(None),
-    ):
+    def _plan_languages(
+        *,
+        start: str | None = None,
+        end: str | None = None,
+        kind: str | None = None,
+        include_all_languages: str | None = None,
+        limit: str | None = None,
+    ) -> _ToplistPlan:
+        start, end = _require(start=start, end=end)
         include_all = _parse_include_all_languages(include_all_languages, default=False)
         limit_value = _parse_limit(limit)
+        query = canonical_toplist(
+            manifest,
+            "top_languages",
+            kind=kind,
+            start=start,
+            end=end,
+            limit=limit_value,
+            include_all_languages=include_all,
+        )
         payload = {
             "start": start,
             "end": end,
@@ -341,38 +1050,55 @@ def create_app(*, analytics_root: Path) -> FastAPI:
             "include_all_languages": include_all,
             "limit": limit_value,
         }
-        results = _cached_toplist(
-            "top_languages",
-            payload,
-            lambda: query_service.top_languages(
-                start,
-                end,
-                kind=kind,
+
+        def load(params: dict[str, Any], scans) -> pa.Table:
+            return query_service.top_languages_table(
+                params["start"],
+                params["end"],
+                kind=params["kind"],
                 include_all_languages=include_all,
-                limit=limit_value,
-            ),
+                limit=CANONICAL_TOP_K,
+                scans=scans,
+            )
+
+        def render(results: list[dict[str, Any]]) -> dict[str, Any]:
+            response = {
+                "start": start,
+                "end": end,
+                "include_all_languages": include_all,
+                "results": results,
+            }
+            if kind:
+                response["kind"] = kind
+            return response
+
+        kinds = [kind] if kind else ["repository", "developer"]
+        return _ToplistPlan(
+            "top_languages", payload, query, kinds, query.params["end"], load, render
         )
-        payload = {
-            "start": start,
-            "end": end,
-            "include_all_languages": include_all,
-            "results": results,
-        }
-        if kind:
-            payload["kind"] = kind
-        return payload
 
-    @app.get("/api/v1/top/streaks")
-    async def api_top_streaks(
-        kind: str = Query(...),
-        start: str = Query(...),
-        end: str = Query(...),
-        language: str | None = Query(None),
-        include_all_languages: str | None = Query(None),
-        limit: str | None = Query(None),
-    ):
+    def _plan_streaks(
+        *,
+        kind: str | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        language: str | None = None,
+        include_all_languages: str | None = None,
+        limit: str | None = None,
+    ) -> _ToplistPlan:
+        kind, start, end = _require(kind=kind, start=start, end=end)
         include_all = _parse_include_all_languages(include_all_languages, default=False)
         limit_value = _parse_limit(limit)
+        query = canonical_toplist(
+            manifest,
+            "top_streaks",
+            kind=kind,
+            start=start,
+            end=end,
+            limit=limit_value,
+            language=language,
+            include_all_languages=include_all,
+        )
         payload = {
             "kind": kind,
             "start": start,
@@ -381,31 +1107,400 @@ def create_app(*, analytics_root: Path) -> FastAPI:
             "include_all_languages": include_all,
             "limit": limit_value,
         }
-        results = _cached_toplist(
-            "top_streaks",
-            payload,
-            lambda: query_service.top_streaks(
+
+        def load(params: dict[str, Any], scans) -> pa.Table:
+            return query_service.top_streaks_table(
                 kind,
-                start,
-                end,
-                language=language,
+                params["start"],
+                params["end"],
+                language=params["language"],
                 include_all_languages=include_all,
-                limit=limit_value,
-            ),
+                limit=CANONICAL_TOP_K,
+                scans=scans,
+            )
+
+        def render(results: list[dict[str, Any]]) -> dict[str, Any]:
+            response = {
+                "kind": kind,
+                "start": start,
+                "end": end,
+                "include_all_languages": include_all,
+                "results": results,
+            }
+            if language is not None:
+                response["language"] = language
+            return response
+
+        return _ToplistPlan(
+            "top_streaks", payload, query, [kind], query.params["end"], load, render
+        )
+
+    def _plan_newcomers(
+        *,
+        kind: str | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        language: str | None = None,
+        include_all_languages: str | None = None,
+        limit: str | None = None,
+    ) -> _ToplistPlan:
+        kind, start, end = _require(kind=kind, start=start, end=end)
+        include_all = _parse_include_all_languages(include_all_languages, default=False)
+        limit_value = _parse_limit(limit)
+        query = canonical_toplist(
+            manifest,
+            "top_newcomers",
+            kind=kind,
+            start=start,
+            end=end,
+            limit=limit_value,
+            language=language,
+            include_all_languages=include_all,
         )
         payload = {
             "kind": kind,
             "start": start,
             "end": end,
+            "language": language,
             "include_all_languages": include_all,
-            "results": results,
+            "limit": limit_value,
         }
-        if language is not None:
-            payload["language"] = language
-        return payload
+
+        # Newcomers look at each entity's full history, so a range scan cannot serve them.
+        def load(params: dict[str, Any], scans) -> pa.Table:
+            return query_service.top_newcomers_table(
+                kind,
+                params["start"],
+                params["end"],
+                language=params["language"],
+                include_all_languages=include_all,
+                limit=CANONICAL_TOP_K,
+            )
+
+        def render(results: list[dict[str, Any]]) -> dict[str, Any]:
+            response = {
+                "kind": kind,
+                "start": start,
+                "end": end,
+                "include_all_languages": include_all,
+                "results": results,
+            }
+            if language is not None:
+                response["language"] = language
+            return response
+
+        return _ToplistPlan(
+            "top_newcomers",
+            payload,
+            query,
+            [kind],
+            query.params["end"],
+            load,
+            render,
+            shares_scan=False,
+        )
+
+    # Batch ops and the parameters each accepts: the query parameters of the matching
+    # GET endpoint, spelled out so the batch API only changes when this table does.
+    window = ("start", "end", "include_all_languages", "limit")
+    planners: dict[str, tuple[Callable[..., _ToplistPlan], frozenset[str]]] = {
+        "reappearing": (
+            _plan_reappearing,
+            frozenset({"kind", "language", "presence", *window}),
+        ),
+        "owners": (_plan_owners, frozenset({"language", *window})),
+        "languages": (_plan_languages, frozenset({"kind", *window})),
+        "streaks": (_plan_streaks, frozenset({"kind", "language", *window})),
+        "newcomers": (_plan_newcomers, frozenset({"kind", "language", *window})),
+    }
+
+    def _plan_spec(spec: Any) -> _ToplistPlan:
+        if not isinstance(spec, dict):
+            raise InvalidRequestError("Each batch query must be an object")
+        params = dict(spec)
+        op = params.pop("op", None)
+        if op not in planners:
+            raise InvalidRequestError(f"Unsupported batch op: {op}")
+        planner, allowed = planners[op]
+        for name, value in params.items():
+            if name not in allowed:
+                raise InvalidRequestError(f"Unsupported parameter for {op}: {name}")
+            if value is not None:
+                params[name] = str(value).lower() if isinstance(value, bool) else str(value)
+        return planner(**params)
+
+    def _span_days(span: tuple[str, str]) -> int:
+        start, end = (date.fromisoformat(value) for value in span)
+        return (end - start).days + 1
+
+    def _prefers_raw(plan: _ToplistPlan) -> bool:
+        params = plan.query.params
+        engine = query_service.preferred_engine(
+            plan.prefix,
+            plan.kinds,
+            params["start"],
+            params["end"],
+            language=params.get("language"),
+            presence=params.get("presence", "day"),
+        )
+        return engine == "raw"
+
+    def _run_batch(specs: list[Any]) -> bytes:
+        """Answer a batch of ranked-list specs, sharing cache entries and range scans.
+
+        Uncached specs over the same canonical range, of at most ``BATCH_SCAN_MAX_DAYS``,
+        that the planner would answer from raw Parquet are computed from one filtered
+        scan per kind, and all remaining queries run concurrently on their own best engine.
+        A spec that fails other than as a bad request or missing data is logged and
+        answered with status 500; the other specs are unaffected.
+        """
+        outcomes: list[_ToplistPlan | Exception] = []
+        for spec in specs:
+            try:
+                outcomes.append(_plan_spec(spec))
+            except (InvalidRequestError, NotFoundError) as exc:
+                outcomes.append(exc)
+            except Exception as exc:
+                logger.exception("batch_query_failed stage=plan spec=%s", spec)
+                outcomes.append(exc)
+
+        responses: dict[str, CachedResponse | Exception] = {}
+        pending: dict[str, _ToplistPlan] = {}
+        for plan in outcomes:
+            if isinstance(plan, Exception):
+                continue
+            key = _cache_key(plan.prefix, plan.payload)
+            if key in responses or key in pending:
+                continue
+            cached = cache.get(key)
+            if cached is None:
+                pending[key] = plan
+            else:
+                responses[key] = cached
+
+        loads: dict[str, _ToplistPlan] = {}
+        for plan in pending.values():
+            rows_key = plan.query.key()
+            if rows_key not in loads and cache.get(rows_key) is None:
+                loads[rows_key] = plan
+        # Only specs the planner would answer from raw Parquet read what a scan holds;
+        # the rest are cheaper from a rollup or the presence matrix.
+        ranges: dict[tuple[str, str], list[_ToplistPlan]] = {}
+        for plan in loads.values():
+            span = (plan.query.params["start"], plan.query.params["end"])
+            if plan.shares_scan and _span_days(span) <= BATCH_SCAN_MAX_DAYS and _prefers_raw(plan):
+                ranges.setdefault(span, []).append(plan)
+        sharing = {
+            plan.query.key(): span
+            for span, plans in ranges.items()
+            if len(plans) > 1
+            for plan in plans
+        }
+        # Each scan reads only the columns the specs sharing it use.
+        shared: dict[tuple[tuple[str, str], str], set[str]] = {}
+        for span, plans in ranges.items():
+            if len(plans) < 2:
+                continue
+            for plan in plans:
+                for kind in plan.kinds:
+                    columns = query_service.scan_columns(plan.prefix, kind)
+                    shared.setdefault((span, kind), set()).update(columns)
+
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as executor:
+            scan_futures = {
+                (span, kind): executor.submit(
+                    propagate(query_service.scan_range), kind, *span, columns=columns
+                )
+                for (span, kind), columns in shared.items()
+            }
+            scans: dict[tuple[str, str], dict[str, Any]] = {}
+            for (span, kind), future in scan_futures.items():
+                # Specs without their shared scan load on their own, and fail there if
+                # the data is really unreadable.
+                try:
+                    scans.setdefault(span, {})[kind] = future.result()
+                except (InvalidRequestError, NotFoundError):
+                    continue
+                except Exception:
+                    logger.exception("batch_scan_failed kind=%s span=%s..%s", kind, *span)
+
+            def load(plan: _ToplistPlan) -> None:
+                span = sharing.get(plan.query.key())
+                span_scans = scans.get(span) if span is not None else None
+                if span_scans is not None and not set(plan.kinds) <= set(span_scans):
+                    span_scans = None
+                cache.set(
+                    plan.query.key(),
+                    plan.load(plan.query.params, span_scans),
+                    refresh=partial(plan.load, plan.query.params, None),
+                )
+
+            load_futures = {
+                rows_key: executor.submit(propagate(load), plan) for rows_key, plan in loads.items()
+            }
+            failures: dict[str, Exception] = {}
+            for rows_key, future in load_futures.items():
+                try:
+                    future.result()
+                except (InvalidRequestError, NotFoundError) as exc:
+                    failures[rows_key] = exc
+                except Exception as exc:
+                    logger.exception("batch_query_failed stage=load key=%s", rows_key)
+                    failures[rows_key] = exc
+
+        for key, plan in pending.items():
+            failure = failures.get(plan.query.key())
+            if failure is not None:
+                responses[key] = failure
+                continue
+            try:
+                cached = _build_toplist(plan, key)
+            except (InvalidRequestError, NotFoundError) as exc:
+                responses[key] = exc
+                continue
+            except Exception as exc:
+                logger.exception("batch_query_failed stage=build key=%s", key)
+                responses[key] = exc
+                continue
+            cache.set(key, cached, refresh=partial(_build_toplist, plan, key))
+            responses[key] = cached
+
+        items = []
+        for spec, plan in zip(specs, outcomes, strict=True):
+            op = spec.get("op") if isinstance(spec, dict) else None
+            result = plan
+            if not isinstance(plan, Exception):
+                result = responses[_cache_key(plan.prefix, plan.payload)]
+            if isinstance(result, CachedResponse):
+                _record_toplist(plan)
+                head = encode_json({"op": op, "status": 200})
+                items.append(head[:-1] + b',"body":' + result.body + b"}")
+            elif isinstance(result, NotFoundError):
+                error = _error_response("not_found", str(result))
+                items.append(encode_json({"op": op, "status": 404, "body": error}))
+            elif isinstance(result, InvalidRequestError):
+                error = _error_response("invalid_request", str(result))
+                items.append(encode_json({"op": op, "status": 400, "body": error}))
+            else:
+                # Already logged with its traceback; the client only learns it failed.
+                error = _error_response("internal_error", "Query failed")
+                items.append(encode_json({"op": op, "status": 500, "body": error}))
+        return b'{"results":[' + b",".join(items) + b"]}"
+
+    @app.post("/api/v1/batch")
+    async def api_batch(request: Request):
+        try:
+            body = await request.json()
+        except ValueError as exc:
+            raise InvalidRequestError("Request body must be JSON") from exc
+        specs = body.get("queries") if isinstance(body, dict) else None
+        if not isinstance(specs, list) or not specs:
+            raise InvalidRequestError("queries must be a non-empty list")
+        if len(specs) > BATCH_MAX_QUERIES:
+            raise InvalidRequestError(f"At most {BATCH_MAX_QUERIES} queries per batch")
+        payload = await run_in_threadpool(propagate(_run_batch), specs)
+        return _raw_response(request, CachedResponse(body=payload, media_type=JSON_MEDIA_TYPE))
+
+    @app.get("/api/v1/days")
+    async def api_days(
+        request: Request,
+        kind: str = Query(...),
+        start: str = Query(...),
+        end: str = Query(...),
+        language: str | None = Query(None),
+        format: str | None = Query(None),
+    ):
+        media_type = _parse_stream_format(format, request.headers.get("accept"))
+        reader = query_service.iter_days(kind, start, end, language=language or None)
+        if media_type == ARROW_STREAM_MEDIA_TYPE:
+            chunks = arrow_stream_chunks(reader)
+        elif media_type == PARQUET_MEDIA_TYPE:
+            chunks = parquet_chunks(reader)
+        else:
+            chunks = ndjson_chunks(reader)
+        return StreamingResponse(chunks, media_type=media_type, headers={"Vary": "Accept"})
+
+    @app.get("/api/v1/top/reappearing")
+    async def api_top_reappearing(
+        request: Request,
+        kind: str = Query(...),
+        start: str = Query(...),
+        end: str = Query(...),
+        language: str | None = Query(None),
+        presence: str | None = Query(None),
+        include_all_languages: str | None = Query(None),
+        limit: str | None = Query(None),
+    ):
+        plan = _plan_reappearing(
+            kind=kind,
+            start=start,
+            end=end,
+            language=language,
+            presence=presence,
+            include_all_languages=include_all_languages,
+            limit=limit,
+        )
+        return _toplist_response(request, plan)
+
+    @app.get("/api/v1/top/owners")
+    async def api_top_owners(
+        request: Request,
+        start: str = Query(...),
+        end: str = Query(...),
+        language: str | None = Query(None),
+        include_all_languages: str | None = Query(None),
+        limit: str | None = Query(None),
+    ):
+        plan = _plan_owners(
+            start=start,
+            end=end,
+            language=language,
+            include_all_languages=include_all_languages,
+            limit=limit,
+        )
+        return _toplist_response(request, plan)
+
+    @app.get("/api/v1/top/languages")
+    async def api_top_languages(
+        request: Request,
+        start: str = Query(...),
+        end: str = Query(...),
+        kind: str | None = Query(None),
+        include_all_languages: str | None = Query(None),
+        limit: str | None = Query(None),
+    ):
+        plan = _plan_languages(
+            start=start,
+            end=end,
+            kind=kind,
+            include_all_languages=include_all_languages,
+            limit=limit,
+        )
+        return _toplist_response(request, plan)
+
+    @app.get("/api/v1/top/streaks")
+    async def api_top_streaks(
+        request: Request,
+        kind: str = Query(...),
+        start: str = Query(...),
+        end: str = Query(...),
+        language: str | None = Query(None),
+        include_all_languages: str | None = Query(None),
+        limit: str | None = Query(None),
+    ):
+        plan = _plan_streaks(
+            kind=kind,
+            start=start,
+            end=end,
+            language=language,
+            include_all_languages=include_all_languages,
+            limit=limit,
+        )
+        return _toplist_response(request, plan)
 
     @app.get("/api/v1/top/newcomers")
     async def api_top_newcomers(
+        request: Request,
         kind: str = Query(...),
         start: str = Query(...),
         end: str = Query(...),
@@ -413,37 +1508,14 @@ def create_app(*, analytics_root: Path) -> FastAPI:
         include_all_languages: str | None = Query(None),
         limit: str | None = Query(None),
     ):
-        include_all = _parse_include_all_languages(include_all_languages, default=False)
-        limit_value = _parse_limit(limit)
-        payload = {
-            "kind": kind,
-            "start": start,
-            "end": end,
-            "language": language,
-            "include_all_languages": include_all,
-            "limit": limit_value,
-        }
-        results = _cached_toplist(
-            "top_newcomers",
-            payload,
-            lambda: query_service.top_newcomers(
-                kind,
-                start,
-                end,
-                language=language,
-                include_all_languages=include_all,
-                limit=limit_value,
-            ),
+        plan = _plan_newcomers(
+            kind=kind,
+            start=start,
+            end=end,
+            language=language,
+            include_all_languages=include_all_languages,
+            limit=limit,
         )
-        payload = {
-            "kind": kind,
-            "start": start,
-            "end": end,
-            "include_all_languages": include_all,
-            "results": results,
-        }
-        if language is not None:
-            payload["language"] = language
-        return payload
+        return _toplist_response(request, plan)
 
     return app
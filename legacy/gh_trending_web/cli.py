@@ -3,10 +3,6 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-import uvicorn
-
-from .app import create_app
-
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="gh_trending_web")
@@ -14,13 +10,55 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--analytics", default="analytics", help="Analytics data directory")
     parser.add_argument("--host", default="127.0.0.1", help="Bind host")
     parser.add_argument("--port", default=8000, type=int, help="Bind port")
+    parser.add_argument(
+        "--slow-query-seconds",
+        type=float,
+        default=None,
+        help="Log DuckDB queries slower than this many seconds",
+    )
+    parser.add_argument(
+        "--profile-slow-queries",
+        action="store_true",
+        help="Re-run slow queries under DuckDB profiling in the background for /debug/slow-queries",
+    )
+    parser.add_argument(
+        "--access-log",
+        type=Path,
+        default=None,
+        help="Persist request frequencies here and replay the top ones on startup",
+    )
+    parser.add_argument(
+        "--prewarm-limit", type=int, default=200, help="Most logged requests to replay"
+    )
+    parser.add_argument(
+        "--prewarm-seconds", type=float, default=30.0, help="Wall-time budget for the replay"
+    )
+    parser.add_argument(
+        "--presence-matrix",
+        action="store_true",
+        help="Load day presence rollups into memory for reappearing and streak toplists "
+        "(needs NumPy)",
+    )
     return parser
 
 
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
-    app = create_app(analytics_root=Path(args.analytics))
+    # Deferred so `--help` does not import FastAPI, DuckDB or uvicorn.
+    import uvicorn
+
+    from .app import create_app
+
+    app = create_app(
+        analytics_root=Path(args.analytics),
+        slow_query_seconds=args.slow_query_seconds,
+        profile_slow_queries=args.profile_slow_queries,
+        access_log_path=args.access_log,
+        prewarm_limit=args.prewarm_limit,
+        prewarm_seconds=args.prewarm_seconds,
+        presence_matrix=args.presence_matrix,
+    )
     uvicorn.run(app, host=args.host, port=args.port, log_level="info")
     return 0
 
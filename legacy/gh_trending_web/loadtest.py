@@ -0,0 +1,295 @@
+"""Replay a realistic request mix against the web app at increasing concurrency.
+
+    PYTHONPATH=py:legacy python -m gh_trending_web.loadtest --analytics analytics \
+        --levels 1,4,16,64 --duration 10 --output load.json
+
+Without ``--url`` the app is started under uvicorn in a child process, so the server does
+not share a GIL with the client threads; with it, an already running server is targeted. Each level reports throughput, p50/p95/p99 latency, cache hit ratio
+(read from ``/metrics``) and errors.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from gh_trending_analytics.manifest import Manifest
+
+DEFAULT_LEVELS = (1, 4, 16, 64)
+TOPLIST_SPANS = (7, 30, 90, 365)
+SEARCH_TERMS = ("py", "rust", "go", "react", "llm", "awesome", "cli", "ai")
+CACHE_EVENT = re.compile(r'^gh_trending_cache_events_total\{event="(hit|miss)"\} (\S+)$', re.M)
+
+
+@dataclass(frozen=True)
+class RequestSpec:
+    path: str
+    params: dict[str, str]
+
+
+@dataclass
+class LevelReport:
+    concurrency: int
+    requests: int
+    errors: int
+    duration_seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    cache_hit_ratio: float | None
+    statuses: dict[str, int] = field(default_factory=dict)
+
+
+def _percentile(ordered: list[float], quantile: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(quantile * len(ordered)) - 1))
+    return ordered[index]
+
+
+class RequestMix:
+    """Weighted request generator shaped like dashboard traffic.
+
+    Recent dates dominate day views, toplists use the standard rolling windows ending on
+    the latest date, and a smaller share goes to search and the dates listing.
+    """
+
+    def __init__(self, manifest: Manifest) -> None:
+        self._kinds = {}
+        for kind, manifest_kind in manifest.kinds.items():
+            if manifest_kind.dates:
+                languages = [value for value in manifest_kind.languages if value is not None]
+                self._kinds[kind] = (list(manifest_kind.dates), languages)
+        if not self._kinds:
+            raise ValueError("Manifest has no dates to build a request mix from")
+
+    def sample(self, rng: random.Random) -> RequestSpec:
+        kind = rng.choice(sorted(self._kinds))
+        dates, languages = self._kinds[kind]
+        roll = rng.random()
+        # Recency-skewed: index from the end follows a geometric-like distribution.
+        recent = dates[max(0, len(dates) - 1 - int(rng.expovariate(1 / 7)))]
+        language = rng.choice(languages) if languages and rng.random() < 0.6 else None
+        if roll < 0.45:
+            params = {"kind": kind, "date": recent}
+            if language:
+                params["language"] = language
+            return RequestSpec("/api/v1/day", params)
+        end = dates[-1]
+        span = rng.choice(TOPLIST_SPANS)
+        start = max(dates[0], (date.fromisoformat(end) - timedelta(days=span - 1)).isoformat())
+        window = {"start": start, "end": end}
+        if roll < 0.65:
+            return RequestSpec("/api/v1/top/reappearing", {"kind": kind, **window})
+        if roll < 0.75:
+            return RequestSpec("/api/v1/top/streaks", {"kind": kind, **window})
+        if roll < 0.82:
+            return RequestSpec("/api/v1/top/newcomers", {"kind": kind, **window})
+        if roll < 0.87:
+            return RequestSpec("/api/v1/top/languages", window)
+        if roll < 0.92 and "repository" in self._kinds:
+            return RequestSpec("/api/v1/top/owners", window)
+        if roll < 0.97:
+            return RequestSpec("/api/v1/search", {"q": rng.choice(SEARCH_TERMS)})
+        return RequestSpec("/api/v1/dates", {"kind": kind})
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(analytics_root: Path, *, timeout: float = 30.0) -> tuple[subprocess.Popen, str]:
+    """Run the web CLI in a child process and wait until it answers; returns (process, url)."""
+    import httpx
+
+    port = _free_port()
+    # The child resolves imports the way this process does, whatever PYTHONPATH it had.
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(path for path in sys.path if path)}
+    command = [
+        sys.executable,
+        "-m",
+        "gh_trending_web",
+        "--analytics",
+        str(analytics_root),
+        "--port",
+        str(port),
+    ]
+    # Per-request access lines go to stdout; startup errors still reach stderr.
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode} before serving")
+        try:
+            httpx.get(f"{base_url}/metrics")
+            return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    stop_server(process)
+    raise RuntimeError(f"Server did not answer on {base_url} within {timeout:.0f}s")
+
+
+def stop_server(process: subprocess.Popen, *, timeout: float = 10.0) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _cache_counts(client, base_url: str) -> tuple[float, float] | None:
+    try:
+        text = client.get(f"{base_url}/metrics").text
+    except Exception:
+        return None
+    counts = {event: float(value) for event, value in CACHE_EVENT.findall(text)}
+    if not counts:
+        return None
+    return counts.get("hit", 0.0), counts.get("miss", 0.0)
+
+
+def run_level(
+    base_url: str,
+    mix: RequestMix,
+    *,
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+) -> LevelReport:
+    import httpx
+
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    errors = 0
+    lock = threading.Lock()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    with httpx.Client(base_url=base_url, limits=limits, timeout=30.0) as client:
+        before = _cache_counts(client, base_url)
+        started = time.perf_counter()
+        deadline = started + duration
+
+        def worker(index: int) -> None:
+            nonlocal errors
+            rng = random.Random(seed * 1_000_003 + index)
+            while time.perf_counter() < deadline:
+                spec = mix.sample(rng)
+                sent = time.perf_counter()
+                try:
+                    status = str(client.get(spec.path, params=spec.params).status_code)
+                except httpx.HTTPError as exc:
+                    status = type(exc).__name__
+                elapsed = time.perf_counter() - sent
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+                    if not status.isdigit() or int(status) >= 500:
+                        errors += 1
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        after = _cache_counts(client, base_url)
+
+    hit_ratio = None
+    if before is not None and after is not None:
+        hits, misses = after[0] - before[0], after[1] - before[1]
+        hit_ratio = hits / (hits + misses) if hits + misses else None
+    ordered = sorted(latencies)
+    return LevelReport(
+        concurrency=concurrency,
+        requests=len(ordered),
+        errors=errors,
+        duration_seconds=wall,
+        throughput=len(ordered) / wall if wall else 0.0,
+        p50_ms=_percentile(ordered, 0.50) * 1000,
+        p95_ms=_percentile(ordered, 0.95) * 1000,
+        p99_ms=_percentile(ordered, 0.99) * 1000,
+        cache_hit_ratio=hit_ratio,
+        statuses=statuses,
+    )
+
+
+def run(
+    base_url: str,
+    manifest: Manifest,
+    *,
+    levels: tuple[int, ...] = DEFAULT_LEVELS,
+    duration: float = 10.0,
+    seed: int = 0,
+) -> list[LevelReport]:
+    mix = RequestMix(manifest)
+    return [
+        run_level(base_url, mix, concurrency=level, duration=duration, seed=seed)
+        for level in levels
+    ]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="gh_trending_web.loadtest")
+    parser.add_argument("--analytics", default="analytics", help="Analytics data directory")
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument(
+        "--levels",
+        default=",".join(str(level) for level in DEFAULT_LEVELS),
+        help="Comma-separated concurrency levels",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write JSON results here")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    analytics_root = Path(args.analytics)
+    levels = tuple(int(level) for level in args.levels.split(",") if level)
+    manifest = Manifest.load(analytics_root / "parquet" / "manifest.json")
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_server(analytics_root)
+    try:
+        reports = run(base_url, manifest, levels=levels, duration=args.duration, seed=args.seed)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    print(f"{'conc':>5} {'req/s':>9} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'hit%':>6} {'err':>5}")
+    for report in reports:
+        ratio = "-" if report.cache_hit_ratio is None else f"{report.cache_hit_ratio * 100:.1f}"
+        print(
+            f"{report.concurrency:>5} {report.throughput:>9.1f} {report.p50_ms:>8.1f} "
+            f"{report.p95_ms:>8.1f} {report.p99_ms:>8.1f} {ratio:>6} {report.errors:>5}"
+        )
+    if args.output:
+        payload: dict[str, Any] = {
+            "target": args.url or "subprocess",
+            "duration_seconds": args.duration,
+            "levels": [asdict(report) for report in reports],
+        }
+        args.output.write_text(json.dumps(payload, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,210 @@
+"""Benchmark the build, rollup, query and HTTP layers against a synthetic archive.
+
+Run from the repository root:
+
+    PYTHONPATH=py:legacy python py/benchmarks/run.py --scale 0.05 --output bench.json
+    PYTHONPATH=py:legacy python py/benchmarks/run.py --baseline py/benchmarks/baseline.json
+
+``--scale 1`` approximates the production archive; ``--scale 10`` is ten times larger.
+``baseline.json`` holds the committed results at the default scale and seed; refresh it
+with ``--output py/benchmarks/baseline.json`` when a change moves the numbers on purpose.
+The process exits with status 1 when any benchmark regresses past ``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from dataclasses import asdict, replace
+from datetime import timedelta
+from pathlib import Path
+
+from gh_trending_analytics.benchmark import (
+    DEFAULT_MIN_DELTA_SECONDS,
+    DEFAULT_TOLERANCE,
+    BenchmarkResult,
+    compare,
+    load_results,
+    measure,
+    write_results,
+)
+from gh_trending_analytics.synthetic import KINDS, REAL_ARCHIVE_SPEC, write_archive
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=0.05, help="Fraction of production size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--workdir", type=Path, help="Keep generated data here")
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="Compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA_SECONDS)
+    return parser
+
+
+def run_suite(workdir: Path, *, scale: float, seed: int, repeats: int) -> list[BenchmarkResult]:
+    from fastapi.testclient import TestClient
+    from gh_trending_analytics.build import build_kind
+    from gh_trending_analytics.query import DuckDBQueryService, QueryConfig
+    from gh_trending_analytics.rollup import rollup_kind
+    from gh_trending_web.app import create_app
+
+    spec = replace(REAL_ARCHIVE_SPEC.scaled(scale), seed=seed)
+    archive_root = workdir / "archive"
+    analytics_root = workdir / "analytics"
+    write_archive(archive_root, spec)
+
+    results = []
+    for kind in KINDS:
+        results.append(
+            measure(
+                f"build_kind.{kind}",
+                lambda kind=kind: build_kind(
+                    archive_root=archive_root,
+                    analytics_root=analytics_root,
+                    kind=kind,
+                    rebuild_year=True,
+                ),
+                repeats=1,
+                warmup=0,
+            )
+        )
+        results.append(
+            measure(
+                f"rollup_kind.{kind}",
+                lambda kind=kind: rollup_kind(
+                    analytics_root=analytics_root, kind=kind, from_date=None
+                ),
+                repeats=1,
+                warmup=0,
+            )
+        )
+
+    end = spec.end.isoformat()
+    month = (spec.end - timedelta(days=29)).isoformat()
+    year = max(spec.start, spec.end - timedelta(days=364)).isoformat()
+    language = "python"
+    toplist = {"include_all_languages": False, "limit": 50}
+    services = {
+        "rollup": DuckDBQueryService(QueryConfig(analytics_root=analytics_root)),
+        "raw": DuckDBQueryService(QueryConfig(analytics_root=analytics_root, use_rollups=False)),
+    }
+    raw = services["raw"]
+    cases = {
+        "list_dates": lambda: raw.list_dates("repository"),
+        "list_languages": lambda: raw.list_languages("repository"),
+        "search": lambda: raw.search(
+            "repo1", kind=None, start=None, end=None, language=None, limit=50
+        ),
+        "search.filtered": lambda: raw.search(
+            "repo1", kind="repository", start=month, end=end, language=language, limit=50
+        ),
+        "get_day": lambda: raw.get_day("repository", end, None),
+        "get_day_tables": lambda: raw.get_day_tables("repository", end),
+        "iter_days.month": lambda: raw.iter_days(
+            "repository", month, end, language=None
+        ).read_all(),
+        "scan_range.month": lambda: raw.scan_range("repository", month, end),
+        "top_newcomers.month": lambda: raw.top_newcomers(
+            "repository", month, end, language=None, **toplist
+        ),
+    }
+    for path, service in services.items():
+        for span_name, start in (("month", month), ("year", year)):
+            cases[f"top_reappearing.{span_name}.{path}"] = lambda service=service, start=start: (
+                service.top_reappearing(
+                    "repository", start, end, language=None, presence="day", **toplist
+                )
+            )
+            cases[f"top_streaks.{span_name}.{path}"] = lambda service=service, start=start: (
+                service.top_streaks("repository", start, end, language=None, **toplist)
+            )
+        cases[f"top_owners.year.{path}"] = lambda service=service: service.top_owners(
+            year, end, language=None, **toplist
+        )
+        cases[f"top_languages.year.{path}"] = lambda service=service: service.top_languages(
+            year, end, kind=None, **toplist
+        )
+    for name, fn in cases.items():
+        results.append(measure(f"query.{name}", fn, repeats=repeats))
+
+    app = create_app(analytics_root=analytics_root)
+    client = TestClient(app)
+    routes = {
+        "day": ("/api/v1/day", {"kind": "repository", "date": end}),
+        "top_reappearing": (
+            "/api/v1/top/reappearing",
+            {"kind": "repository", "start": year, "end": end},
+        ),
+        "top_owners": ("/api/v1/top/owners", {"start": year, "end": end}),
+        "top_languages": ("/api/v1/top/languages", {"start": year, "end": end}),
+        "top_streaks": ("/api/v1/top/streaks", {"kind": "repository", "start": year, "end": end}),
+        "top_newcomers": (
+            "/api/v1/top/newcomers",
+            {"kind": "repository", "start": month, "end": end},
+        ),
+        "search": ("/api/v1/search", {"q": "repo1"}),
+        "days": ("/api/v1/days", {"kind": "repository", "start": month, "end": end}),
+    }
+
+    def get(path: str, params: dict[str, str], *, cold: bool) -> None:
+        if cold:
+            app.state.cache.clear()
+        response = client.get(path, params=params)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.text}")
+
+    for name, (path, params) in routes.items():
+        results.append(
+            measure(
+                f"http.{name}.cold",
+                lambda path=path, params=params: get(path, params, cold=True),
+                repeats=repeats,
+            )
+        )
+        results.append(
+            measure(
+                f"http.{name}.warm",
+                lambda path=path, params=params: get(path, params, cold=False),
+                repeats=repeats,
+            )
+        )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="gh-trending-bench-") as scratch:
+        workdir = args.workdir or Path(scratch)
+        results = run_suite(workdir, scale=args.scale, seed=args.seed, repeats=args.repeats)
+
+    width = max(len(result.name) for result in results)
+    for result in results:
+        print(f"{result.name:<{width}}  median={result.median * 1000:9.2f}ms")
+    if args.output:
+        meta = {"scale": args.scale, "seed": args.seed, "repeats": args.repeats}
+        write_results(args.output, results, meta)
+    if args.baseline:
+        current = {result.name: asdict(result) for result in results}
+        regressions = compare(
+            current,
+            load_results(args.baseline),
+            tolerance=args.tolerance,
+            min_delta=args.min_delta,
+        )
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression.name}: {regression.baseline * 1000:.2f}ms -> "
+                f"{regression.current * 1000:.2f}ms ({regression.ratio:.2f}x)",
+                file=sys.stderr,
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
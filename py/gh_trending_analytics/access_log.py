@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .utils import ensure_dir
+
+ACCESS_LOG_VERSION = 1
+DEFAULT_HALF_LIFE_SECONDS = 3 * 24 * 3600.0
+DEFAULT_MAX_KEYS = 5000
+DEFAULT_FLUSH_EVERY = 100
+
+logger = logging.getLogger("gh_trending_analytics.access_log")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, int | float) and not isinstance(value, bool) and math.isfinite(value)
+
+
+@dataclass
+class AccessRecord:
+    spec: dict[str, Any]
+    count: float
+    last_seen: float
+
+
+def _parse_entry(entry: Any) -> tuple[str, AccessRecord] | None:
+    """A saved ``[key, spec, count, last_seen]`` entry, or None when it is malformed."""
+    if not isinstance(entry, list) or len(entry) != 4:
+        return None
+    key, spec, count, last_seen = entry
+    if not isinstance(key, str) or not isinstance(spec, dict):
+        return None
+    if not _is_number(count) or not _is_number(last_seen):
+        return None
+    return key, AccessRecord(spec=spec, count=float(count), last_seen=float(last_seen))
+
+
+class AccessLog:
+    """Exponentially decayed request counts per canonical cache key.
+
+    Each key keeps the spec needed to rebuild its response. A hit adds one to the count
+    after decaying it by ``half_life`` since the last hit, so the score blends frequency
+    with recency. The log is written as compact JSON every ``flush_every`` records and
+    trimmed to the ``max_keys`` highest scores. Those writes run on a background thread,
+    since requests record from the event loop; :meth:`flush` writes synchronously.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        *,
+        half_life: float = DEFAULT_HALF_LIFE_SECONDS,
+        max_keys: int = DEFAULT_MAX_KEYS,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+    ) -> None:
+        self.path = path
+        self._half_life = half_life
+        self._max_keys = max_keys
+        self._flush_every = flush_every
+        self._records: dict[str, AccessRecord] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
+
+    @classmethod
+    def load(cls, path: Path, **kwargs: Any) -> AccessLog:
+        """Read a saved log; a missing or unreadable one starts empty.
+
+        The log only steers cache warming, so damage never stops the caller: a file of
+        the wrong shape is discarded and malformed entries are skipped, with a warning.
+        """
+        log = cls(path, **kwargs)
+        try:
+            raw = json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return log
+        except (OSError, ValueError):
+            logger.warning("access_log_unreadable path=%s", path, exc_info=True)
+            return log
+        entries = raw.get("entries") if isinstance(raw, dict) else None
+        if not isinstance(entries, list) or raw.get("version") != ACCESS_LOG_VERSION:
+            logger.warning("access_log_discarded path=%s reason=unexpected shape or version", path)
+            return log
+        skipped = 0
+        for entry in entries:
+            record = _parse_entry(entry)
+            if record is None:
+                skipped += 1
+                continue
+            log._records[record[0]] = record[1]
+        if skipped:
+            logger.warning("access_log_entries_skipped path=%s skipped=%d", path, skipped)
+        return log
+
+    def _score(self, record: AccessRecord, now: float) -> float:
+        age = max(0.0, now - record.last_seen)
+        return record.count * math.pow(0.5, age / self._half_life)
+
+    def record(self, key: str, spec: dict[str, Any], now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                self._records[key] = AccessRecord(spec=spec, count=1.0, last_seen=now)
+            else:
+                record.count = self._score(record, now) + 1.0
+                record.last_seen = now
+            self._pending += 1
+            flusher = None
+            if (
+                self.path is not None
+                and self._pending >= self._flush_every
+                and self._flusher is None
+            ):
+                flusher = threading.Thread(
+                    target=self._flush_in_background, name="access-log-flush", daemon=True
+                )
+                self._flusher = flusher
+        if flusher is not None:
+            flusher.start()
+
+    def _flush_in_background(self) -> None:
+        try:
+            self.flush()
+        except OSError:
+            logger.exception("access_log_flush_failed path=%s", self.path)
+        finally:
+            with self._lock:
+                self._flusher = None
+
+    def top(self, limit: int, now: float | None = None) -> list[tuple[str, dict[str, Any]]]:
+        """The ``limit`` highest-scoring keys with their specs, best first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            ranked = sorted(
+                self._records.items(),
+                key=lambda item: (-self._score(item[1], now), item[0]),
+            )
+        return [(key, record.spec) for key, record in ranked[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def flush(self) -> None:
+        if self.path is None:
+            return
+        now = time.time()
+        with self._flush_lock:
+            with self._lock:
+                if len(self._records) > self._max_keys:
+                    ranked = sorted(
+                        self._records.items(), key=lambda item: -self._score(item[1], now)
+                    )
+                    self._records = dict(ranked[: self._max_keys])
+                entries = [
+                    [key, record.spec, record.count, record.last_seen]
+                    for key, record in self._records.items()
+                ]
+                self._pending = 0
+            payload = {"version": ACCESS_LOG_VERSION, "entries": entries}
+            ensure_dir(self.path.parent)
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            tmp_path.write_text(json.dumps(payload, separators=(",", ":")))
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+RESULTS_FORMAT = 1
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_SECONDS = 0.005
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    name: str
+    repeats: int
+    min: float
+    median: float
+    p95: float
+    mean: float
+
+
+@dataclass(frozen=True)
+class Regression:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+
+def measure(
+    name: str, fn: Callable[[], Any], *, repeats: int = 5, warmup: int = 1
+) -> BenchmarkResult:
+    """Time ``fn`` ``repeats`` times after ``warmup`` untimed calls."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    ordered = sorted(timings)
+    p95_index = min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))
+    return BenchmarkResult(
+        name=name,
+        repeats=repeats,
+        min=ordered[0],
+        median=statistics.median(ordered),
+        p95=ordered[p95_index],
+        mean=statistics.fmean(ordered),
+    )
+
+
+def environment() -> dict[str, str]:
+    versions = {"python": platform.python_version(), "machine": platform.machine()}
+    for module in ("duckdb", "pyarrow", "fastapi"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            continue
+    return versions
+
+
+def write_results(path: Path, results: list[BenchmarkResult], meta: dict[str, Any]) -> None:
+    payload = {
+        "format": RESULTS_FORMAT,
+        "meta": {**meta, "environment": environment()},
+        "results": {result.name: asdict(result) for result in results},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True, default=str) + "\n")
+
+
+def load_results(path: Path) -> dict[str, dict[str, Any]]:
+    return json.loads(path.read_text())["results"]
+
+
+def compare(
+    current: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    *,
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_delta: float = DEFAULT_MIN_DELTA_SECONDS,
+) -> list[Regression]:
+    """Benchmarks whose median grew by more than ``tolerance`` and ``min_delta`` seconds.
+
+    The absolute floor keeps millisecond-scale noise on cached paths from failing runs.
+    """
+    regressions = []
+    for name, result in sorted(current.items()):
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        before = reference["median"]
+        after = result["median"]
+        if after > before * (1 + tolerance) and after - before > min_delta:
+            regressions.append(Regression(name=name, baseline=before, current=after))
+    return regressions
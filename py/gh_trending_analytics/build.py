@@ -10,6 +10,7 @@ import pyarrow.parquet as pq
 
 from .archive_reader import ArchiveFile, iter_archive_files
 from .manifest import Manifest
+from .search import build_name_index
 from .utils import ValidationError, ensure_dir, iso_date, sort_languages
 
 KIND_TABLES = {
@@ -24,6 +25,7 @@ class BuildResult:
     years_built: list[int]
     parquet_paths: list[Path]
     manifest_path: Path
+    search_index_paths: list[Path]
 
 
 def _repo_schema() -> pa.Schema:
@@ -221,6 +223,15 @@ def build_kind(
         if path is not None:
             parquet_paths.append(path)
 
+    search_index_paths: list[Path] = []
+    table_name = _table_name(kind)
+    for parquet_path in sorted(
+        (analytics_root / "parquet" / kind).glob(f"year=*/{table_name}.parquet")
+    ):
+        index_path = build_name_index(analytics_root, kind, parquet_path)
+        if index_path is not None:
+            search_index_paths.append(index_path)
+
     manifest = Manifest.load(analytics_root / "parquet" / "manifest.json")
     dates, languages, languages_by_date, row_counts_by_year = _manifest_from_archive(
         archive_root, kind
@@ -240,4 +251,5 @@ def build_kind(
         years_built=years,
         parquet_paths=parquet_paths,
         manifest_path=manifest_path,
+        search_index_paths=search_index_paths,
     )
@@ -1,15 +1,53 @@
 from __future__ import annotations
 
+import logging
+import threading
 import time
 from collections import OrderedDict
-from dataclasses import dataclass
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from typing import Any
 
+from .encoding import COMPRESSION_MIN_BYTES, compress
+
+# A refresh stuck longer than this (e.g. dropped by a full queue) may be rescheduled.
+REFRESH_TIMEOUT_SECONDS = 60.0
+
+logger = logging.getLogger("gh_trending_analytics.cache")
+
+_refreshing: ContextVar[bool] = ContextVar("gh_trending_cache_refreshing", default=False)
+
 
 @dataclass
 class CacheEntry:
     value: Any
     expires_at: float
+    stale_until: float = 0.0
+    ttl: float = 0.0
+    refresh: Callable[[], Any] | None = None
+    refresh_started: float | None = None
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    media_type: str
+    headers: dict[str, str] = field(default_factory=dict)
+    variants: dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    def variant(self, encoding: str | None) -> bytes | None:
+        """Return the body compressed with ``encoding``, compressing it at most once.
+
+        Bodies under ``COMPRESSION_MIN_BYTES`` are never compressed and yield ``None``.
+        """
+        if encoding is None or len(self.body) < COMPRESSION_MIN_BYTES:
+            return None
+        compressed = self.variants.get(encoding)
+        if compressed is None:
+            compressed = compress(self.body, encoding)
+            self.variants[encoding] = compressed
+        return compressed
 
 
 @dataclass
@@ -21,39 +59,120 @@ class CacheStats:
     expirations: int = 0
     prewarm_success: int = 0
     prewarm_failure: int = 0
+    stale_serves: int = 0
+    refreshes: int = 0
+    refresh_failures: int = 0
 
 
 class ResultCache:
-    def __init__(self, *, max_size: int = 1024, default_ttl: float = 300.0) -> None:
+    """LRU cache with a soft ``default_ttl`` and, for refreshable entries, a ``hard_ttl``.
+
+    Entries set with a ``refresh`` callable outlive their soft TTL: until the hard TTL a
+    lookup returns the stale value (counted as a hit and a stale serve) and schedules one
+    background refresh through ``submit(key, fn)``, or a daemon thread without it. Loads
+    made while refreshing never see stale values, so a refresh is built from fresh data.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 1024,
+        default_ttl: float = 300.0,
+        hard_ttl: float | None = None,
+        submit: Callable[[str, Callable[[], None]], Any] | None = None,
+    ) -> None:
         self._data: OrderedDict[str, CacheEntry] = OrderedDict()
         self._max_size = max_size
         self._default_ttl = default_ttl
+        self._hard_ttl = default_ttl if hard_ttl is None else hard_ttl
+        self._submit = submit
+        self._lock = threading.Lock()
         self.stats = CacheStats()
 
     def get(self, key: str) -> Any | None:
-        entry = self._data.get(key)
-        if entry is None:
-            self.stats.misses += 1
-            return None
-        now = time.time()
-        if entry.expires_at <= now:
-            self._data.pop(key, None)
-            self.stats.misses += 1
-            self.stats.expirations += 1
-            return None
-        self._data.move_to_end(key)
-        self.stats.hits += 1
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            now = time.time()
+            if entry.expires_at > now:
+                self._data.move_to_end(key)
+                self.stats.hits += 1
+                return entry.value
+            if entry.refresh is None or entry.stale_until <= now:
+                self._data.pop(key, None)
+                self.stats.misses += 1
+                self.stats.expirations += 1
+                return None
+            if _refreshing.get():
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            self.stats.stale_serves += 1
+            schedule = (
+                entry.refresh_started is None
+                or now - entry.refresh_started > REFRESH_TIMEOUT_SECONDS
+            )
+            if schedule:
+                entry.refresh_started = now
+        if schedule:
+            self._schedule_refresh(key, entry)
         return entry.value
 
-    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+    def _schedule_refresh(self, key: str, entry: CacheEntry) -> None:
+        def run() -> None:
+            token = _refreshing.set(True)
+            try:
+                value = entry.refresh()
+            except Exception:
+                logger.warning("cache_refresh_failure key=%s", key, exc_info=True)
+                with self._lock:
+                    entry.refresh_started = None
+                    self.stats.refresh_failures += 1
+                return
+            finally:
+                _refreshing.reset(token)
+            self.set(key, value, ttl=entry.ttl, refresh=entry.refresh)
+            with self._lock:
+                self.stats.refreshes += 1
+
+        if self._submit is None:
+            threading.Thread(target=run, name="gh-trending-cache-refresh", daemon=True).start()
+        else:
+            self._submit(key, run)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether ``key`` holds a fresh value, without touching stats or recency."""
+        entry = self._data.get(key)
+        return entry is not None and entry.expires_at > time.time()
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float | None = None,
+        *,
+        refresh: Callable[[], Any] | None = None,
+    ) -> None:
+        """Store ``value``; with ``refresh`` it is served stale and recomputed after ``ttl``."""
         ttl_value = self._default_ttl if ttl is None else ttl
-        expires_at = time.time() + ttl_value
-        if key in self._data:
+        now = time.time()
+        expires_at = now + ttl_value
+        stale_until = now + max(ttl_value, self._hard_ttl) if refresh else expires_at
+        entry = CacheEntry(
+            value=value,
+            expires_at=expires_at,
+            stale_until=stale_until,
+            ttl=ttl_value,
+            refresh=refresh,
+        )
+        with self._lock:
             self._data.pop(key, None)
-        self._data[key] = CacheEntry(value=value, expires_at=expires_at)
-        self._data.move_to_end(key)
-        self.stats.sets += 1
-        self._evict_if_needed()
+            self._data[key] = entry
+            self.stats.sets += 1
+            self._evict_if_needed()
 
     def _evict_if_needed(self) -> None:
         while len(self._data) > self._max_size:
@@ -64,7 +183,9 @@ class ResultCache:
         return len(self._data)
 
     def clear(self) -> None:
-        self._data.clear()
+        with self._lock:
+            self._data.clear()
 
     def keys(self) -> list[str]:
-        return list(self._data.keys())
+        with self._lock:
+            return list(self._data.keys())
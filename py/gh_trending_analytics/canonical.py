@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from .errors import InvalidRequestError
+from .manifest import Manifest
+from .profiling import stage
+from .utils import CacheKey, ValidationError, parse_date
+
+CANONICAL_TOP_K = 500
+ALL_LANGUAGES = "__all__"
+ROWS_PREFIX = "rows"
+CANONICAL_KINDS = {"repository", "developer"}
+
+
+@dataclass(frozen=True)
+class CanonicalQuery:
+    """A request reduced to the parameters that actually determine its result rows.
+
+    Equivalent requests (different language sentinels, ranges reaching past the
+    available data, smaller limits) share the same ``params`` and therefore the same
+    cache entry; ``limit`` is applied afterwards by slicing the top-K rows.
+    """
+
+    op: str
+    params: dict[str, Any]
+    limit: int
+
+    def key(self) -> str:
+        return CacheKey(f"{ROWS_PREFIX}.{self.op}", self.params).as_str()
+
+    def slice(self, rows: list[Any]) -> list[Any]:
+        return rows[: self.limit]
+
+
+def _parse_date(value: str):
+    try:
+        return parse_date(value)
+    except ValidationError as exc:
+        raise InvalidRequestError(str(exc)) from exc
+
+
+def toplist_language(language: str | None) -> str | None:
+    if language is None or language == "" or language == ALL_LANGUAGES:
+        return None
+    return language
+
+
+def day_language(language: str | None) -> str:
+    if language is None or language == "":
+        return ALL_LANGUAGES
+    return language
+
+
+def validate_kind(kind: str) -> None:
+    if kind not in CANONICAL_KINDS:
+        raise InvalidRequestError(f"Unsupported kind: {kind}")
+
+
+def clamp_range(manifest: Manifest, kinds: list[str], start: str, end: str) -> tuple[str, str]:
+    """Normalize ``start``/``end`` to ISO dates snapped to the manifest's available dates.
+
+    Ranges that do not overlap any available date are returned unclamped so the query
+    layer still validates them and answers with an empty result.
+    """
+    start_iso = _parse_date(start).isoformat()
+    end_iso = _parse_date(end).isoformat()
+    if start_iso > end_iso:
+        raise InvalidRequestError("Start date must be <= end date")
+    spans = [
+        manifest.kinds[kind].clamp_range(start_iso, end_iso)
+        for kind in kinds
+        if kind in manifest.kinds
+    ]
+    spans = [span for span in spans if span is not None]
+    if not spans:
+        return start_iso, end_iso
+    return min(span[0] for span in spans), max(span[1] for span in spans)
+
+
+def canonical_day(kind: str, day: str, language: str | None) -> dict[str, str]:
+    validate_kind(kind)
+    return {
+        "kind": kind,
+        "date": _parse_date(day).isoformat(),
+        "language": day_language(language),
+    }
+
+
+def canonical_toplist(
+    manifest: Manifest,
+    op: str,
+    *,
+    kind: str | None,
+    start: str,
+    end: str,
+    limit: int,
+    **params: Any,
+) -> CanonicalQuery:
+    """Canonicalize a ranked-list request; ``kind=None`` spans every kind."""
+    if kind:
+        validate_kind(kind)
+        kinds = [kind]
+    else:
+        kind = None
+        kinds = sorted(CANONICAL_KINDS)
+    with stage("planning"):
+        canonical_start, canonical_end = clamp_range(manifest, kinds, start, end)
+    canonical = {"kind": kind, "start": canonical_start, "end": canonical_end}
+    for name, value in params.items():
+        canonical[name] = toplist_language(value) if name == "language" else value
+    return CanonicalQuery(op=op, params=canonical, limit=limit)
+
+
+def canonical_search(
+    *,
+    q: str,
+    kind: str | None,
+    start: str | None,
+    end: str | None,
+    language: str | None,
+    limit: int,
+) -> CanonicalQuery:
+    params = {
+        "q": q.strip().lower(),
+        "kind": kind or None,
+        "start": _parse_date(start).isoformat() if start else None,
+        "end": _parse_date(end).isoformat() if end else None,
+        "language": toplist_language(language),
+    }
+    return CanonicalQuery(op="search", params=params, limit=limit)
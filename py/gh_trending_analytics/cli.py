@@ -4,7 +4,6 @@ import argparse
 import sys
 from pathlib import Path
 
-from .build import build_kind
 from .utils import ValidationError
 
 VALID_KINDS = {"repository", "developer"}
@@ -20,6 +19,9 @@ def _build_command(args: argparse.Namespace) -> int:
     kind = args.kind
     if kind not in VALID_KINDS:
         raise ValidationError(f"Unsupported kind: {kind}")
+    # Deferred so `--help` and `rollup` never pay for importing pyarrow.
+    from .build import build_kind
+
     build_kind(
         archive_root=Path(args.archive),
         analytics_root=Path(args.analytics),
@@ -30,6 +32,20 @@ def _build_command(args: argparse.Namespace) -> int:
     return 0
 
 
+def _synthesize_command(args: argparse.Namespace) -> int:
+    from dataclasses import replace
+
+    from .synthetic import REAL_ARCHIVE_SPEC, write_archive
+
+    spec = replace(REAL_ARCHIVE_SPEC.scaled(args.scale), seed=args.seed)
+    summary = write_archive(Path(args.archive), spec)
+    print(
+        f"Wrote {summary.files} files ({summary.entries} entries) "
+        f"for {summary.start.isoformat()}..{summary.end.isoformat()}"
+    )
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="gh_trending_analytics")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -54,6 +70,16 @@ def build_parser() -> argparse.ArgumentParser:
     rollup_parser.add_argument("--from-date", help="Rebuild rollups from this date (YYYY-MM-DD)")
     rollup_parser.set_defaults(func=None)
 
+    synth_parser = subparsers.add_parser(
+        "synthesize", help="Generate a synthetic archive for benchmarks and load tests"
+    )
+    synth_parser.add_argument("--archive", required=True, help="Archive root directory to write")
+    synth_parser.add_argument(
+        "--scale", type=float, default=0.05, help="Size relative to the production archive"
+    )
+    synth_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    synth_parser.set_defaults(func=_synthesize_command)
+
     return parser
 
 
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any
+
+try:  # pragma: no cover - exercised implicitly when orjson is installed
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+try:  # pragma: no cover - optional codec
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+try:  # pragma: no cover - optional codec
+    import zstandard
+except ImportError:  # pragma: no cover - optional codec
+    zstandard = None
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+TABLE_MEDIA_TYPES = [JSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE]
+COMPRESSION_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 6
+
+
+def encode_json(payload: Any) -> bytes:
+    """Encode an API payload to compact UTF-8 JSON, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def available_encodings() -> list[str]:
+    """Content codings this process can produce, in server preference order."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def _q_values(header: str) -> dict[str, float]:
+    weights: dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    weight = float(param[2:])
+                except ValueError:
+                    weight = 0.0
+        weights[token] = weight
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str | None, available: list[str]) -> str | None:
+    """Pick the preferred available coding acceptable under ``Accept-Encoding``.
+
+    Returns ``None`` when the identity representation should be sent.
+    """
+    if not accept_encoding:
+        return None
+    weights = _q_values(accept_encoding)
+    best: str | None = None
+    best_weight = 0.0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def negotiate_media_type(accept: str | None, offered: list[str]) -> str:
+    """Pick the preferred offered media type under ``Accept``; ``offered[0]`` is the default.
+
+    Clients whose ``Accept`` matches nothing on offer still get the default rather than a
+    406, matching how the API behaved before it offered more than JSON.
+    """
+    if not accept:
+        return offered[0]
+    weights = _q_values(accept)
+    best = offered[0]
+    best_weight = 0.0
+    for media_type in offered:
+        family = media_type.split("/", 1)[0]
+        weight = weights.get(media_type, weights.get(f"{family}/*", weights.get("*/*", 0.0)))
+        if weight > best_weight:
+            best, best_weight = media_type, weight
+    return best
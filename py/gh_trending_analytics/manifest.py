@@ -1,12 +1,36 @@
 from __future__ import annotations
 
+import hashlib
 import json
-from dataclasses import dataclass
+import os
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterator, MutableMapping
+from dataclasses import dataclass, field
+from datetime import date, timedelta
 from pathlib import Path
 from typing import Any
 
 from .utils import sort_languages, utc_now_iso
 
+COMPACT_FORMAT = 3
+# Earlier compact manifests: a header line, then one bare section per line. Read only.
+LINE_SECTIONS_FORMAT = 2
+MISSING_LANGUAGE_SET = -1
+# Ends the header line of a compact manifest; the kind sections follow, one per line.
+_KINDS_OPEN = b',"kinds":{'
+
+
+def _intern(value: str | None) -> str | None:
+    return None if value is None else sys.intern(value)
+
+
+def _ordinal(value: str | date) -> int:
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(value).toordinal()
+
 
 @dataclass
 class ManifestKind:
@@ -16,6 +40,104 @@ class ManifestKind:
     languages: list[str | None]
     languages_by_date: dict[str, list[str | None]]
     row_counts_by_year: dict[str, int]
+    # Year -> [first, last] archived dates that year's rollup partition was built from.
+    rollup_coverage: dict[str, list[str]] = field(default_factory=dict)
+    _date_set: frozenset[str] = field(init=False, repr=False, compare=False)
+    _ordinals: list[int] = field(init=False, repr=False, compare=False)
+    _language_set: frozenset[str | None] = field(init=False, repr=False, compare=False)
+    _language_sets_by_date: dict[str, frozenset[str | None]] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        self.languages = [_intern(value) for value in self.languages]
+        self._date_set = frozenset(self.dates)
+        self._ordinals = sorted(date.fromisoformat(value).toordinal() for value in self.dates)
+        self._language_set = frozenset(self.languages)
+        shared_lists: dict[tuple[str | None, ...], list[str | None]] = {}
+        shared_sets: dict[tuple[str | None, ...], frozenset[str | None]] = {}
+        self._language_sets_by_date = {}
+        for key, values in self.languages_by_date.items():
+            interned = tuple(_intern(value) for value in values)
+            if interned not in shared_lists:
+                shared_lists[interned] = list(interned)
+                shared_sets[interned] = frozenset(interned)
+            self.languages_by_date[key] = shared_lists[interned]
+            self._language_sets_by_date[key] = shared_sets[interned]
+
+    def has_date(self, day: str | date) -> bool:
+        value = day.isoformat() if isinstance(day, date) else day
+        return value in self._date_set
+
+    def has_language(self, language: str | None, *, day: str | date | None = None) -> bool:
+        """Check a language against one day's lists, or against every date when ``day`` is None."""
+        if day is not None and self._language_sets_by_date:
+            value = day.isoformat() if isinstance(day, date) else day
+            return language in self._language_sets_by_date.get(value, frozenset())
+        return language in self._language_set
+
+    def neighbors(self, day: str | date) -> tuple[str | None, str | None]:
+        """Return the available dates immediately before and after ``day``."""
+        ordinal = _ordinal(day)
+        index = bisect_left(self._ordinals, ordinal)
+        prev_date = date.fromordinal(self._ordinals[index - 1]).isoformat() if index > 0 else None
+        if index < len(self._ordinals) and self._ordinals[index] == ordinal:
+            index += 1
+        next_date = (
+            date.fromordinal(self._ordinals[index]).isoformat()
+            if index < len(self._ordinals)
+            else None
+        )
+        return prev_date, next_date
+
+    def clamp_range(self, start: str | date, end: str | date) -> tuple[str, str] | None:
+        """Snap ``[start, end]`` to the first and last available dates inside it."""
+        lower = bisect_left(self._ordinals, _ordinal(start))
+        upper = bisect_right(self._ordinals, _ordinal(end)) - 1
+        if lower > upper:
+            return None
+        return (
+            date.fromordinal(self._ordinals[lower]).isoformat(),
+            date.fromordinal(self._ordinals[upper]).isoformat(),
+        )
+
+    def estimate_rows(self, start: str | date, end: str | date) -> float:
+        """Entries dated within ``[start, end]``, prorating each year's row count by its dates."""
+        first, last = _ordinal(start), _ordinal(end)
+        total = 0.0
+        for year, rows in self.row_counts_by_year.items():
+            year_first = date(int(year), 1, 1).toordinal()
+            year_last = date(int(year), 12, 31).toordinal()
+            lower, upper = max(first, year_first), min(last, year_last)
+            if lower > upper:
+                continue
+            in_year = bisect_right(self._ordinals, year_last) - bisect_left(
+                self._ordinals, year_first
+            )
+            if in_year:
+                in_range = bisect_right(self._ordinals, upper) - bisect_left(self._ordinals, lower)
+                total += rows * in_range / in_year
+        return total
+
+    def first_unrolled(self, start: str | date, end: str | date) -> str | None:
+        """The first archived date in ``[start, end]`` not covered by the rollups, if any.
+
+        Archived days are never rewritten, so every date between a partition's first and
+        last covered dates is covered; dates added by later builds are not.
+        """
+        first, last = _ordinal(start), _ordinal(end)
+        for year in range(date.fromordinal(first).year, date.fromordinal(last).year + 1):
+            lower = bisect_left(self._ordinals, max(first, date(year, 1, 1).toordinal()))
+            upper = bisect_right(self._ordinals, min(last, date(year, 12, 31).toordinal()))
+            if lower >= upper:
+                continue
+            coverage = self.rollup_coverage.get(str(year))
+            if coverage is None or self._ordinals[lower] < _ordinal(coverage[0]):
+                return date.fromordinal(self._ordinals[lower]).isoformat()
+            covered = bisect_right(self._ordinals, _ordinal(coverage[1]))
+            if covered < upper:
+                return date.fromordinal(self._ordinals[covered]).isoformat()
+        return None
 
     @classmethod
     def empty(cls) -> ManifestKind:
@@ -41,6 +163,9 @@ class ManifestKind:
             row_counts_by_year={
                 str(key): int(value) for key, value in payload.get("row_counts_by_year", {}).items()
             },
+            rollup_coverage={
+                str(key): list(value) for key, value in payload.get("rollup_coverage", {}).items()
+            },
         )
 
     def to_dict(self) -> dict[str, Any]:
@@ -53,13 +178,170 @@ class ManifestKind:
                 key: list(value) for key, value in self.languages_by_date.items()
             },
             "row_counts_by_year": dict(self.row_counts_by_year),
+            "rollup_coverage": {key: list(value) for key, value in self.rollup_coverage.items()},
+        }
+
+    def to_compact(self) -> dict[str, Any]:
+        """Encode dates as consecutive-day spans and per-date languages as shared set ids."""
+        spans: list[list[Any]] = []
+        ordered = sorted(self.dates)
+        for value, ordinal in zip(ordered, self._ordinals, strict=True):
+            if spans and spans[-1][2] + 1 == ordinal:
+                spans[-1][1] += 1
+                spans[-1][2] = ordinal
+            else:
+                spans.append([value, 1, ordinal])
+        set_ids: dict[tuple[str | None, ...], int] = {}
+        language_sets: list[list[str | None]] = []
+        date_sets: list[list[int]] = []
+        for value in ordered:
+            languages = self.languages_by_date.get(value)
+            if languages is None:
+                set_id = MISSING_LANGUAGE_SET
+            else:
+                key = tuple(languages)
+                if key not in set_ids:
+                    set_ids[key] = len(language_sets)
+                    language_sets.append(list(languages))
+                set_id = set_ids[key]
+            if date_sets and date_sets[-1][0] == set_id:
+                date_sets[-1][1] += 1
+            else:
+                date_sets.append([set_id, 1])
+        return {
+            "min_date": self.min_date,
+            "max_date": self.max_date,
+            "spans": [[start, length] for start, length, _ in spans],
+            "languages": list(self.languages),
+            "language_sets": language_sets,
+            "date_sets": date_sets,
+            "row_counts_by_year": dict(self.row_counts_by_year),
+            "rollup_coverage": {key: list(value) for key, value in self.rollup_coverage.items()},
         }
 
+    @classmethod
+    def from_compact(cls, payload: dict[str, Any]) -> ManifestKind:
+        dates: list[str] = []
+        for start, length in payload.get("spans", []):
+            first = date.fromisoformat(start)
+            dates.extend((first + timedelta(days=offset)).isoformat() for offset in range(length))
+        language_sets = payload.get("language_sets", [])
+        languages_by_date: dict[str, list[str | None]] = {}
+        position = 0
+        for set_id, length in payload.get("date_sets", []):
+            if set_id != MISSING_LANGUAGE_SET:
+                for value in dates[position : position + length]:
+                    languages_by_date[value] = language_sets[set_id]
+            position += length
+        return cls(
+            min_date=payload.get("min_date"),
+            max_date=payload.get("max_date"),
+            dates=dates,
+            languages=list(payload.get("languages", [])),
+            languages_by_date=languages_by_date,
+            row_counts_by_year={
+                str(key): int(value) for key, value in payload.get("row_counts_by_year", {}).items()
+            },
+            rollup_coverage={
+                str(key): list(value) for key, value in payload.get("rollup_coverage", {}).items()
+            },
+        )
+
+
+class ManifestKinds(MutableMapping[str, ManifestKind]):
+    """Kind sections of a manifest, decoded on first access.
+
+    Sections read from a compact manifest are kept as raw bytes until a caller asks for
+    that kind; ``fingerprint`` answers from the header without decoding anything.
+    Request threads share one manifest, so a section is decoded once under a lock and
+    published to ``_loaded`` before its pending entry is dropped.
+    """
+
+    def __init__(self, loaded: dict[str, ManifestKind] | None = None) -> None:
+        self._loaded: dict[str, ManifestKind] = dict(loaded or {})
+        self._pending: dict[str, tuple[Callable[[], ManifestKind], tuple]] = {}
+        self._lock = threading.Lock()
+
+    def add_pending(
+        self, kind: str, loader: Callable[[], ManifestKind], fingerprint: tuple
+    ) -> None:
+        with self._lock:
+            self._pending[kind] = (loader, fingerprint)
+            self._loaded.pop(kind, None)
+
+    def fingerprint(self, kind: str) -> tuple:
+        pending = self._pending.get(kind)
+        if pending is not None:
+            return pending[1]
+        value = self._loaded[kind]
+        return (value.min_date, value.max_date, len(value.dates))
+
+    def is_loaded(self, kind: str) -> bool:
+        return kind in self._loaded
+
+    def __getitem__(self, kind: str) -> ManifestKind:
+        value = self._loaded.get(kind)
+        if value is not None:
+            return value
+        with self._lock:
+            if kind not in self._loaded:
+                pending = self._pending.get(kind)
+                if pending is None:
+                    raise KeyError(kind)
+                self._loaded[kind] = pending[0]()
+                del self._pending[kind]
+            return self._loaded[kind]
+
+    def __setitem__(self, kind: str, value: ManifestKind) -> None:
+        with self._lock:
+            self._loaded[kind] = value
+            self._pending.pop(kind, None)
+
+    def __delitem__(self, kind: str) -> None:
+        with self._lock:
+            if kind not in self._loaded and kind not in self._pending:
+                raise KeyError(kind)
+            self._loaded.pop(kind, None)
+            self._pending.pop(kind, None)
+
+    def __contains__(self, kind: object) -> bool:
+        # Pending first: a section is in ``_loaded`` before it leaves ``_pending``.
+        return kind in self._pending or kind in self._loaded
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(set(self._loaded) | set(self._pending)))
+
+    def __len__(self) -> int:
+        return len(set(self._loaded) | set(self._pending))
+
+
+def _section_loader(raw: bytes) -> Callable[[], ManifestKind]:
+    return lambda: ManifestKind.from_compact(json.loads(raw))
+
+
+def _compact_header(line: bytes) -> dict[str, Any] | None:
+    """The header of a compact manifest's first line, or None for any other document."""
+    if line.endswith(_KINDS_OPEN):
+        line = line[: -len(_KINDS_OPEN)] + b"}"
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(header, dict):
+        return None
+    if header.get("format") not in (COMPACT_FORMAT, LINE_SECTIONS_FORMAT):
+        return None
+    return header
+
 
 @dataclass
 class Manifest:
     generated_at: str
-    kinds: dict[str, ManifestKind]
+    kinds: MutableMapping[str, ManifestKind]
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.kinds, ManifestKinds):
+            self.kinds = ManifestKinds(dict(self.kinds))
 
     @classmethod
     def empty(cls) -> Manifest:
@@ -67,12 +349,44 @@ class Manifest:
 
     @classmethod
     def load(cls, path: Path) -> Manifest:
+        """Load either the compact sectioned format or the legacy pretty JSON document.
+
+        Compact manifests only parse their one-line header here; each kind section is
+        decoded when it is first accessed. A compact manifest that was rewritten by
+        another tool, and so lost its line layout, is still read as plain JSON.
+        """
         if not path.exists():
             return cls.empty()
-        payload = json.loads(path.read_text())
-        kinds_payload = payload.get("kinds", {})
-        kinds = {key: ManifestKind.from_dict(value) for key, value in kinds_payload.items()}
-        return cls(generated_at=payload.get("generated_at", utc_now_iso()), kinds=kinds)
+        raw = path.read_bytes()
+        header_end = raw.find(b"\n")
+        header = _compact_header(raw if header_end < 0 else raw[:header_end])
+        if header is None or header_end < 0:
+            payload = json.loads(raw)
+            decode = ManifestKind.from_dict
+            if payload.get("format") == COMPACT_FORMAT:
+                decode = ManifestKind.from_compact
+            kinds = {key: decode(value) for key, value in payload.get("kinds", {}).items()}
+            return cls(generated_at=payload.get("generated_at", utc_now_iso()), kinds=kinds)
+
+        body = raw[header_end + 1 :]
+        sections = ManifestKinds()
+        for kind, section in header.get("sections", {}).items():
+            offset, length = section["offset"], section["length"]
+            sections.add_pending(
+                kind,
+                _section_loader(body[offset : offset + length]),
+                (section.get("min_date"), section.get("max_date"), section.get("date_count", 0)),
+            )
+        return cls(generated_at=header.get("generated_at", utc_now_iso()), kinds=sections)
+
+    @property
+    def version(self) -> str:
+        """Short content hash identifying this manifest generation."""
+        digest = hashlib.sha1(self.generated_at.encode("utf-8"))
+        for key in sorted(self.kinds):
+            min_date, max_date, count = self.kinds.fingerprint(key)
+            digest.update(f"|{key}:{min_date}:{max_date}:{count}".encode())
+        return digest.hexdigest()[:16]
 
     def ensure_kind(self, kind: str) -> ManifestKind:
         if kind not in self.kinds:
@@ -89,6 +403,7 @@ class Manifest:
         row_counts_by_year: dict[str, int],
     ) -> None:
         sorted_dates = sorted(dates)
+        previous = self.kinds.get(kind)
         self.kinds[kind] = ManifestKind(
             min_date=sorted_dates[0] if sorted_dates else None,
             max_date=sorted_dates[-1] if sorted_dates else None,
@@ -98,6 +413,8 @@ class Manifest:
                 key: sort_languages(value) for key, value in languages_by_date.items()
             },
             row_counts_by_year=dict(row_counts_by_year),
+            # Rolled-up days are unchanged by a rebuild; only new days are uncovered.
+            rollup_coverage=dict(previous.rollup_coverage) if previous is not None else {},
         )
         self.generated_at = utc_now_iso()
 
@@ -107,6 +424,40 @@ class Manifest:
             "kinds": {key: value.to_dict() for key, value in self.kinds.items()},
         }
 
+    def to_compact_bytes(self) -> bytes:
+        """One JSON document laid out so a reader can skip to a single kind.
+
+        The first line holds ``format``, ``generated_at`` and ``sections``, which maps
+        each kind to the byte offset and length of its ``kinds`` entry after that line.
+        Each entry sits on its own line, so the header parses without the rest.
+        """
+        sections: dict[str, dict[str, Any]] = {}
+        body = bytearray()
+        keys = sorted(self.kinds)
+        for index, key in enumerate(keys):
+            value = self.kinds[key]
+            encoded = json.dumps(value.to_compact(), sort_keys=True, separators=(",", ":")).encode(
+                "utf-8"
+            )
+            body += json.dumps(key).encode("utf-8") + b":"
+            sections[key] = {
+                "offset": len(body),
+                "length": len(encoded),
+                "min_date": value.min_date,
+                "max_date": value.max_date,
+                "date_count": len(value.dates),
+            }
+            body += encoded + (b",\n" if index < len(keys) - 1 else b"\n")
+        header = {
+            "format": COMPACT_FORMAT,
+            "generated_at": self.generated_at,
+            "sections": sections,
+        }
+        encoded_header = json.dumps(header, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return encoded_header[:-1] + _KINDS_OPEN + b"\n" + bytes(body) + b"}}\n"
+
     def save(self, path: Path) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(self.to_dict(), indent=2, sort_keys=True))
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_bytes(self.to_compact_bytes())
+        os.replace(tmp_path, path)
@@ -0,0 +1,195 @@
+"""In-memory entity × day presence engine for reappearing and streak toplists.
+
+Requires NumPy, which is not a core dependency; the query service only imports this
+module when asked to load a matrix. The matrix is built from the day presence rollups
+and answers the same questions as the rollup SQL paths with vectorized array
+operations, returning identically typed and ordered tables.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+EPOCH = date(1970, 1, 1)
+
+
+@dataclass(frozen=True)
+class _Presence:
+    """Entity-major CSR rows: ``keys[i] = entity * span + day`` sorted ascending.
+
+    The position ``searchsorted(keys, entity * span + day)`` is the entity's cumulative
+    presence count before ``day``, so days present over a range is a difference of two
+    vectorized searches.
+    """
+
+    keys: np.ndarray
+    days: np.ndarray
+    entities: np.ndarray
+    ranks: np.ndarray
+
+
+class PresenceMatrix:
+    """Presence of every entity of one kind on every archived day.
+
+    The matrix is over 99% empty at archive scale (a few hundred entities trend per day
+    out of hundreds of thousands), so rows are stored sparsely rather than as dense
+    bitmaps: one CSR for days on any list and one for days on a language list, each
+    carrying the best rank of that day.
+    """
+
+    def __init__(self, kind: str, table: pa.Table, group: list[str]) -> None:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        self.kind = kind
+        self.key = group[0]
+        self.rank_type = table.schema.field("best_rank_any").type
+        # Rows arrive ordered by entity then date; entity ids follow that order, so
+        # ascending id is ascending key for tie-breaks.
+        changed = np.zeros(table.num_rows, dtype=bool)
+        if table.num_rows:
+            changed[0] = True
+            for column in group:
+                values = table.column(column).combine_chunks()
+                changed[1:] |= pc.not_equal(values[1:], values[:-1]).to_numpy(zero_copy_only=False)
+        entity_of_row = np.cumsum(changed) - 1
+        self.entities = table.select(group).filter(pa.array(changed))
+        self.size = self.entities.num_rows
+
+        ordinals = table.column("date").cast(pa.int32()).to_numpy().astype(np.int64)
+        self.origin = int(ordinals.min()) if table.num_rows else 0
+        self.span = int(ordinals.max()) - self.origin + 1 if table.num_rows else 1
+        days = ordinals - self.origin
+        # The covered date range, so callers can tell whether the matrix is current.
+        self.first_day = self._day(0) if table.num_rows else None
+        self.last_day = self._day(self.span - 1) if table.num_rows else None
+        rank_any = table.column("best_rank_any").to_numpy().astype(np.int64)
+        non_null = pc.greater(table.column("non_null_languages"), 0).to_numpy()
+        rank_non_null = table.column("best_rank_non_null").fill_null(0).to_numpy().astype(np.int64)
+        self._any = self._presence(entity_of_row, days, rank_any)
+        self._non_null = self._presence(
+            entity_of_row[non_null], days[non_null], rank_non_null[non_null]
+        )
+
+    def _day(self, offset: int) -> date:
+        return date.fromordinal(EPOCH.toordinal() + self.origin + offset)
+
+    def _presence(self, entities: np.ndarray, days: np.ndarray, ranks: np.ndarray) -> _Presence:
+        return _Presence(
+            keys=entities * self.span + days,
+            days=days,
+            entities=entities,
+            ranks=ranks,
+        )
+
+    def _bounds(self, presence: _Presence, start: date, end: date) -> tuple[np.ndarray, np.ndarray]:
+        """Per-entity ``[lo, hi)`` row positions inside ``[start, end]``."""
+        first = max(start.toordinal() - EPOCH.toordinal() - self.origin, 0)
+        last = min(end.toordinal() - EPOCH.toordinal() - self.origin, self.span - 1)
+        ids = np.arange(self.size, dtype=np.int64) * self.span
+        if first > last:
+            empty = np.zeros(self.size, dtype=np.int64)
+            return empty, empty
+        lo = np.searchsorted(presence.keys, ids + first, side="left")
+        hi = np.searchsorted(presence.keys, ids + last, side="right")
+        return lo, hi
+
+    def _result(self, ids: np.ndarray, columns: dict[str, pa.Array]) -> pa.Table:
+        import pyarrow as pa
+
+        table = self.entities.take(pa.array(ids, type=pa.int64()))
+        for name, values in columns.items():
+            table = table.append_column(name, values)
+        return table
+
+    def _dates(self, days: np.ndarray) -> pa.Array:
+        import pyarrow as pa
+
+        return pa.array((days + self.origin).astype(np.int32), type=pa.int32()).cast(pa.date32())
+
+    def top_reappearing(
+        self, start: date, end: date, *, include_all_languages: bool, limit: int
+    ) -> pa.Table:
+        import pyarrow as pa
+
+        presence = self._any if include_all_languages else self._non_null
+        lo, hi = self._bounds(presence, start, end)
+        counts = hi - lo
+        present = np.flatnonzero(counts)
+        if present.size > limit:
+            # Only entities tied with or above the limit-th count can make the cut.
+            threshold = np.partition(counts[present], present.size - limit)[present.size - limit]
+            present = present[counts[present] >= threshold]
+        best = _segment_min(presence.ranks, lo[present], hi[present])
+        order = np.lexsort((present, best, -counts[present]))[:limit]
+        ids = present[order]
+        return self._result(
+            ids,
+            {
+                "days_present": pa.array(counts[ids], type=pa.int64()),
+                "best_rank": pa.array(best[order], type=self.rank_type),
+            },
+        )
+
+    def top_streaks(
+        self, start: date, end: date, *, include_all_languages: bool, limit: int
+    ) -> pa.Table:
+        import pyarrow as pa
+
+        presence = self._any if include_all_languages else self._non_null
+        lo, hi = self._bounds(presence, start, end)
+        lengths = hi - lo
+        present = np.flatnonzero(lengths)
+        lengths = lengths[present]
+        total = int(lengths.sum())
+        # Positions of every in-range row, entity by entity.
+        offsets = np.repeat(lo[present] - (np.cumsum(lengths) - lengths), lengths)
+        rows = np.arange(total, dtype=np.int64) + offsets
+        entities = presence.entities[rows]
+        days = presence.days[rows]
+        ranks = presence.ranks[rows]
+
+        breaks = np.ones(total, dtype=bool)
+        if total:
+            breaks[1:] = (entities[1:] != entities[:-1]) | (days[1:] - days[:-1] != 1)
+        run_starts = np.flatnonzero(breaks)
+        run_lengths = np.diff(np.append(run_starts, total))
+        run_entities = entities[run_starts]
+        run_first = days[run_starts]
+        run_last = days[run_starts + run_lengths - 1]
+        run_best = _segment_min(ranks, run_starts, run_starts + run_lengths)
+
+        # Longest run per entity, latest first among equally long runs.
+        by_entity = np.lexsort((-run_last, -run_lengths, run_entities))
+        first_of_entity = np.ones(by_entity.size, dtype=bool)
+        first_of_entity[1:] = run_entities[by_entity[1:]] != run_entities[by_entity[:-1]]
+        longest = by_entity[first_of_entity]
+
+        order = longest[
+            np.lexsort((run_entities[longest], run_best[longest], -run_lengths[longest]))
+        ][:limit]
+        return self._result(
+            run_entities[order],
+            {
+                "streak_start": self._dates(run_first[order]),
+                "streak_end": self._dates(run_last[order]),
+                "streak_len": pa.array(run_lengths[order], type=pa.int64()),
+                "best_rank": pa.array(run_best[order], type=self.rank_type),
+            },
+        )
+
+
+def _segment_min(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Minimum of each non-empty ``values[lo[i]:hi[i]]``; segments must not overlap."""
+    if lo.size == 0:
+        return np.zeros(0, dtype=values.dtype)
+    # reduceat over interleaved bounds reduces each [lo, hi) and each gap between them.
+    bounds = np.column_stack((lo, hi)).ravel()
+    return np.minimum.reduceat(np.append(values, 0), bounds)[::2]
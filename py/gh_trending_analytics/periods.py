@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+GRAINS = ("day", "week", "month")
+
+# Rollup date column per grain; week and month rows are keyed by the period's first day.
+GRAIN_COLUMNS = {"day": "date", "week": "period_start", "month": "period_start"}
+
+
+def week_start(day: date) -> date:
+    """The Monday of ``day``'s ISO week (DuckDB's ``date_trunc('week', ...)``)."""
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def period_end(grain: str, first: date) -> date:
+    """The last day of the ``grain`` period starting on ``first``."""
+    if grain == "month":
+        return _next_month(first) - timedelta(days=1)
+    if grain == "week":
+        return first + timedelta(days=6)
+    return first
+
+
+def _split_weeks(start: date, end: date) -> list[tuple[str, date, date]]:
+    first = week_start(start)
+    if first < start:
+        first += timedelta(days=7)
+    last = week_start(end + timedelta(days=1)) - timedelta(days=7)
+    if first > last:
+        return [("day", start, end)]
+    parts = []
+    if start < first:
+        parts.append(("day", start, first - timedelta(days=1)))
+    parts.append(("week", first, last))
+    week_end = last + timedelta(days=6)
+    if week_end < end:
+        parts.append(("day", week_end + timedelta(days=1), end))
+    return parts
+
+
+def decompose_range(start: date, end: date) -> list[tuple[str, date, date]]:
+    """Cover ``[start, end]`` with whole months, then whole weeks, then single days.
+
+    Returns ``(grain, first, last)`` spans in date order. For ``week`` and ``month``
+    spans, ``first`` and ``last`` are period starts; every period in between is wholly
+    inside the range, and no two spans overlap.
+    """
+    if start > end:
+        return []
+    first_month = month_start(start)
+    if first_month < start:
+        first_month = _next_month(first_month)
+    # The last month that ends on or before ``end``.
+    last_month = month_start(end)
+    if (end + timedelta(days=1)).day != 1:
+        last_month = month_start(last_month - timedelta(days=1))
+    if first_month > last_month:
+        return _split_weeks(start, end)
+    parts = []
+    if start < first_month:
+        parts.extend(_split_weeks(start, first_month - timedelta(days=1)))
+    parts.append(("month", first_month, last_month))
+    months_end = _next_month(last_month) - timedelta(days=1)
+    if months_end < end:
+        parts.extend(_split_weeks(months_end + timedelta(days=1), end))
+    return parts
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any
+
+ENGINES = ("matrix", "rollup", "scan", "raw")
+
+# Rough relative costs in raw-row equivalents. A day presence row folds one entity's
+# entries across every language list of that day; week and month rows fold several
+# days more. Each file set read also carries a fixed open-and-plan overhead.
+RAW_ROW_COST = 1.0
+ROLLUP_ROW_COST = {"day": 0.4, "week": 0.12, "month": 0.04}
+SCAN_COST = 200.0
+# A range scan shared by a batch is already in memory as Arrow: no files to open.
+SHARED_SCAN_ROW_COST = 0.25
+# The matrix does a vectorized search per loaded entity, then touches in-range rows.
+MATRIX_ENTITY_COST = 0.02
+MATRIX_ROW_COST = 0.01
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One engine able to answer a query, with its estimated cost.
+
+    ``reason`` explains why the engine must not be used for this query (for example a
+    stale or incomplete rollup); it is None when the candidate is valid. ``detail``
+    notes how the engine would run it, such as where a rollup's raw tail starts.
+    """
+
+    engine: str
+    cost: float
+    reason: str | None = None
+    detail: str | None = None
+
+    @property
+    def valid(self) -> bool:
+        return self.reason is None
+
+
+def raw_cost(rows: float) -> float:
+    return rows * RAW_ROW_COST + SCAN_COST
+
+
+def scan_cost(rows: float) -> float:
+    return rows * SHARED_SCAN_ROW_COST
+
+
+def rollup_cost(rows_by_grain: dict[str, float]) -> float:
+    return sum(rows * ROLLUP_ROW_COST[grain] + SCAN_COST for grain, rows in rows_by_grain.items())
+
+
+def matrix_cost(entities: int, rows: float) -> float:
+    return entities * MATRIX_ENTITY_COST + rows * MATRIX_ROW_COST
+
+
+@dataclass
+class QueryPlan:
+    """Candidates for one query, cheapest first, and what happened when it ran.
+
+    ``fallbacks`` lists every cheaper candidate that was passed over, with the reason:
+    invalid for this query, or ``error:<type>`` when it raised.
+    """
+
+    method: str
+    candidates: list[Candidate]
+    engine: str | None = None
+    fallbacks: list[tuple[str, str]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.candidates = sorted(self.candidates, key=lambda item: item.cost)
+
+    @property
+    def cost(self) -> float:
+        for candidate in self.candidates:
+            if candidate.engine == self.engine:
+                return candidate.cost
+        return math.inf
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "method": self.method,
+            "engine": self.engine,
+            "cost": round(self.cost, 1),
+            "candidates": [
+                {
+                    "engine": item.engine,
+                    "cost": round(item.cost, 1),
+                    "reason": item.reason,
+                    "detail": item.detail,
+                }
+                for item in self.candidates
+            ],
+            "fallbacks": [
+                {"engine": engine, "reason": reason} for engine, reason in self.fallbacks
+            ],
+        }
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any
+
+PREWARM_WORKERS = 2
+PREWARM_QUEUE_SIZE = 64
+PREWARM_MAX_DEFER_SECONDS = 1.0
+PREWARM_DEFER_INTERVAL_SECONDS = 0.01
+
+if TYPE_CHECKING:
+    from .manifest import Manifest
+
+logger = logging.getLogger("gh_trending_analytics.prewarm")
+
+
+@dataclass
+class PrewarmStats:
+    submitted: int = 0
+    deduplicated: int = 0
+    dropped: int = 0
+    cancelled: int = 0
+    completed: int = 0
+    failed: int = 0
+
+
+@dataclass(frozen=True)
+class PrewarmPolicy:
+    """What to warm speculatively, expressed as replayable request specs.
+
+    On manifest load: every language of each kind's latest day plus the ``toplists`` over
+    the rolling ``windows`` (in days) ending on that day, and over the full archive when
+    ``full_range`` is set, as the dashboard opens with. After a day request: the other
+    languages of that day (``day_languages``) and the adjacent days (``neighbor_days``).
+    """
+
+    latest_day: bool = True
+    windows: tuple[int, ...] = (7, 30, 90)
+    full_range: bool = True
+    toplists: tuple[str, ...] = ("reappearing", "owners", "streaks")
+    toplist_limit: int = 10
+    day_languages: bool = True
+    neighbor_days: bool = True
+
+    def startup_specs(self, manifest: Manifest) -> list[dict[str, Any]]:
+        specs: list[dict[str, Any]] = []
+        for kind in sorted(manifest.kinds):
+            manifest_kind = manifest.kinds[kind]
+            end = manifest_kind.max_date
+            if end is None:
+                continue
+            if self.latest_day:
+                specs.append({"op": "day_languages", "kind": kind, "date": end})
+            starts = [
+                (date.fromisoformat(end) - timedelta(days=days - 1)).isoformat()
+                for days in self.windows
+            ]
+            if self.full_range and manifest_kind.min_date is not None:
+                starts.append(manifest_kind.min_date)
+            for start in dict.fromkeys(starts):
+                specs.extend(self._toplist_specs(kind, start, end))
+        return specs
+
+    def _toplist_specs(self, kind: str, start: str, end: str) -> list[dict[str, Any]]:
+        window = {"start": start, "end": end, "limit": self.toplist_limit}
+        # Owners are repository-only and take no kind parameter.
+        return [
+            {"op": op, **window} if op == "owners" else {"op": op, "kind": kind, **window}
+            for op in self.toplists
+            if op != "owners" or kind == "repository"
+        ]
+
+
+@dataclass
+class _Task:
+    fn: Callable[[], None]
+    group: str | None
+
+
+class PrewarmPool:
+    """A small, bounded pool for speculative cache fills.
+
+    Tasks are keyed so a key already queued or running is not queued twice. When the
+    queue is full the oldest queued task is dropped. Queued tasks can be cancelled by
+    ``group`` once they are no longer wanted. Before starting a task a worker waits up
+    to ``max_defer`` seconds while ``busy()`` reports live user requests, so prewarming
+    runs in the gaps between them rather than competing for the same cores.
+    """
+
+    def __init__(
+        self,
+        workers: int = PREWARM_WORKERS,
+        max_queue: int = PREWARM_QUEUE_SIZE,
+        *,
+        busy: Callable[[], bool] | None = None,
+        max_defer: float = PREWARM_MAX_DEFER_SECONDS,
+    ) -> None:
+        self._workers = workers
+        self._max_queue = max_queue
+        self._busy = busy
+        self._max_defer = max_defer
+        self._queue: OrderedDict[str, _Task] = OrderedDict()
+        self._running: set[str] = set()
+        self._threads: list[threading.Thread] = []
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = PrewarmStats()
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self._workers:
+            thread = threading.Thread(
+                target=self._run, name=f"gh-trending-prewarm-{len(self._threads)}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, key: str, fn: Callable[[], None], *, group: str | None = None) -> bool:
+        """Queue ``fn`` under ``key``; returns False if it was deduplicated or the pool closed."""
+        with self._cond:
+            if self._closed:
+                return False
+            if key in self._queue or key in self._running:
+                self.stats.deduplicated += 1
+                return False
+            while len(self._queue) >= self._max_queue:
+                self._queue.popitem(last=False)
+                self.stats.dropped += 1
+            self._queue[key] = _Task(fn=fn, group=group)
+            self.stats.submitted += 1
+            self._start_workers()
+            self._cond.notify_all()
+            return True
+
+    def cancel_group(self, group: str, *, keep: Iterable[str] = ()) -> int:
+        """Drop queued (not yet running) tasks in ``group`` except those in ``keep``."""
+        keep = set(keep)
+        with self._cond:
+            stale = [
+                key for key, task in self._queue.items() if task.group == group and key not in keep
+            ]
+            for key in stale:
+                del self._queue[key]
+            self.stats.cancelled += len(stale)
+            self._cond.notify_all()
+        return len(stale)
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def defer(self) -> None:
+        """Wait (bounded by ``max_defer``) while user requests are in flight."""
+        if self._busy is None:
+            return
+        deadline = time.monotonic() + self._max_defer
+        while self._busy() and time.monotonic() < deadline:
+            time.sleep(PREWARM_DEFER_INTERVAL_SECONDS)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            self.defer()
+            with self._cond:
+                if not self._queue:
+                    continue
+                key, task = self._queue.popitem(last=False)
+                self._running.add(key)
+            try:
+                task.fn()
+                failed = False
+            except Exception:
+                failed = True
+                logger.exception("prewarm task failed key=%s", key)
+            with self._cond:
+                self._running.discard(key)
+                if failed:
+                    self.stats.failed += 1
+                else:
+                    self.stats.completed += 1
+                self._cond.notify_all()
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Block until nothing is queued or running; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self) -> None:
+        """Discard queued tasks and stop the workers after any running task finishes."""
+        with self._cond:
+            self._closed = True
+            self.stats.cancelled += len(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import contextvars
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+SAMPLE_INTERVAL_SECONDS = 0.001
+MAX_STACK_DEPTH = 128
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+Frame = tuple[str, str, int]
+
+T = TypeVar("T")
+
+_stages: ContextVar[StageTimer | None] = ContextVar("gh_trending_stages", default=None)
+_profiler: ContextVar[RequestProfiler | None] = ContextVar("gh_trending_profiler", default=None)
+
+
+class StageTimer:
+    """Accumulates wall time per named stage for a single profiled request."""
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.durations.items()
+        )
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as ``name`` when the current request is being profiled.
+
+    Outside a profiled request this costs a single context-variable lookup.
+    """
+    timer = _stages.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of a request's threads at a fixed interval.
+
+    ``thread_id`` is always sampled, except that when ``task`` is given (the asyncio
+    task serving the request) samples of that thread are only kept while ``task`` is
+    the loop's running task, so other requests sharing the event loop do not leak in.
+    Worker threads running the request's blocking calls are sampled while attached.
+    """
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval: float = SAMPLE_INTERVAL_SECONDS,
+        *,
+        task: Any = None,
+    ) -> None:
+        self._thread_id = thread_id
+        self._task = task
+        self._loop = task.get_loop() if task is not None else None
+        self._interval = interval
+        self._attached: Counter[int] = Counter({thread_id: 1})
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="gh-trending-profiler", daemon=True)
+        self.samples: Counter[tuple[Frame, ...]] = Counter()
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def attach(self, thread_id: int) -> None:
+        with self._lock:
+            self._attached[thread_id] += 1
+
+    def detach(self, thread_id: int) -> None:
+        with self._lock:
+            self._attached[thread_id] -= 1
+            if self._attached[thread_id] <= 0:
+                del self._attached[thread_id]
+
+    def _serving(self) -> bool:
+        if self._task is None:
+            return True
+        import asyncio
+
+        return asyncio.current_task(self._loop) is self._task
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            with self._lock:
+                thread_ids = list(self._attached)
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                if thread_id == self._thread_id and not self._serving():
+                    continue
+                frame = frames.get(thread_id)
+                stack: list[Frame] = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                if stack:
+                    self.samples[tuple(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+
+@dataclass
+class RequestProfile:
+    id: str
+    route: str
+    duration: float
+    interval: float
+    stages: dict[str, float]
+    samples: dict[tuple[Frame, ...], int] = field(repr=False)
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, one ``a;b;c count`` line per stack."""
+        lines = [
+            ";".join(f"{name} ({filename}:{line})" for name, filename, line in stack) + f" {count}"
+            for stack, count in sorted(self.samples.items())
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def speedscope(self) -> dict[str, Any]:
+        frames: list[dict[str, Any]] = []
+        index: dict[Frame, int] = {}
+        samples: list[list[int]] = []
+        weights: list[float] = []
+        for stack, count in self.samples.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name, filename, line = frame
+                    frames.append({"name": name, "file": filename, "line": line})
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(count * self.interval)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.route,
+            "exporter": "gh_trending_analytics",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.route,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "duration_seconds": self.duration,
+            "sample_count": sum(self.samples.values()),
+            "stages": self.stages,
+        }
+
+
+class ProfileStore:
+    """Keeps the most recent request profiles, evicting the oldest beyond ``max_size``."""
+
+    def __init__(self, max_size: int = 32) -> None:
+        self._profiles: OrderedDict[str, RequestProfile] = OrderedDict()
+        self._max_size = max_size
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self._max_size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> RequestProfile | None:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+class RequestProfiler:
+    """Profiles one request: stage timers for the current context plus stack sampling.
+
+    Created inside a running asyncio task, it samples the event loop thread only while
+    that task runs. Blocking work handed to other threads is sampled when it is wrapped
+    with :func:`propagate`.
+    """
+
+    def __init__(self, route: str, interval: float = SAMPLE_INTERVAL_SECONDS) -> None:
+        self.route = route
+        self.timer = StageTimer()
+        self._sampler = SamplingProfiler(threading.get_ident(), interval, task=_current_task())
+        self._interval = interval
+        self._tokens: tuple[contextvars.Token, contextvars.Token] | None = None
+
+    def __enter__(self) -> RequestProfiler:
+        self._tokens = (_stages.set(self.timer), _profiler.set(self))
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+        if self._tokens is not None:
+            stages_token, profiler_token = self._tokens
+            _profiler.reset(profiler_token)
+            _stages.reset(stages_token)
+
+    def stop(self) -> None:
+        """Stop sampling; the profile is complete once the response has started."""
+        self._sampler.stop()
+
+    def attach(self) -> _AttachedThread:
+        return _AttachedThread(self._sampler)
+
+    def result(self) -> RequestProfile:
+        return RequestProfile(
+            id=uuid.uuid4().hex,
+            route=self.route,
+            duration=self._sampler.elapsed,
+            interval=self._interval,
+            stages=dict(self.timer.durations),
+            samples=dict(self._sampler.samples),
+        )
+
+
+class _AttachedThread:
+    def __init__(self, sampler: SamplingProfiler) -> None:
+        self._sampler = sampler
+        self._thread_id = 0
+
+    def __enter__(self) -> None:
+        self._thread_id = threading.get_ident()
+        self._sampler.attach(self._thread_id)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._sampler.detach(self._thread_id)
+
+
+def _current_task() -> Any:
+    asyncio = sys.modules.get("asyncio")
+    if asyncio is None:
+        return None
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+def propagate(fn: Callable[..., T]) -> Callable[..., T]:
+    """Wrap ``fn`` to run in the current context with its thread sampled.
+
+    Outside a profiled request ``fn`` is returned unchanged. Use it for work handed to
+    thread pools, which do not carry the request's context on their own.
+    """
+    profiler = _profiler.get()
+    if profiler is None:
+        return fn
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        with profiler.attach():
+            return context.copy().run(fn, *args, **kwargs)
+
+    return run
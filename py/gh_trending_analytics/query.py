@@ -1,18 +1,83 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import date
+import json
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from dataclasses import asdict, dataclass, replace
+from datetime import date, timedelta
+from functools import partial
+from itertools import groupby
 from pathlib import Path
-from typing import Any
-
-import duckdb
+from typing import TYPE_CHECKING, Any
 
 from .errors import InvalidRequestError, NotFoundError
 from .manifest import Manifest
+from .metrics import MetricsRegistry
+from .periods import GRAIN_COLUMNS, decompose_range, period_end
+from .planner import Candidate, QueryPlan, matrix_cost, raw_cost, rollup_cost, scan_cost
+from .profiling import stage
+from .search import ENTITY_KINDS, MATCH_ORDER, NameMatch, NameSearchIndexLoader
+from .tables import fetch_batches, fetch_table, table_to_records
 from .utils import ValidationError, parse_date
 
 VALID_KINDS = {"repository", "developer"}
 VALID_PRESENCE = {"day", "occurrence"}
+VALID_SEARCH_KINDS = set(ENTITY_KINDS)
+SEARCH_COLUMNS = {"repository": "full_name", "owner": "owner", "developer": "username"}
+# (entity key column, grouping columns) per kind; only ever interpolated from this table.
+ENTITY_COLUMNS = {
+    "repository": ("full_name", "full_name, owner"),
+    "developer": ("username", "username"),
+}
+# Entry columns the ranked lists read, per kind; shared range scans project to these.
+SCAN_COLUMNS = {
+    "repository": ("date", "rank", "language", "full_name", "owner"),
+    "developer": ("date", "rank", "language", "username"),
+}
+DAYS_BATCH_ROWS = 8192
+# Slow-query profiles waiting for the profiling thread; further ones are skipped.
+PROFILE_BACKLOG = 4
+DAY_COLUMNS = {
+    "repository": "rank, full_name, owner, repo",
+    "developer": "rank, username",
+}
+ROLLUP_PREFIXES = {"repository": "repo", "developer": "dev"}
+# Per-grain select lists that give day, week and month presence rollups one shape.
+PRESENCE_MEASURES = {
+    "day": (
+        "1 AS days_any, CASE WHEN non_null_languages > 0 THEN 1 ELSE 0 END AS days_non_null, "
+        "best_rank_any, best_rank_non_null"
+    ),
+    "week": "days_any, days_non_null, best_rank_any, best_rank_non_null",
+    "month": "days_any, days_non_null, best_rank_any, best_rank_non_null",
+}
+# Raw Parquet selects shaped like the day rollups, for days the rollups do not cover yet.
+PRESENCE_TAIL = (
+    "SELECT {group}, 1 AS days_any, "
+    "CASE WHEN COUNT(language) > 0 THEN 1 ELSE 0 END AS days_non_null, "
+    "MIN(rank) AS best_rank_any, "
+    "MIN(rank) FILTER (WHERE language IS NOT NULL) AS best_rank_non_null "
+    "FROM read_parquet(?) WHERE date BETWEEN ? AND ? "
+    "GROUP BY date, {group}"
+)
+LANGUAGES_TAIL = (
+    "SELECT language, COUNT(*) AS entries "
+    "FROM read_parquet(?) WHERE date BETWEEN ? AND ? "
+    "GROUP BY language"
+)
+
+if TYPE_CHECKING:
+    import duckdb
+    import pyarrow as pa
+
+    from .matrix import PresenceMatrix
+
+logger = logging.getLogger("gh_trending_analytics.query")
 
 
 @dataclass
@@ -20,6 +85,11 @@ class QueryConfig:
     analytics_root: Path
     manifest: Manifest | None = None
     use_rollups: bool = True
+    metrics: MetricsRegistry | None = None
+    slow_query_seconds: float | None = None
+    profile_slow_queries: bool = False
+    slow_query_log_size: int = 50
+    plan_log_size: int = 50
 
     def load_manifest(self) -> Manifest:
         if self.manifest is not None:
@@ -27,10 +97,72 @@ class QueryConfig:
         return Manifest.load(self.analytics_root / "parquet" / "manifest.json")
 
 
+@dataclass(frozen=True)
+class SlowQuery:
+    method: str
+    path: str
+    params: list[Any]
+    seconds: float
+    recorded_at: float
+    profile: dict[str, Any] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _plan_options(method: str, *, language: str | None, presence: str = "day") -> dict[str, Any]:
+    """Planner options for a ranked-list query shape: the engines besides raw Parquet."""
+    if method == "top_reappearing":
+        return {"engines": ("matrix", "rollup") if presence == "day" and language is None else ()}
+    if method == "top_owners":
+        return {"engines": ("rollup",) if language is None else ()}
+    if method == "top_languages":
+        return {"engines": ("rollup",), "measure": "languages"}
+    if method == "top_streaks":
+        # Streaks need consecutive days, so only the day rollup can answer them.
+        return {"engines": ("matrix", "rollup") if language is None else (), "grained": False}
+    return {"engines": ()}
+
+
+def _loggable(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [_loggable(item) for item in value]
+    return value
+
+
 class DuckDBQueryService:
     def __init__(self, config: QueryConfig) -> None:
         self._config = config
         self._manifest = config.load_manifest()
+        self._search_index = NameSearchIndexLoader(config.analytics_root)
+        self.metrics = config.metrics if config.metrics is not None else MetricsRegistry()
+        self._query_seconds = self.metrics.histogram(
+            "gh_trending_query_duration_seconds",
+            "DuckDB execution time per query method.",
+            ("method",),
+        )
+        self._query_paths = self.metrics.counter(
+            "gh_trending_query_path_total",
+            "Query executions per method and engine (matrix, rollup, scan, raw).",
+            ("method", "path"),
+        )
+        self._query_fallbacks = self.metrics.counter(
+            "gh_trending_query_fallback_total",
+            "Cheaper engines passed over per method, engine and reason.",
+            ("method", "engine", "reason"),
+        )
+        self._queries_in_flight = self.metrics.gauge(
+            "gh_trending_queries_in_flight", "DuckDB queries currently executing."
+        )
+        self._slow_queries: deque[SlowQuery] = deque(maxlen=config.slow_query_log_size)
+        self._slow_lock = threading.Lock()
+        self._profiler: ThreadPoolExecutor | None = None
+        self._profiles: set[Future] = set()
+        self._matrices: dict[str, PresenceMatrix] = {}
+        self._plans: deque[QueryPlan] = deque(maxlen=config.plan_log_size)
+        self._plans_lock = threading.Lock()
 
     @property
     def manifest(self) -> Manifest:
@@ -46,13 +178,17 @@ class DuckDBQueryService:
 
     def _manifest_kind(self, kind: str):
         self._validate_kind(kind)
-        if kind not in self._manifest.kinds:
+        with stage("validation"):
+            manifest_kind = self._manifest.kinds.get(kind)
+        if manifest_kind is None:
             raise NotFoundError(f"No manifest data for kind: {kind}")
-        return self._manifest.kinds[kind]
+        return manifest_kind
 
     def _validate_date_exists(self, kind: str, day: date) -> None:
         manifest_kind = self._manifest_kind(kind)
-        if day.isoformat() not in manifest_kind.dates:
+        with stage("validation"):
+            known = manifest_kind.has_date(day)
+        if not known:
             raise NotFoundError(f"Date {day.isoformat()} not found for kind={kind}")
 
     def _validate_language(
@@ -61,12 +197,11 @@ class DuckDBQueryService:
         if language is None or language == "__all__":
             return
         manifest_kind = self._manifest_kind(kind)
-        if day is not None and manifest_kind.languages_by_date:
-            day_languages = manifest_kind.languages_by_date.get(day.isoformat(), [])
-            if language not in day_languages:
+        with stage("validation"):
+            known = manifest_kind.has_language(language, day=day)
+        if not known:
+            if day is not None and manifest_kind.languages_by_date:
                 raise InvalidRequestError(f"Unsupported language for {day.isoformat()}: {language}")
-            return
-        if language not in manifest_kind.languages:
             raise InvalidRequestError(f"Unsupported language: {language}")
 
     def _parse_date(self, value: str) -> date:
@@ -81,16 +216,462 @@ class DuckDBQueryService:
         return language
 
     def _connect(self) -> duckdb.DuckDBPyConnection:
+        import duckdb
+
         return duckdb.connect()
 
-    def _parquet_glob(self, kind: str) -> str:
+    def _execute(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        sql: str,
+        params: list[Any],
+        *,
+        method: str,
+        path: str = "raw",
+    ) -> pa.Table:
+        self._query_paths.inc(method=method, path=path)
+        self._queries_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            with stage("fetch"):
+                table = fetch_table(con.execute(sql, params))
+        finally:
+            elapsed = time.perf_counter() - started
+            self._query_seconds.observe(elapsed, method=method)
+            self._queries_in_flight.dec()
+        threshold = self._config.slow_query_seconds
+        if threshold is not None and elapsed >= threshold:
+            self._record_slow_query(sql, params, method=method, path=path, seconds=elapsed)
+        return table
+
+    def _run_in_memory(self, fn: Callable[[], pa.Table], *, method: str, path: str) -> pa.Table:
+        """Time an in-memory query under the same metrics as :meth:`_execute`."""
+        self._query_paths.inc(method=method, path=path)
+        self._queries_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self._query_seconds.observe(time.perf_counter() - started, method=method)
+            self._queries_in_flight.dec()
+
+    def load_presence_matrix(self, kind: str) -> bool:
+        """Load ``kind``'s day presence rollup into memory for reappearing and streak queries.
+
+        Returns False when NumPy is unavailable or the rollup has not been built; queries
+        then keep using the rollup and raw Parquet paths.
+        """
+        self._validate_kind(kind)
+        if not self._has_rollup(kind):
+            return False
+        try:
+            from .matrix import PresenceMatrix
+        except ImportError:
+            logger.warning("presence_matrix_unavailable kind=%s reason=numpy", kind)
+            return False
+        key, group = ENTITY_COLUMNS[kind]
+        with stage("presence_matrix"):
+            table = fetch_table(
+                self._connect().execute(
+                    f"SELECT {group}, date, best_rank_any, best_rank_non_null, non_null_languages "
+                    f"FROM read_parquet(?) ORDER BY {key}, date",
+                    [self._rollup_glob(kind)],
+                )
+            )
+            self._matrices[kind] = PresenceMatrix(kind, table, group.split(", "))
+        return True
+
+    def _record_slow_query(
+        self,
+        sql: str,
+        params: list[Any],
+        *,
+        method: str,
+        path: str,
+        seconds: float,
+    ) -> None:
+        loggable = _loggable(params)
+        logger.warning(
+            "slow_query method=%s path=%s seconds=%.3f params=%s",
+            method,
+            path,
+            seconds,
+            json.dumps(loggable, default=str),
+        )
+        entry = SlowQuery(
+            method=method,
+            path=path,
+            params=loggable,
+            seconds=seconds,
+            recorded_at=time.time(),
+        )
+        with self._slow_lock:
+            self._slow_queries.append(entry)
+            # Shared scans are registered on the request's connection and cannot be re-run.
+            if not self._config.profile_slow_queries or path == "scan":
+                return
+            if len(self._profiles) >= PROFILE_BACKLOG:
+                return
+            # Re-running the query would double the latency of an already slow request.
+            if self._profiler is None:
+                self._profiler = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="gh-trending-profile"
+                )
+            future = self._profiler.submit(self._attach_profile, entry, sql, params)
+            self._profiles.add(future)
+        future.add_done_callback(self._profile_done)
+
+    def _profile_done(self, future: Future) -> None:
+        with self._slow_lock:
+            self._profiles.discard(future)
+
+    def _attach_profile(self, entry: SlowQuery, sql: str, params: list[Any]) -> None:
+        profile = self._profile(self._connect(), sql, params)
+        with self._slow_lock:
+            for index, logged in enumerate(self._slow_queries):
+                if logged is entry:
+                    self._slow_queries[index] = replace(entry, profile=profile)
+                    break
+
+    def wait_for_profiles(self, timeout: float | None = None) -> bool:
+        """Block until queued slow-query profiles are attached; False on timeout."""
+        with self._slow_lock:
+            pending = list(self._profiles)
+        _, not_done = wait_futures(pending, timeout=timeout)
+        return not not_done
+
+    def _profile(
+        self, con: duckdb.DuckDBPyConnection, sql: str, params: list[Any]
+    ) -> dict[str, Any] | None:
+        """Re-run ``sql`` with DuckDB profiling enabled and return the JSON profile.
+
+        Runs on the profiling thread with its own connection, never on a request.
+        """
+        if not hasattr(con, "get_profiling_information"):
+            return None
+        try:
+            con.execute("SET enable_profiling = 'no_output'")
+            con.execute(sql, params).fetchall()
+            return json.loads(con.get_profiling_information(format="json"))
+        except Exception:
+            logger.exception("slow_query_profile_failed")
+            return None
+        finally:
+            con.execute("RESET enable_profiling")
+
+    def slow_queries(self) -> list[dict[str, Any]]:
+        """Most recent slow queries, newest first."""
+        with self._slow_lock:
+            entries = list(self._slow_queries)
+        return [entry.to_dict() for entry in reversed(entries)]
+
+    def recent_plans(self) -> list[dict[str, Any]]:
+        """Most recent query plans, newest first."""
+        with self._plans_lock:
+            plans = list(self._plans)
+        return [plan.to_dict() for plan in reversed(plans)]
+
+    def _rollup_split(self, kind: str, start: date, end: date) -> tuple[date, date | None]:
+        """Split ``[start, end]`` at the first day the rollups do not cover yet.
+
+        Returns the last day to read from rollups (before ``start`` when none is covered)
+        and the first day to read from Parquet instead, or None when nothing is left over.
+        """
+        manifest_kind = self._manifest.kinds.get(kind)
+        first_unrolled = manifest_kind.first_unrolled(start, end) if manifest_kind else None
+        if first_unrolled is None:
+            return end, None
+        tail_start = date.fromisoformat(first_unrolled)
+        return tail_start - timedelta(days=1), tail_start
+
+    def _rollup_reason(self, kind: str, start: date, end: date, measure: str) -> str | None:
+        """Why ``kind``'s rollups cannot answer ``[start, end]``, or None when they can.
+
+        ``stale`` when they cover none of the range, ``incomplete`` when a year the
+        manifest records as rolled up has no partition on disk.
+        """
+        rolled_end, _ = self._rollup_split(kind, start, end)
+        if rolled_end < start:
+            return "stale"
+        coverage = self._manifest_kind(kind).rollup_coverage
+        table = f"{ROLLUP_PREFIXES[kind]}_day_{measure}"
+        root = self._config.analytics_root / "rollups" / kind
+        for year in range(start.year, rolled_end.year + 1):
+            if str(year) in coverage and not (root / f"year={year}" / f"{table}.parquet").exists():
+                return "incomplete"
+        return None
+
+    def _rollup_cost(
+        self, kind: str, start: date, end: date, *, measure: str, grained: bool
+    ) -> tuple[float, date | None]:
+        """Estimated cost of the rollup relation for ``[start, end]`` and its raw tail start."""
+        manifest_kind = self._manifest.kinds.get(kind)
+        if manifest_kind is None:
+            return 0.0, None
+        rolled_end, tail_start = self._rollup_split(kind, start, end)
+        rows: dict[str, float] = {}
+        if start <= rolled_end:
+            parts = (
+                decompose_range(start, rolled_end)
+                if grained
+                and all(self._has_rollup(kind, grain, measure) for grain in ("week", "month"))
+                else [("day", start, rolled_end)]
+            )
+            for grain, first, last in parts:
+                span = manifest_kind.estimate_rows(first, period_end(grain, last))
+                rows[grain] = rows.get(grain, 0.0) + span
+        cost = rollup_cost(rows)
+        if tail_start is not None:
+            cost += raw_cost(manifest_kind.estimate_rows(tail_start, end))
+        return cost, tail_start
+
+    def _matrix_reason(
+        self, matrix: PresenceMatrix, kind: str, start: date, end: date
+    ) -> str | None:
+        """``stale`` when archived dates in ``[start, end]`` postdate the loaded matrix."""
+        clamped = self._manifest_kind(kind).clamp_range(start, end)
+        if clamped is None:
+            return None
+        if matrix.first_day is None or matrix.last_day is None:
+            return "stale"
+        first, last = (date.fromisoformat(value) for value in clamped)
+        if first < matrix.first_day or last > matrix.last_day:
+            return "stale"
+        return None
+
+    def _plan(
+        self,
+        method: str,
+        kinds: list[str],
+        start: date,
+        end: date,
+        *,
+        engines: tuple[str, ...],
+        measure: str = "presence",
+        grained: bool = True,
+        scans: dict[str, pa.Table] | None = None,
+    ) -> QueryPlan:
+        """Cost every engine that supports this query shape and has data for ``kinds``.
+
+        ``engines`` are the engines the query can be answered by besides raw Parquet.
+        Engines that are unavailable (not loaded or not built) are left out; available
+        ones that are stale or incomplete for the range stay in with their reason, so
+        passing them over is recorded as a fallback. ``scans`` from :meth:`scan_range`
+        add a ``scan`` candidate costed on the rows already in memory.
+        """
+        candidates = []
+        raw_rows = 0.0
+        for kind in kinds:
+            manifest_kind = self._manifest.kinds.get(kind)
+            if manifest_kind is not None:
+                raw_rows += manifest_kind.estimate_rows(start, end)
+        candidates.append(Candidate("raw", raw_cost(raw_rows)))
+        if scans is not None and all(kind in scans for kind in kinds):
+            rows = sum(scans[kind].num_rows for kind in kinds)
+            candidates.append(Candidate("scan", scan_cost(rows)))
+
+        if "rollup" in engines and all(self._has_rollup(kind, measure=measure) for kind in kinds):
+            cost = 0.0
+            tails = []
+            for kind in kinds:
+                kind_cost, tail_start = self._rollup_cost(
+                    kind, start, end, measure=measure, grained=grained
+                )
+                cost += kind_cost
+                if tail_start is not None:
+                    tails.append(tail_start)
+            reasons = [self._rollup_reason(kind, start, end, measure) for kind in kinds]
+            candidates.append(
+                Candidate(
+                    "rollup",
+                    cost,
+                    next((value for value in reasons if value), None),
+                    f"raw tail from {min(tails).isoformat()}" if tails else None,
+                )
+            )
+
+        if "matrix" in engines and len(kinds) == 1 and kinds[0] in self._matrices:
+            kind = kinds[0]
+            matrix = self._matrices[kind]
+            # The matrix has no raw tail, so any day the rollups miss makes it stale.
+            _, tail_start = self._rollup_split(kind, start, end)
+            reason = "stale" if tail_start is not None else None
+            reason = reason or self._matrix_reason(matrix, kind, start, end)
+            candidates.append(Candidate("matrix", matrix_cost(matrix.size, raw_rows), reason))
+        return QueryPlan(method, candidates)
+
+    def preferred_engine(
+        self,
+        method: str,
+        kinds: list[str],
+        start: str,
+        end: str,
+        *,
+        language: str | None = None,
+        presence: str = "day",
+    ) -> str:
+        """The engine a ranked-list query would run on, without running it.
+
+        Callers use this to decide whether sharing a :meth:`scan_range` is worthwhile:
+        only queries answered from raw Parquet read the entries a scan holds.
+        """
+        start_date = self._parse_date(start)
+        end_date = self._parse_date(end)
+        options = _plan_options(
+            method, language=self._normalize_language_param(language), presence=presence
+        )
+        plan = self._plan(method, kinds, start_date, end_date, **options)
+        return next(candidate.engine for candidate in plan.candidates if candidate.valid)
+
+    def _run_plan(self, plan: QueryPlan, runners: dict[str, Callable[[], pa.Table]]) -> pa.Table:
+        """Run the cheapest valid candidate, falling through to the next one if it fails.
+
+        Raw Parquet is always a valid candidate and its errors propagate.
+        """
+        for candidate in plan.candidates:
+            if candidate.reason is not None:
+                self._record_fallback(plan, candidate.engine, candidate.reason)
+                continue
+            try:
+                table = runners[candidate.engine]()
+            except Exception as exc:
+                if candidate.engine == "raw":
+                    raise
+                logger.exception(
+                    "query_engine_failed method=%s engine=%s", plan.method, candidate.engine
+                )
+                self._record_fallback(plan, candidate.engine, f"error:{type(exc).__name__}")
+                continue
+            plan.engine = candidate.engine
+            logger.debug(
+                "query_plan method=%s engine=%s cost=%.1f fallbacks=%s",
+                plan.method,
+                plan.engine,
+                plan.cost,
+                plan.fallbacks,
+            )
+            with self._plans_lock:
+                self._plans.append(plan)
+            return table
+        raise RuntimeError(f"No engine could run {plan.method}")
+
+    def _record_fallback(self, plan: QueryPlan, engine: str, reason: str) -> None:
+        plan.fallbacks.append((engine, reason))
+        self._query_fallbacks.inc(method=plan.method, engine=engine, reason=reason)
+
+    def _source(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        kind: str,
+        scans: dict[str, pa.Table] | None,
+    ) -> tuple[str, list[Any]]:
+        """SQL relation for ``kind`` entries: a shared pre-filtered scan or the Parquet glob."""
+        if scans is not None and kind in scans:
+            name = f"scan_{kind}"
+            con.register(name, scans[kind])
+            return name, []
+        return "read_parquet(?)", [self._parquet_glob(kind)]
+
+    def scan_columns(self, method: str, kind: str) -> tuple[str, ...]:
+        """Entry columns ``method`` reads for ``kind``; a shared scan must include them."""
+        self._validate_kind(kind)
+        if method == "top_languages":
+            return ("date", "language")
+        return SCAN_COLUMNS[kind]
+
+    def scan_range(
+        self, kind: str, start: str, end: str, *, columns: Iterable[str] | None = None
+    ) -> pa.Table:
+        """Read every ``kind`` entry dated within ``[start, end]`` once, for reuse across queries.
+
+        The result can be passed as ``scans={kind: table}`` to the ranked-list queries that
+        accept it; their own date filters must fall inside the scanned range, and
+        ``columns`` (all of :data:`SCAN_COLUMNS` by default) must cover what they read.
+        """
+        self._validate_kind(kind)
+        start_date = self._parse_date(start)
+        end_date = self._parse_date(end)
+        wanted = set(SCAN_COLUMNS[kind] if columns is None else columns)
+        unknown = wanted - set(SCAN_COLUMNS[kind])
+        if unknown:
+            raise InvalidRequestError(f"Unsupported scan column: {sorted(unknown)[0]}")
+        # Keep the declared column order so scans of the same set share a schema.
+        projection = ", ".join(column for column in SCAN_COLUMNS[kind] if column in wanted)
+        return self._execute(
+            self._connect(),
+            f"SELECT {projection} FROM read_parquet(?) WHERE date BETWEEN ? AND ?",
+            [self._parquet_glob(kind), start_date, end_date],
+            method="scan_range",
+        )
+
+    def _parquet_glob(self, kind: str, year: int | str = "*") -> str:
         table = "repo_trend_entry" if kind == "repository" else "dev_trend_entry"
-        return str(self._config.analytics_root / "parquet" / kind / "year=*" / f"{table}.parquet")
+        return str(
+            self._config.analytics_root / "parquet" / kind / f"year={year}" / f"{table}.parquet"
+        )
 
-    def _rollup_glob(self, kind: str) -> str:
-        table = "repo_day_presence" if kind == "repository" else "dev_day_presence"
+    def _rollup_glob(self, kind: str, grain: str = "day", measure: str = "presence") -> str:
+        table = f"{ROLLUP_PREFIXES[kind]}_{grain}_{measure}"
         return str(self._config.analytics_root / "rollups" / kind / "year=*" / f"{table}.parquet")
 
+    def _has_rollup(self, kind: str, grain: str = "day", measure: str = "presence") -> bool:
+        if not self._config.use_rollups:
+            return False
+        table = f"{ROLLUP_PREFIXES[kind]}_{grain}_{measure}"
+        root = self._config.analytics_root / "rollups" / kind
+        return next(root.glob(f"year=*/{table}.parquet"), None) is not None
+
+    def _rollup_relation(
+        self,
+        kind: str,
+        start: date,
+        end: date,
+        *,
+        measure: str,
+        columns: dict[str, str],
+        tail: str,
+    ) -> tuple[str, list[Any]]:
+        """A UNION ALL over the day, week and month rollups covering ``[start, end]``.
+
+        The range is split into whole months, whole ISO weeks and the remaining days, so
+        each period is read at its coarsest grain exactly once. ``columns`` gives each
+        grain's select list. Without week and month rollups every day is read. Days after
+        the manifest's rollup coverage are read from Parquet by ``tail``, a select with
+        the same columns over ``read_parquet(?) WHERE date BETWEEN ? AND ?``.
+        """
+        rolled_end, tail_start = self._rollup_split(kind, start, end)
+        grained = all(self._has_rollup(kind, grain, measure) for grain in ("week", "month"))
+        parts = decompose_range(start, rolled_end) if grained else [("day", start, rolled_end)]
+        if rolled_end < start:
+            parts = []
+        selects = []
+        params: list[Any] = []
+        for grain in columns:
+            spans = [(first, last) for part, first, last in parts if part == grain]
+            if not spans:
+                continue
+            column = GRAIN_COLUMNS[grain]
+            where = " OR ".join(f"{column} BETWEEN ? AND ?" for _ in spans)
+            selects.append(f"SELECT {columns[grain]} FROM read_parquet(?) WHERE {where}")
+            params.append(self._rollup_glob(kind, grain, measure))
+            params.extend(bound for span in spans for bound in span)
+        if tail_start is not None:
+            selects.append(tail)
+            params.extend([self._parquet_glob(kind), tail_start, end])
+        return "(" + " UNION ALL ".join(selects) + ")", params
+
+    def _presence_relation(self, kind: str, start: date, end: date) -> tuple[str, list[Any]]:
+        _, group = ENTITY_COLUMNS[kind]
+        columns = {grain: f"{group}, {measures}" for grain, measures in PRESENCE_MEASURES.items()}
+        return self._rollup_relation(
+            kind,
+            start,
+            end,
+            measure="presence",
+            columns=columns,
+            tail=PRESENCE_TAIL.format(group=group),
+        )
+
     def list_dates(self, kind: str) -> list[str]:
         manifest_kind = self._manifest_kind(kind)
         return list(manifest_kind.dates)
@@ -99,42 +680,225 @@ class DuckDBQueryService:
         manifest_kind = self._manifest_kind(kind)
         return list(manifest_kind.languages)
 
+    def load_search_index(self) -> int:
+        """Build the in-memory name index now rather than on the first search.
+
+        Returns the number of indexed names.
+        """
+        with stage("search_index"):
+            return len(self._search_index.get())
+
+    def search(
+        self,
+        query: str,
+        *,
+        kind: str | None,
+        start: str | None,
+        end: str | None,
+        language: str | None,
+        limit: int,
+    ) -> list[dict[str, Any]]:
+        return table_to_records(
+            self.search_table(
+                query, kind=kind, start=start, end=end, language=language, limit=limit
+            )
+        )
+
+    def search_table(
+        self,
+        query: str,
+        *,
+        kind: str | None,
+        start: str | None,
+        end: str | None,
+        language: str | None,
+        limit: int,
+    ) -> pa.Table:
+        if kind is not None and kind not in VALID_SEARCH_KINDS:
+            raise InvalidRequestError(f"Unsupported search kind: {kind}")
+        entities = {kind} if kind is not None else set(VALID_SEARCH_KINDS)
+        language = self._normalize_language_param(language)
+        start_date = self._parse_date(start) if start else None
+        end_date = self._parse_date(end) if end else None
+        if start_date and end_date and start_date > end_date:
+            raise InvalidRequestError("Start date must be <= end date")
+        dataset_kinds = sorted({ENTITY_KINDS[entity] for entity in entities})
+        if language is not None:
+            known = [
+                self._manifest.kinds[dataset_kind]
+                for dataset_kind in dataset_kinds
+                if dataset_kind in self._manifest.kinds
+            ]
+            if not any(manifest_kind.has_language(language) for manifest_kind in known):
+                raise InvalidRequestError(f"Unsupported language: {language}")
+
+        try:
+            matches = self._search_index.get().search(query, entities=entities)
+        except ValidationError as exc:
+            raise InvalidRequestError(str(exc)) from exc
+
+        if start_date is None and end_date is None and language is None:
+            return _search_results(matches[:limit])
+
+        counted = self._count_matches(
+            matches,
+            start_date or date.min,
+            end_date or date.max,
+            language,
+        )
+        counted.sort(key=lambda item: (MATCH_ORDER[item.match], -item.appearances, item.name))
+        return _search_results(counted[:limit])
+
+    def _count_matches(
+        self,
+        matches: list[NameMatch],
+        start_date: date,
+        end_date: date,
+        language: str | None,
+    ) -> list[NameMatch]:
+        by_entity: dict[str, dict[str, NameMatch]] = {}
+        for match in matches:
+            by_entity.setdefault(match.entity, {})[match.name] = match
+
+        import pyarrow as pa
+
+        con = self._connect()
+        counted: list[NameMatch] = []
+        for entity, named in sorted(by_entity.items()):
+            column = SEARCH_COLUMNS[entity]
+            # Matched names are joined as a table, so a common query's thousands of
+            # matches become a hash join instead of a per-row list scan.
+            relation = f"search_names_{entity}"
+            con.register(relation, pa.table({"name": pa.array(list(named), type=pa.string())}))
+            sql = (
+                "SELECT name, COUNT(*) AS appearances, COUNT(DISTINCT date) AS days_present, "
+                "MIN(date) AS first_seen, MAX(date) AS last_seen, MIN(rank) AS best_rank "
+                f"FROM (SELECT {column} AS name, date, rank FROM read_parquet(?) "
+                "  WHERE date BETWEEN ? AND ? AND (? IS NULL OR language = ?)) "
+                f"JOIN {relation} USING (name) "
+                "GROUP BY name"
+            )
+            table = self._execute(
+                con,
+                sql,
+                [
+                    self._parquet_glob(ENTITY_KINDS[entity]),
+                    start_date,
+                    end_date,
+                    language,
+                    language,
+                ],
+                method="search",
+            )
+            for row in table.to_pylist():
+                counted.append(NameMatch(entity=entity, match=named[row["name"]].match, **row))
+        return counted
+
     def get_day(self, kind: str, day: str, language: str | None) -> list[dict[str, Any]]:
+        return table_to_records(self.get_day_table(kind, day, language))
+
+    def get_day_table(self, kind: str, day: str, language: str | None) -> pa.Table:
         self._validate_kind(kind)
         parsed = self._parse_date(day)
         self._validate_date_exists(kind, parsed)
         language_value = "__all__" if language is None else language
         self._validate_language(kind, language_value, day=parsed)
 
-        parquet_glob = self._parquet_glob(kind)
-        con = self._connect()
-        if kind == "repository":
-            sql = (
-                "SELECT full_name, owner, repo, rank "
-                "FROM read_parquet(?) "
-                "WHERE date = ? AND (language = ? OR (language IS NULL AND ? = '__all__')) "
-                "ORDER BY rank ASC"
-            )
-            rows = con.execute(
-                sql, [parquet_glob, parsed, language_value, language_value]
-            ).fetchall()
-            return [
-                {
-                    "rank": row[3],
-                    "full_name": row[0],
-                    "owner": row[1],
-                    "repo": row[2],
-                }
-                for row in rows
-            ]
         sql = (
-            "SELECT username, rank "
+            f"SELECT {DAY_COLUMNS[kind]} "
             "FROM read_parquet(?) "
             "WHERE date = ? AND (language = ? OR (language IS NULL AND ? = '__all__')) "
             "ORDER BY rank ASC"
         )
-        rows = con.execute(sql, [parquet_glob, parsed, language_value, language_value]).fetchall()
-        return [{"rank": row[1], "username": row[0]} for row in rows]
+        return self._execute(
+            self._connect(),
+            sql,
+            [self._parquet_glob(kind), parsed, language_value, language_value],
+            method="get_day",
+        )
+
+    def get_day_tables(self, kind: str, day: str) -> dict[str, pa.Table]:
+        """Every ranked list for ``day`` from one scan, keyed by language (``"__all__"``).
+
+        Each table matches what ``get_day_table`` returns for that language.
+        """
+        self._validate_kind(kind)
+        parsed = self._parse_date(day)
+        self._validate_date_exists(kind, parsed)
+
+        sql = (
+            f"SELECT COALESCE(language, '__all__') AS list_language, {DAY_COLUMNS[kind]} "
+            "FROM read_parquet(?) "
+            "WHERE date = ? "
+            "ORDER BY list_language, rank ASC"
+        )
+        table = self._execute(
+            self._connect(),
+            sql,
+            [self._parquet_glob(kind, parsed.year), parsed],
+            method="get_day_tables",
+        )
+        languages = table.column("list_language").to_pylist()
+        rows = table.drop_columns(["list_language"])
+        tables: dict[str, pa.Table] = {}
+        offset = 0
+        for language, group in groupby(languages):
+            length = sum(1 for _ in group)
+            tables[language] = rows.slice(offset, length)
+            offset += length
+        return tables
+
+    def iter_days(
+        self,
+        kind: str,
+        start: str,
+        end: str,
+        *,
+        language: str | None,
+        batch_rows: int = DAYS_BATCH_ROWS,
+    ) -> pa.RecordBatchReader:
+        """Stream every ranked list in ``[start, end]`` ordered by date, language and rank.
+
+        ``language=None`` streams all lists, ``"__all__"`` only the all-languages list.
+        Year partitions are read one at a time, so memory stays bounded by a single
+        partition's sort no matter how long the range is, and batches start flowing
+        once the first partition is sorted.
+        """
+        import pyarrow as pa
+
+        manifest_kind = self._manifest_kind(kind)
+        start_date = self._parse_date(start)
+        end_date = self._parse_date(end)
+        if start_date > end_date:
+            raise InvalidRequestError("Start date must be <= end date")
+        self._validate_language(kind, language)
+
+        columns = f"date, language, {DAY_COLUMNS[kind]}"
+        sql = (
+            f"SELECT {columns} FROM read_parquet(?) "
+            "WHERE date BETWEEN ? AND ? "
+            "AND (? IS NULL OR language = ? OR (language IS NULL AND ? = '__all__')) "
+            "ORDER BY date ASC, language ASC NULLS LAST, rank ASC"
+        )
+        con = self._connect()
+        schema = fetch_table(
+            con.execute(
+                f"SELECT {columns} FROM read_parquet(?) LIMIT 0", [self._parquet_glob(kind)]
+            )
+        ).schema
+        span = manifest_kind.clamp_range(start_date.isoformat(), end_date.isoformat())
+
+        def batches() -> Iterator[pa.RecordBatch]:
+            if span is None:
+                return
+            for year in range(int(span[0][:4]), int(span[1][:4]) + 1):
+                path = self._parquet_glob(kind, year)
+                if not Path(path).exists():
+                    continue
+                params = [path, start_date, end_date, language, language, language]
+                yield from fetch_batches(con.execute(sql, params), batch_rows)
+
+        return pa.RecordBatchReader.from_batches(schema, batches())
 
     def top_reappearing(
         self,
@@ -146,7 +910,33 @@ class DuckDBQueryService:
         presence: str,
         include_all_languages: bool,
         limit: int,
+        scans: dict[str, pa.Table] | None = None,
     ) -> list[dict[str, Any]]:
+        return table_to_records(
+            self.top_reappearing_table(
+                kind,
+                start,
+                end,
+                language=language,
+                presence=presence,
+                include_all_languages=include_all_languages,
+                limit=limit,
+                scans=scans,
+            )
+        )
+
+    def top_reappearing_table(
+        self,
+        kind: str,
+        start: str,
+        end: str,
+        *,
+        language: str | None,
+        presence: str,
+        include_all_languages: bool,
+        limit: int,
+        scans: dict[str, pa.Table] | None = None,
+    ) -> pa.Table:
         self._validate_kind(kind)
         self._validate_presence(presence)
         language = self._normalize_language_param(language)
@@ -156,77 +946,79 @@ class DuckDBQueryService:
             raise InvalidRequestError("Start date must be <= end date")
         self._validate_language(kind, language)
 
-        parquet_glob = self._parquet_glob(kind)
         con = self._connect()
+        raw = partial(
+            self._top_reappearing_raw,
+            con,
+            kind,
+            start_date,
+            end_date,
+            language=language,
+            presence=presence,
+            include_all_languages=include_all_languages,
+            limit=limit,
+        )
+        plan = self._plan(
+            "top_reappearing",
+            [kind],
+            start_date,
+            end_date,
+            scans=scans,
+            **_plan_options("top_reappearing", language=language, presence=presence),
+        )
+        return self._run_plan(
+            plan,
+            {
+                "matrix": lambda: self._run_in_memory(
+                    partial(
+                        self._matrices[kind].top_reappearing,
+                        start_date,
+                        end_date,
+                        include_all_languages=include_all_languages,
+                        limit=limit,
+                    ),
+                    method="top_reappearing",
+                    path="matrix",
+                ),
+                "rollup": lambda: self._top_reappearing_rollup(
+                    con, kind, start_date, end_date, include_all_languages, limit
+                ),
+                "scan": partial(raw, scans=scans),
+                "raw": partial(raw, scans=None),
+            },
+        )
 
-        if (
-            self._config.use_rollups
-            and presence == "day"
-            and language is None
-            and (self._config.analytics_root / "rollups").exists()
-        ):
-            try:
-                return self._top_reappearing_rollup(
-                    con,
-                    kind,
-                    start_date,
-                    end_date,
-                    include_all_languages,
-                    limit,
-                )
-            except Exception:
-                # Fall back to raw parquet on any rollup failure.
-                pass
-
-        if kind == "repository":
-            count_expr = "COUNT(DISTINCT date)" if presence == "day" else "COUNT(*)"
-            sql = (
-                f"SELECT full_name, owner, {count_expr} AS days_present, MIN(rank) AS best_rank "
-                "FROM read_parquet(?) "
-                "WHERE date BETWEEN ? AND ? "
-                "AND (? IS NULL OR language = ?) "
-                "AND (? OR language IS NOT NULL) "
-                "GROUP BY full_name, owner "
-                "ORDER BY days_present DESC, best_rank ASC, full_name ASC "
-                "LIMIT ?"
-            )
-            rows = con.execute(
-                sql,
-                [
-                    parquet_glob,
-                    start_date,
-                    end_date,
-                    language,
-                    language,
-                    include_all_languages,
-                    limit,
-                ],
-            ).fetchall()
-            return [
-                {
-                    "full_name": row[0],
-                    "owner": row[1],
-                    "days_present": row[2],
-                    "best_rank": row[3],
-                }
-                for row in rows
-            ]
-
+    def _top_reappearing_raw(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        kind: str,
+        start_date: date,
+        end_date: date,
+        *,
+        language: str | None,
+        presence: str,
+        include_all_languages: bool,
+        limit: int,
+        scans: dict[str, pa.Table] | None,
+    ) -> pa.Table:
+        key, group = ENTITY_COLUMNS[kind]
+        source, source_params = self._source(con, kind, scans)
         count_expr = "COUNT(DISTINCT date)" if presence == "day" else "COUNT(*)"
         sql = (
-            f"SELECT username, {count_expr} AS days_present, MIN(rank) AS best_rank "
-            "FROM read_parquet(?) "
+            f"SELECT {group}, {count_expr} AS days_present, MIN(rank) AS best_rank "
+            f"FROM {source} "
             "WHERE date BETWEEN ? AND ? "
             "AND (? IS NULL OR language = ?) "
             "AND (? OR language IS NOT NULL) "
-            "GROUP BY username "
-            "ORDER BY days_present DESC, best_rank ASC, username ASC "
+            f"GROUP BY {group} "
+            f"ORDER BY days_present DESC, best_rank ASC, {key} ASC "
             "LIMIT ?"
         )
-        rows = con.execute(
+        return self._execute(
+            con,
             sql,
             [
-                parquet_glob,
+                *source_params,
                 start_date,
                 end_date,
                 language,
@@ -234,15 +1026,9 @@ class DuckDBQueryService:
                 include_all_languages,
                 limit,
             ],
-        ).fetchall()
-        return [
-            {
-                "username": row[0],
-                "days_present": row[1],
-                "best_rank": row[2],
-            }
-            for row in rows
-        ]
+            method="top_reappearing",
+            path="scan" if scans is not None else "raw",
+        )
 
     def _top_reappearing_rollup(
         self,
@@ -252,69 +1038,33 @@ class DuckDBQueryService:
         end_date: date,
         include_all_languages: bool,
         limit: int,
-    ) -> list[dict[str, Any]]:
-        rollup_glob = self._rollup_glob(kind)
-        if kind == "repository":
-            sql = (
-                "SELECT full_name, owner, COUNT(*) AS days_present, "
-                "MIN(CASE WHEN ? THEN best_rank_any ELSE best_rank_non_null END) AS best_rank "
-                "FROM read_parquet(?) "
-                "WHERE date BETWEEN ? AND ? "
-                "AND (? OR non_null_languages > 0) "
-                "GROUP BY full_name, owner "
-                "ORDER BY days_present DESC, best_rank ASC, full_name ASC "
-                "LIMIT ?"
-            )
-            rows = con.execute(
-                sql,
-                [
-                    include_all_languages,
-                    rollup_glob,
-                    start_date,
-                    end_date,
-                    include_all_languages,
-                    limit,
-                ],
-            ).fetchall()
-            return [
-                {
-                    "full_name": row[0],
-                    "owner": row[1],
-                    "days_present": row[2],
-                    "best_rank": row[3],
-                }
-                for row in rows
-            ]
-
+    ) -> pa.Table:
+        key, group = ENTITY_COLUMNS[kind]
+        relation, relation_params = self._presence_relation(kind, start_date, end_date)
         sql = (
-            "SELECT username, COUNT(*) AS days_present, "
+            f"SELECT {group}, "
+            "CAST(SUM(CASE WHEN ? THEN days_any ELSE days_non_null END) AS BIGINT) "
+            "AS days_present, "
             "MIN(CASE WHEN ? THEN best_rank_any ELSE best_rank_non_null END) AS best_rank "
-            "FROM read_parquet(?) "
-            "WHERE date BETWEEN ? AND ? "
-            "AND (? OR non_null_languages > 0) "
-            "GROUP BY username "
-            "ORDER BY days_present DESC, best_rank ASC, username ASC "
+            f"FROM {relation} "
+            "WHERE (? OR days_non_null > 0) "
+            f"GROUP BY {group} "
+            f"ORDER BY days_present DESC, best_rank ASC, {key} ASC "
             "LIMIT ?"
         )
-        rows = con.execute(
+        return self._execute(
+            con,
             sql,
             [
                 include_all_languages,
-                rollup_glob,
-                start_date,
-                end_date,
+                include_all_languages,
+                *relation_params,
                 include_all_languages,
                 limit,
             ],
-        ).fetchall()
-        return [
-            {
-                "username": row[0],
-                "days_present": row[1],
-                "best_rank": row[2],
-            }
-            for row in rows
-        ]
+            method="top_reappearing",
+            path="rollup",
+        )
 
     def top_owners(
         self,
@@ -324,7 +1074,29 @@ class DuckDBQueryService:
         language: str | None,
         include_all_languages: bool,
         limit: int,
+        scans: dict[str, pa.Table] | None = None,
     ) -> list[dict[str, Any]]:
+        return table_to_records(
+            self.top_owners_table(
+                start,
+                end,
+                language=language,
+                include_all_languages=include_all_languages,
+                limit=limit,
+                scans=scans,
+            )
+        )
+
+    def top_owners_table(
+        self,
+        start: str,
+        end: str,
+        *,
+        language: str | None,
+        include_all_languages: bool,
+        limit: int,
+        scans: dict[str, pa.Table] | None = None,
+    ) -> pa.Table:
         language = self._normalize_language_param(language)
         start_date = self._parse_date(start)
         end_date = self._parse_date(end)
@@ -332,11 +1104,50 @@ class DuckDBQueryService:
             raise InvalidRequestError("Start date must be <= end date")
         self._validate_language("repository", language)
 
-        parquet_glob = self._parquet_glob("repository")
         con = self._connect()
+        raw = partial(
+            self._top_owners_raw,
+            con,
+            start_date,
+            end_date,
+            language=language,
+            include_all_languages=include_all_languages,
+            limit=limit,
+        )
+        plan = self._plan(
+            "top_owners",
+            ["repository"],
+            start_date,
+            end_date,
+            scans=scans,
+            **_plan_options("top_owners", language=language),
+        )
+        return self._run_plan(
+            plan,
+            {
+                "rollup": lambda: self._top_owners_rollup(
+                    con, start_date, end_date, include_all_languages, limit
+                ),
+                "scan": partial(raw, scans=scans),
+                "raw": partial(raw, scans=None),
+            },
+        )
+
+    def _top_owners_raw(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        start_date: date,
+        end_date: date,
+        *,
+        language: str | None,
+        include_all_languages: bool,
+        limit: int,
+        scans: dict[str, pa.Table] | None,
+    ) -> pa.Table:
+        source, source_params = self._source(con, "repository", scans)
         sql = (
             "SELECT owner, COUNT(DISTINCT full_name) AS repos_present, MIN(rank) AS best_rank "
-            "FROM read_parquet(?) "
+            f"FROM {source} "
             "WHERE date BETWEEN ? AND ? "
             "AND (? IS NULL OR language = ?) "
             "AND (? OR language IS NOT NULL) "
@@ -344,11 +1155,52 @@ class DuckDBQueryService:
             "ORDER BY repos_present DESC, best_rank ASC, owner ASC "
             "LIMIT ?"
         )
-        rows = con.execute(
+        return self._execute(
+            con,
             sql,
-            [parquet_glob, start_date, end_date, language, language, include_all_languages, limit],
-        ).fetchall()
-        return [{"owner": row[0], "repos_present": row[1], "best_rank": row[2]} for row in rows]
+            [
+                *source_params,
+                start_date,
+                end_date,
+                language,
+                language,
+                include_all_languages,
+                limit,
+            ],
+            method="top_owners",
+            path="scan" if scans is not None else "raw",
+        )
+
+    def _top_owners_rollup(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        start_date: date,
+        end_date: date,
+        include_all_languages: bool,
+        limit: int,
+    ) -> pa.Table:
+        relation, relation_params = self._presence_relation("repository", start_date, end_date)
+        sql = (
+            "SELECT owner, COUNT(DISTINCT full_name) AS repos_present, "
+            "MIN(CASE WHEN ? THEN best_rank_any ELSE best_rank_non_null END) AS best_rank "
+            f"FROM {relation} "
+            "WHERE (? OR days_non_null > 0) "
+            "GROUP BY owner "
+            "ORDER BY repos_present DESC, best_rank ASC, owner ASC "
+            "LIMIT ?"
+        )
+        return self._execute(
+            con,
+            sql,
+            [
+                include_all_languages,
+                *relation_params,
+                include_all_languages,
+                limit,
+            ],
+            method="top_owners",
+            path="rollup",
+        )
 
     def top_languages(
         self,
@@ -358,57 +1210,158 @@ class DuckDBQueryService:
         kind: str | None,
         include_all_languages: bool,
         limit: int,
+        scans: dict[str, pa.Table] | None = None,
     ) -> list[dict[str, Any]]:
+        return table_to_records(
+            self.top_languages_table(
+                start,
+                end,
+                kind=kind,
+                include_all_languages=include_all_languages,
+                limit=limit,
+                scans=scans,
+            )
+        )
+
+    def top_languages_table(
+        self,
+        start: str,
+        end: str,
+        *,
+        kind: str | None,
+        include_all_languages: bool,
+        limit: int,
+        scans: dict[str, pa.Table] | None = None,
+    ) -> pa.Table:
         start_date = self._parse_date(start)
         end_date = self._parse_date(end)
         if start_date > end_date:
             raise InvalidRequestError("Start date must be <= end date")
 
         con = self._connect()
+        kinds = [kind] if kind else ["repository", "developer"]
         if kind:
             self._validate_kind(kind)
-            parquet_glob = self._parquet_glob(kind)
+        plan = self._plan(
+            "top_languages",
+            kinds,
+            start_date,
+            end_date,
+            scans=scans,
+            **_plan_options("top_languages", language=None),
+        )
+        return self._run_plan(
+            plan,
+            {
+                "rollup": lambda: self._top_languages_rollup(
+                    con, kinds, start_date, end_date, include_all_languages, limit
+                ),
+                "scan": lambda: self._top_languages_raw(
+                    con, kind, start_date, end_date, include_all_languages, limit, scans
+                ),
+                "raw": lambda: self._top_languages_raw(
+                    con, kind, start_date, end_date, include_all_languages, limit, None
+                ),
+            },
+        )
+
+    def _top_languages_raw(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        kind: str | None,
+        start_date: date,
+        end_date: date,
+        include_all_languages: bool,
+        limit: int,
+        scans: dict[str, pa.Table] | None,
+    ) -> pa.Table:
+        if kind:
+            source, source_params = self._source(con, kind, scans)
             sql = (
                 "SELECT language, COUNT(*) AS entries "
-                "FROM read_parquet(?) "
+                f"FROM {source} "
                 "WHERE date BETWEEN ? AND ? "
                 "AND (? OR language IS NOT NULL) "
                 "GROUP BY language "
                 "ORDER BY entries DESC, language ASC "
                 "LIMIT ?"
             )
-            rows = con.execute(
-                sql, [parquet_glob, start_date, end_date, include_all_languages, limit]
-            ).fetchall()
-        else:
-            repo_glob = self._parquet_glob("repository")
-            dev_glob = self._parquet_glob("developer")
-            sql = (
-                "SELECT language, COUNT(*) AS entries FROM ("
-                "  SELECT language FROM read_parquet(?) WHERE date BETWEEN ? AND ? "
-                "  UNION ALL "
-                "  SELECT language FROM read_parquet(?) WHERE date BETWEEN ? AND ? "
-                ") "
-                "WHERE (? OR language IS NOT NULL) "
-                "GROUP BY language "
-                "ORDER BY entries DESC, language ASC "
-                "LIMIT ?"
-            )
-            rows = con.execute(
+            return self._execute(
+                con,
                 sql,
-                [
-                    repo_glob,
-                    start_date,
-                    end_date,
-                    dev_glob,
-                    start_date,
-                    end_date,
-                    include_all_languages,
-                    limit,
-                ],
-            ).fetchall()
+                [*source_params, start_date, end_date, include_all_languages, limit],
+                method="top_languages",
+                path="scan" if scans is not None else "raw",
+            )
+
+        repo_source, repo_params = self._source(con, "repository", scans)
+        dev_source, dev_params = self._source(con, "developer", scans)
+        sql = (
+            "SELECT language, COUNT(*) AS entries FROM ("
+            f"  SELECT language FROM {repo_source} WHERE date BETWEEN ? AND ? "
+            "  UNION ALL "
+            f"  SELECT language FROM {dev_source} WHERE date BETWEEN ? AND ? "
+            ") "
+            "WHERE (? OR language IS NOT NULL) "
+            "GROUP BY language "
+            "ORDER BY entries DESC, language ASC "
+            "LIMIT ?"
+        )
+        return self._execute(
+            con,
+            sql,
+            [
+                *repo_params,
+                start_date,
+                end_date,
+                *dev_params,
+                start_date,
+                end_date,
+                include_all_languages,
+                limit,
+            ],
+            method="top_languages",
+            path="scan" if scans is not None else "raw",
+        )
 
-        return [{"language": row[0], "entries": row[1]} for row in rows]
+    def _top_languages_rollup(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        kinds: list[str],
+        start_date: date,
+        end_date: date,
+        include_all_languages: bool,
+        limit: int,
+    ) -> pa.Table:
+        columns = dict.fromkeys(GRAIN_COLUMNS, "language, entries")
+        relations = []
+        params: list[Any] = []
+        for kind in kinds:
+            relation, relation_params = self._rollup_relation(
+                kind,
+                start_date,
+                end_date,
+                measure="languages",
+                columns=columns,
+                tail=LANGUAGES_TAIL,
+            )
+            relations.append(f"SELECT language, entries FROM {relation}")
+            params.extend(relation_params)
+        sql = (
+            "SELECT language, CAST(SUM(entries) AS BIGINT) AS entries "
+            f"FROM ({' UNION ALL '.join(relations)}) "
+            "WHERE (? OR language IS NOT NULL) "
+            "GROUP BY language "
+            "ORDER BY entries DESC, language ASC "
+            "LIMIT ?"
+        )
+        return self._execute(
+            con,
+            sql,
+            [*params, include_all_languages, limit],
+            method="top_languages",
+            path="rollup",
+        )
 
     def top_newcomers(
         self,
@@ -420,6 +1373,27 @@ class DuckDBQueryService:
         include_all_languages: bool,
         limit: int,
     ) -> list[dict[str, Any]]:
+        return table_to_records(
+            self.top_newcomers_table(
+                kind,
+                start,
+                end,
+                language=language,
+                include_all_languages=include_all_languages,
+                limit=limit,
+            )
+        )
+
+    def top_newcomers_table(
+        self,
+        kind: str,
+        start: str,
+        end: str,
+        *,
+        language: str | None,
+        include_all_languages: bool,
+        limit: int,
+    ) -> pa.Table:
         self._validate_kind(kind)
         language = self._normalize_language_param(language)
         start_date = self._parse_date(start)
@@ -428,63 +1402,26 @@ class DuckDBQueryService:
             raise InvalidRequestError("Start date must be <= end date")
         self._validate_language(kind, language)
 
-        parquet_glob = self._parquet_glob(kind)
-        con = self._connect()
-        if kind == "repository":
-            sql = (
-                "WITH first_seen AS ("
-                "  SELECT full_name, owner, MIN(date) AS first_seen, MIN(rank) AS best_rank "
-                "  FROM read_parquet(?) "
-                "  WHERE (? IS NULL OR language = ?) "
-                "    AND (? OR language IS NOT NULL) "
-                "  GROUP BY full_name, owner"
-                ") "
-                "SELECT full_name, owner, first_seen, best_rank "
-                "FROM first_seen "
-                "WHERE first_seen BETWEEN ? AND ? "
-                "ORDER BY first_seen DESC, best_rank ASC, full_name ASC "
-                "LIMIT ?"
-            )
-            rows = con.execute(
-                sql,
-                [
-                    parquet_glob,
-                    language,
-                    language,
-                    include_all_languages,
-                    start_date,
-                    end_date,
-                    limit,
-                ],
-            ).fetchall()
-            return [
-                {
-                    "full_name": row[0],
-                    "owner": row[1],
-                    "first_seen": row[2].isoformat() if row[2] else None,
-                    "best_rank": row[3],
-                }
-                for row in rows
-            ]
-
+        key, group = ENTITY_COLUMNS[kind]
         sql = (
             "WITH first_seen AS ("
-            "  SELECT username, MIN(date) AS first_seen, MIN(rank) AS best_rank "
+            f"  SELECT {group}, MIN(date) AS first_seen, MIN(rank) AS best_rank "
             "  FROM read_parquet(?) "
             "  WHERE (? IS NULL OR language = ?) "
             "    AND (? OR language IS NOT NULL) "
-            "  GROUP BY username"
+            f"  GROUP BY {group}"
             ") "
-            "SELECT username, first_seen, best_rank "
+            f"SELECT {group}, first_seen, best_rank "
             "FROM first_seen "
             "WHERE first_seen BETWEEN ? AND ? "
-            "ORDER BY first_seen DESC, best_rank ASC, username ASC "
+            f"ORDER BY first_seen DESC, best_rank ASC, {key} ASC "
             "LIMIT ?"
         )
-        rows = con.execute(
+        return self._execute(
+            self._connect(),
             sql,
             [
-                parquet_glob,
+                self._parquet_glob(kind),
                 language,
                 language,
                 include_all_languages,
@@ -492,15 +1429,8 @@ class DuckDBQueryService:
                 end_date,
                 limit,
             ],
-        ).fetchall()
-        return [
-            {
-                "username": row[0],
-                "first_seen": row[1].isoformat() if row[1] else None,
-                "best_rank": row[2],
-            }
-            for row in rows
-        ]
+            method="top_newcomers",
+        )
 
     def top_streaks(
         self,
@@ -511,7 +1441,31 @@ class DuckDBQueryService:
         language: str | None,
         include_all_languages: bool,
         limit: int,
+        scans: dict[str, pa.Table] | None = None,
     ) -> list[dict[str, Any]]:
+        return table_to_records(
+            self.top_streaks_table(
+                kind,
+                start,
+                end,
+                language=language,
+                include_all_languages=include_all_languages,
+                limit=limit,
+                scans=scans,
+            )
+        )
+
+    def top_streaks_table(
+        self,
+        kind: str,
+        start: str,
+        end: str,
+        *,
+        language: str | None,
+        include_all_languages: bool,
+        limit: int,
+        scans: dict[str, pa.Table] | None = None,
+    ) -> pa.Table:
         self._validate_kind(kind)
         language = self._normalize_language_param(language)
         start_date = self._parse_date(start)
@@ -521,117 +1475,73 @@ class DuckDBQueryService:
         self._validate_language(kind, language)
 
         con = self._connect()
-        if (
-            self._config.use_rollups
-            and language is None
-            and (self._config.analytics_root / "rollups").exists()
-        ):
-            try:
-                return self._top_streaks_rollup(
-                    con,
-                    kind,
-                    start_date,
-                    end_date,
-                    include_all_languages,
-                    limit,
-                )
-            except Exception:
-                pass
-
-        parquet_glob = self._parquet_glob(kind)
-        if kind == "repository":
-            sql = (
-                "WITH base AS ("
-                "  SELECT date, full_name, owner, MIN(rank) AS best_rank "
-                "  FROM read_parquet(?) "
-                "  WHERE date BETWEEN ? AND ? "
-                "    AND (? IS NULL OR language = ?) "
-                "    AND (? OR language IS NOT NULL)"
-                "  GROUP BY date, full_name, owner"
-                "), ordered AS ("
-                "  SELECT *, "
-                "    DATEDIFF('day', LAG(date) OVER (PARTITION BY full_name ORDER BY date), date) AS gap "
-                "  FROM base"
-                "), groups AS ("
-                "  SELECT *, "
-                "    SUM(CASE WHEN gap IS NULL OR gap != 1 THEN 1 ELSE 0 END) "
-                "      OVER (PARTITION BY full_name ORDER BY date) AS grp "
-                "  FROM ordered"
-                "), streaks AS ("
-                "  SELECT full_name, owner, MIN(date) AS streak_start, MAX(date) AS streak_end, "
-                "    COUNT(*) AS streak_len, MIN(best_rank) AS best_rank "
-                "  FROM groups "
-                "  GROUP BY full_name, owner, grp"
-                "), longest AS ("
-                "  SELECT *, "
-                "    ROW_NUMBER() OVER (PARTITION BY full_name ORDER BY streak_len DESC, streak_end DESC) AS rn "
-                "  FROM streaks"
-                ") "
-                "SELECT full_name, owner, streak_start, streak_end, streak_len, best_rank "
-                "FROM longest WHERE rn = 1 "
-                "ORDER BY streak_len DESC, best_rank ASC, full_name ASC "
-                "LIMIT ?"
-            )
-            rows = con.execute(
-                sql,
-                [
-                    parquet_glob,
-                    start_date,
-                    end_date,
-                    language,
-                    language,
-                    include_all_languages,
-                    limit,
-                ],
-            ).fetchall()
-            return [
-                {
-                    "full_name": row[0],
-                    "owner": row[1],
-                    "streak_start": row[2].isoformat(),
-                    "streak_end": row[3].isoformat(),
-                    "streak_len": row[4],
-                    "best_rank": row[5],
-                }
-                for row in rows
-            ]
+        raw = partial(
+            self._top_streaks_raw,
+            con,
+            kind,
+            start_date,
+            end_date,
+            language=language,
+            include_all_languages=include_all_languages,
+            limit=limit,
+        )
+        plan = self._plan(
+            "top_streaks",
+            [kind],
+            start_date,
+            end_date,
+            scans=scans,
+            **_plan_options("top_streaks", language=language),
+        )
+        return self._run_plan(
+            plan,
+            {
+                "matrix": lambda: self._run_in_memory(
+                    partial(
+                        self._matrices[kind].top_streaks,
+                        start_date,
+                        end_date,
+                        include_all_languages=include_all_languages,
+                        limit=limit,
+                    ),
+                    method="top_streaks",
+                    path="matrix",
+                ),
+                "rollup": lambda: self._top_streaks_rollup(
+                    con, kind, start_date, end_date, include_all_languages, limit
+                ),
+                "scan": partial(raw, scans=scans),
+                "raw": partial(raw, scans=None),
+            },
+        )
 
-        sql = (
-            "WITH base AS ("
-            "  SELECT date, username, MIN(rank) AS best_rank "
-            "  FROM read_parquet(?) "
+    def _top_streaks_raw(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        kind: str,
+        start_date: date,
+        end_date: date,
+        *,
+        language: str | None,
+        include_all_languages: bool,
+        limit: int,
+        scans: dict[str, pa.Table] | None,
+    ) -> pa.Table:
+        _, group = ENTITY_COLUMNS[kind]
+        source, source_params = self._source(con, kind, scans)
+        base = (
+            f"  SELECT date, {group}, MIN(rank) AS best_rank "
+            f"  FROM {source} "
             "  WHERE date BETWEEN ? AND ? "
             "    AND (? IS NULL OR language = ?) "
             "    AND (? OR language IS NOT NULL)"
-            "  GROUP BY date, username"
-            "), ordered AS ("
-            "  SELECT *, "
-            "    DATEDIFF('day', LAG(date) OVER (PARTITION BY username ORDER BY date), date) AS gap "
-            "  FROM base"
-            "), groups AS ("
-            "  SELECT *, "
-            "    SUM(CASE WHEN gap IS NULL OR gap != 1 THEN 1 ELSE 0 END) "
-            "      OVER (PARTITION BY username ORDER BY date) AS grp "
-            "  FROM ordered"
-            "), streaks AS ("
-            "  SELECT username, MIN(date) AS streak_start, MAX(date) AS streak_end, "
-            "    COUNT(*) AS streak_len, MIN(best_rank) AS best_rank "
-            "  FROM groups "
-            "  GROUP BY username, grp"
-            "), longest AS ("
-            "  SELECT *, "
-            "    ROW_NUMBER() OVER (PARTITION BY username ORDER BY streak_len DESC, streak_end DESC) AS rn "
-            "  FROM streaks"
-            ") "
-            "SELECT username, streak_start, streak_end, streak_len, best_rank "
-            "FROM longest WHERE rn = 1 "
-            "ORDER BY streak_len DESC, best_rank ASC, username ASC "
-            "LIMIT ?"
+            f"  GROUP BY date, {group}"
         )
-        rows = con.execute(
-            sql,
+        return self._execute(
+            con,
+            _streaks_sql(kind, base),
             [
-                parquet_glob,
+                *source_params,
                 start_date,
                 end_date,
                 language,
@@ -639,17 +1549,9 @@ class DuckDBQueryService:
                 include_all_languages,
                 limit,
             ],
-        ).fetchall()
-        return [
-            {
-                "username": row[0],
-                "streak_start": row[1].isoformat(),
-                "streak_end": row[2].isoformat(),
-                "streak_len": row[3],
-                "best_rank": row[4],
-            }
-            for row in rows
-        ]
+            method="top_streaks",
+            path="scan" if scans is not None else "raw",
+        )
 
     def _top_streaks_rollup(
         self,
@@ -659,112 +1561,91 @@ class DuckDBQueryService:
         end_date: date,
         include_all_languages: bool,
         limit: int,
-    ) -> list[dict[str, Any]]:
-        rollup_glob = self._rollup_glob(kind)
-        if kind == "repository":
-            sql = (
-                "WITH base AS ("
-                "  SELECT date, full_name, owner, "
-                "    CASE WHEN ? THEN best_rank_any ELSE best_rank_non_null END AS best_rank "
-                "  FROM read_parquet(?) "
-                "  WHERE date BETWEEN ? AND ? "
-                "    AND (? OR non_null_languages > 0)"
-                "), ordered AS ("
-                "  SELECT *, "
-                "    DATEDIFF('day', LAG(date) OVER (PARTITION BY full_name ORDER BY date), date) AS gap "
-                "  FROM base"
-                "), groups AS ("
-                "  SELECT *, "
-                "    SUM(CASE WHEN gap IS NULL OR gap != 1 THEN 1 ELSE 0 END) "
-                "      OVER (PARTITION BY full_name ORDER BY date) AS grp "
-                "  FROM ordered"
-                "), streaks AS ("
-                "  SELECT full_name, owner, MIN(date) AS streak_start, MAX(date) AS streak_end, "
-                "    COUNT(*) AS streak_len, MIN(best_rank) AS best_rank "
-                "  FROM groups "
-                "  GROUP BY full_name, owner, grp"
-                "), longest AS ("
-                "  SELECT *, "
-                "    ROW_NUMBER() OVER (PARTITION BY full_name ORDER BY streak_len DESC, streak_end DESC) AS rn "
-                "  FROM streaks"
-                ") "
-                "SELECT full_name, owner, streak_start, streak_end, streak_len, best_rank "
-                "FROM longest WHERE rn = 1 "
-                "ORDER BY streak_len DESC, best_rank ASC, full_name ASC "
-                "LIMIT ?"
-            )
-            rows = con.execute(
-                sql,
-                [
-                    include_all_languages,
-                    rollup_glob,
-                    start_date,
-                    end_date,
-                    include_all_languages,
-                    limit,
-                ],
-            ).fetchall()
-            return [
-                {
-                    "full_name": row[0],
-                    "owner": row[1],
-                    "streak_start": row[2].isoformat(),
-                    "streak_end": row[3].isoformat(),
-                    "streak_len": row[4],
-                    "best_rank": row[5],
-                }
-                for row in rows
-            ]
-
-        sql = (
-            "WITH base AS ("
-            "  SELECT date, username, "
+    ) -> pa.Table:
+        _, group = ENTITY_COLUMNS[kind]
+        rolled_end, tail_start = self._rollup_split(kind, start_date, end_date)
+        base = (
+            f"  SELECT date, {group}, "
             "    CASE WHEN ? THEN best_rank_any ELSE best_rank_non_null END AS best_rank "
             "  FROM read_parquet(?) "
             "  WHERE date BETWEEN ? AND ? "
             "    AND (? OR non_null_languages > 0)"
-            "), ordered AS ("
-            "  SELECT *, "
-            "    DATEDIFF('day', LAG(date) OVER (PARTITION BY username ORDER BY date), date) AS gap "
-            "  FROM base"
-            "), groups AS ("
-            "  SELECT *, "
-            "    SUM(CASE WHEN gap IS NULL OR gap != 1 THEN 1 ELSE 0 END) "
-            "      OVER (PARTITION BY username ORDER BY date) AS grp "
-            "  FROM ordered"
-            "), streaks AS ("
-            "  SELECT username, MIN(date) AS streak_start, MAX(date) AS streak_end, "
-            "    COUNT(*) AS streak_len, MIN(best_rank) AS best_rank "
-            "  FROM groups "
-            "  GROUP BY username, grp"
-            "), longest AS ("
-            "  SELECT *, "
-            "    ROW_NUMBER() OVER (PARTITION BY username ORDER BY streak_len DESC, streak_end DESC) AS rn "
-            "  FROM streaks"
-            ") "
-            "SELECT username, streak_start, streak_end, streak_len, best_rank "
-            "FROM longest WHERE rn = 1 "
-            "ORDER BY streak_len DESC, best_rank ASC, username ASC "
-            "LIMIT ?"
         )
-        rows = con.execute(
-            sql,
-            [
-                include_all_languages,
-                rollup_glob,
-                start_date,
-                end_date,
-                include_all_languages,
-                limit,
-            ],
-        ).fetchall()
-        return [
-            {
-                "username": row[0],
-                "streak_start": row[1].isoformat(),
-                "streak_end": row[2].isoformat(),
-                "streak_len": row[3],
-                "best_rank": row[4],
-            }
-            for row in rows
+        params = [include_all_languages, self._rollup_glob(kind), start_date, rolled_end]
+        params.append(include_all_languages)
+        if tail_start is not None:
+            # Days after the rollup coverage come straight from Parquet.
+            base += (
+                f"  UNION ALL SELECT date, {group}, MIN(rank) AS best_rank "
+                "  FROM read_parquet(?) "
+                "  WHERE date BETWEEN ? AND ? "
+                "    AND (? OR language IS NOT NULL) "
+                f"  GROUP BY date, {group}"
+            )
+            params.extend([self._parquet_glob(kind), tail_start, end_date, include_all_languages])
+        return self._execute(
+            con,
+            _streaks_sql(kind, base),
+            [*params, limit],
+            method="top_streaks",
+            path="rollup",
+        )
+
+
+def _search_results(matches: list[NameMatch]) -> pa.Table:
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [
+            ("type", pa.string()),
+            ("name", pa.string()),
+            ("match", pa.string()),
+            ("appearances", pa.int64()),
+            ("days_present", pa.int64()),
+            ("first_seen", pa.date32()),
+            ("last_seen", pa.date32()),
+            ("best_rank", pa.int32()),
         ]
+    )
+    columns = {
+        "type": [match.entity for match in matches],
+        "name": [match.name for match in matches],
+        "match": [match.match for match in matches],
+        "appearances": [match.appearances for match in matches],
+        "days_present": [match.days_present for match in matches],
+        "first_seen": [match.first_seen for match in matches],
+        "last_seen": [match.last_seen for match in matches],
+        "best_rank": [match.best_rank for match in matches],
+    }
+    return pa.table(columns, schema=schema)
+
+
+def _streaks_sql(kind: str, base: str) -> str:
+    """Longest consecutive-day streak per entity over a ``(date, entity, best_rank)`` base."""
+    key, group = ENTITY_COLUMNS[kind]
+    return (
+        f"WITH base AS ({base}"
+        "), ordered AS ("
+        "  SELECT *, "
+        f"    DATEDIFF('day', LAG(date) OVER (PARTITION BY {key} ORDER BY date), date) AS gap "
+        "  FROM base"
+        "), groups AS ("
+        "  SELECT *, "
+        "    SUM(CASE WHEN gap IS NULL OR gap != 1 THEN 1 ELSE 0 END) "
+        f"      OVER (PARTITION BY {key} ORDER BY date) AS grp "
+        "  FROM ordered"
+        "), streaks AS ("
+        f"  SELECT {group}, MIN(date) AS streak_start, MAX(date) AS streak_end, "
+        "    COUNT(*) AS streak_len, MIN(best_rank) AS best_rank "
+        "  FROM groups "
+        f"  GROUP BY {group}, grp"
+        "), longest AS ("
+        "  SELECT *, "
+        f"    ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY streak_len DESC, streak_end DESC) AS rn "
+        "  FROM streaks"
+        ") "
+        f"SELECT {group}, streak_start, streak_end, streak_len, best_rank "
+        "FROM longest WHERE rn = 1 "
+        f"ORDER BY streak_len DESC, best_rank ASC, {key} ASC "
+        "LIMIT ?"
+    )
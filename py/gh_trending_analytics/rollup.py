@@ -7,15 +7,23 @@ import pyarrow as pa
 import pyarrow.compute as pc
 import pyarrow.parquet as pq
 
+from .manifest import Manifest
+from .periods import GRAIN_COLUMNS, week_start
+from .tables import fetch_table
 from .utils import ValidationError, ensure_dir, parse_date
 
+PERIOD_GRAINS = ("week", "month")
+ROLLUP_PREFIXES = {"repository": "repo", "developer": "dev"}
+# Entity columns carried into the period presence rollups.
+ROLLUP_ENTITY_COLUMNS = {"repository": "full_name, owner", "developer": "username"}
 
-def _rollup_table_name(kind: str) -> str:
-    if kind == "repository":
-        return "repo_day_presence"
-    if kind == "developer":
-        return "dev_day_presence"
-    raise ValidationError(f"Unsupported kind: {kind}")
+
+def rollup_table_name(kind: str, grain: str = "day", measure: str = "presence") -> str:
+    """File stem of a rollup, e.g. ``repo_day_presence`` or ``dev_month_languages``."""
+    prefix = ROLLUP_PREFIXES.get(kind)
+    if prefix is None:
+        raise ValidationError(f"Unsupported kind: {kind}")
+    return f"{prefix}_{grain}_{measure}"
 
 
 def _parquet_glob(analytics_root: Path, kind: str) -> str:
@@ -45,34 +53,122 @@ def _compute_rollup(con: duckdb.DuckDBPyConnection, kind: str, parquet_glob: str
             "GROUP BY date, username"
         )
     try:
-        return con.execute(sql, [parquet_glob]).fetch_arrow_table()
+        return fetch_table(con.execute(sql, [parquet_glob]))
     except Exception as exc:  # pragma: no cover - surfaces in tests
         raise ValidationError(f"Rollup query failed: {exc}") from exc
 
 
+def _compute_period_presence(
+    con: duckdb.DuckDBPyConnection, kind: str, grain: str, day_presence: pa.Table
+) -> pa.Table:
+    """Fold day presence rows into one row per entity per ISO week or calendar month."""
+    columns = ROLLUP_ENTITY_COLUMNS[kind]
+    con.register("day_presence", day_presence)
+    try:
+        sql = (
+            f"SELECT CAST(date_trunc('{grain}', date) AS DATE) AS period_start, {columns}, "
+            "COUNT(*) AS days_any, "
+            "COUNT(*) FILTER (WHERE non_null_languages > 0) AS days_non_null, "
+            "MIN(best_rank_any) AS best_rank_any, "
+            "MIN(best_rank_non_null) AS best_rank_non_null "
+            "FROM day_presence "
+            f"GROUP BY period_start, {columns}"
+        )
+        return fetch_table(con.execute(sql))
+    finally:
+        con.unregister("day_presence")
+
+
+def _compute_languages(con: duckdb.DuckDBPyConnection, grain: str, parquet_glob: str) -> pa.Table:
+    """Ranked-list entries per language per day, ISO week or calendar month."""
+    column = GRAIN_COLUMNS[grain]
+    period = "date" if grain == "day" else f"CAST(date_trunc('{grain}', date) AS DATE)"
+    sql = (
+        f"SELECT {period} AS {column}, language, COUNT(*) AS entries "
+        "FROM read_parquet(?) "
+        f"GROUP BY {column}, language"
+    )
+    try:
+        return fetch_table(con.execute(sql, [parquet_glob]))
+    except Exception as exc:  # pragma: no cover - surfaces in tests
+        raise ValidationError(f"Rollup query failed: {exc}") from exc
+
+
+def _write_partitions(
+    analytics_root: Path,
+    kind: str,
+    table_name: str,
+    table: pa.Table,
+    column: str,
+    threshold_year: int | None,
+) -> None:
+    years = pc.year(table[column])
+    for year in sorted({int(value) for value in years.to_pylist()}):
+        if threshold_year is not None and year < threshold_year:
+            continue
+        year_table = table.filter(pc.equal(years, year))
+        output_path = analytics_root / "rollups" / kind / f"year={year}" / f"{table_name}.parquet"
+        ensure_dir(output_path.parent)
+        pq.write_table(year_table, output_path)
+
+
+def _record_coverage(
+    analytics_root: Path, kind: str, table: pa.Table, threshold_year: int | None
+) -> None:
+    """Record the first and last day each rewritten year partition was built from."""
+    years = pc.year(table["date"])
+    coverage = {}
+    for year in sorted({int(value) for value in years.to_pylist()}):
+        if threshold_year is not None and year < threshold_year:
+            continue
+        bounds = pc.min_max(table["date"].filter(pc.equal(years, year)))
+        coverage[str(year)] = [bounds["min"].as_py().isoformat(), bounds["max"].as_py().isoformat()]
+    manifest_path = analytics_root / "parquet" / "manifest.json"
+    manifest = Manifest.load(manifest_path)
+    manifest.ensure_kind(kind).rollup_coverage.update(coverage)
+    manifest.save(manifest_path)
+
+
 def rollup_kind(*, analytics_root: Path, kind: str, from_date: str | None) -> None:
+    """Write day presence plus week/month presence and day/week/month language rollups.
+
+    Week and month rows are partitioned by the year of their first day, so a rebuild
+    from ``from_date`` also rewrites the previous year when its last week spills over.
+    The dates each rewritten year covers are then recorded in the manifest.
+    """
     analytics_root = analytics_root.resolve()
     parquet_glob = _parquet_glob(analytics_root, kind)
-    rollup_table = _rollup_table_name(kind)
+    rollup_table = rollup_table_name(kind)
 
     threshold_year = None
+    period_threshold_year = None
     if from_date:
         parsed = parse_date(from_date)
         threshold_year = parsed.year
+        period_threshold_year = week_start(parsed.replace(month=1, day=1)).year
 
     con = duckdb.connect()
     table = _compute_rollup(con, kind, parquet_glob)
     if table.num_rows == 0:
         raise ValidationError("No rows available to roll up")
 
-    year_values = pc.year(table["date"]).to_pylist()
-    unique_years = sorted({int(value) for value in year_values})
-
-    for year in unique_years:
-        if threshold_year is not None and year < threshold_year:
-            continue
-        mask = pc.equal(pc.year(table["date"]), year)
-        year_table = table.filter(mask)
-        output_path = analytics_root / "rollups" / kind / f"year={year}" / f"{rollup_table}.parquet"
-        ensure_dir(output_path.parent)
-        pq.write_table(year_table, output_path)
+    _write_partitions(analytics_root, kind, rollup_table, table, "date", threshold_year)
+    for grain in PERIOD_GRAINS:
+        _write_partitions(
+            analytics_root,
+            kind,
+            rollup_table_name(kind, grain),
+            _compute_period_presence(con, kind, grain, table),
+            "period_start",
+            period_threshold_year,
+        )
+    for grain in ("day", *PERIOD_GRAINS):
+        _write_partitions(
+            analytics_root,
+            kind,
+            rollup_table_name(kind, grain, "languages"),
+            _compute_languages(con, grain, parquet_glob),
+            GRAIN_COLUMNS[grain],
+            threshold_year if grain == "day" else period_threshold_year,
+        )
+    _record_coverage(analytics_root, kind, table, threshold_year)
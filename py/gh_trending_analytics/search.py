@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import threading
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .utils import ValidationError, ensure_dir
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+SEARCH_TABLE = "name_index"
+MIN_QUERY_LENGTH = 2
+TRIGRAM_LENGTH = 3
+
+KIND_ENTITIES = {
+    "repository": ("repository", "owner"),
+    "developer": ("developer",),
+}
+ENTITY_KINDS = {
+    "repository": "repository",
+    "owner": "repository",
+    "developer": "developer",
+}
+MATCH_EXACT = "exact"
+MATCH_PREFIX = "prefix"
+MATCH_SUBSTRING = "substring"
+MATCH_ORDER = {MATCH_EXACT: 0, MATCH_PREFIX: 1, MATCH_SUBSTRING: 2}
+
+
+def _name_index_schema() -> pa.Schema:
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("entity", pa.string()),
+            ("name", pa.string()),
+            ("appearances", pa.int64()),
+            ("days_present", pa.int64()),
+            ("first_seen", pa.date32()),
+            ("last_seen", pa.date32()),
+            ("best_rank", pa.int32()),
+        ]
+    )
+
+
+def _entity_columns(kind: str) -> list[tuple[str, str]]:
+    if kind == "repository":
+        return [("repository", "full_name"), ("owner", "owner")]
+    if kind == "developer":
+        return [("developer", "username")]
+    raise ValidationError(f"Unsupported kind: {kind}")
+
+
+def name_index_path(analytics_root: Path, kind: str, year: int) -> Path:
+    return analytics_root / "search" / kind / f"year={year}" / f"{SEARCH_TABLE}.parquet"
+
+
+def _summarize_names(table: pa.Table, kind: str) -> pa.Table:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    parts: list[pa.Table] = []
+    for entity, column in _entity_columns(kind):
+        source = table.select([column, "date", "rank"]).filter(pc.is_valid(table[column]))
+        grouped = source.group_by(column).aggregate(
+            [
+                ("rank", "count"),
+                ("date", "count_distinct"),
+                ("date", "min"),
+                ("date", "max"),
+                ("rank", "min"),
+            ]
+        )
+        parts.append(
+            pa.table(
+                {
+                    "entity": pa.array([entity] * grouped.num_rows, type=pa.string()),
+                    "name": grouped[column],
+                    "appearances": grouped["rank_count"].cast(pa.int64()),
+                    "days_present": grouped["date_count_distinct"].cast(pa.int64()),
+                    "first_seen": grouped["date_min"],
+                    "last_seen": grouped["date_max"],
+                    "best_rank": grouped["rank_min"].cast(pa.int32()),
+                },
+                schema=_name_index_schema(),
+            )
+        )
+    return pa.concat_tables(parts)
+
+
+def build_name_index(analytics_root: Path, kind: str, parquet_path: Path) -> Path | None:
+    """Write the distinct-name summary for one year partition.
+
+    Partitions whose summary is newer than the source Parquet are left untouched, so
+    repeated builds only pay for the years that actually changed.
+    """
+    year_dir = parquet_path.parent.name
+    if not year_dir.startswith("year="):
+        raise ValidationError(f"Unexpected partition path: {parquet_path}")
+    output_path = name_index_path(analytics_root, kind, int(year_dir.split("=", 1)[1]))
+    if (
+        output_path.exists()
+        and parquet_path.exists()
+        and output_path.stat().st_mtime >= parquet_path.stat().st_mtime
+    ):
+        return output_path
+    if not parquet_path.exists():
+        return None
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(parquet_path)
+    ensure_dir(output_path.parent)
+    pq.write_table(_summarize_names(table, kind), output_path)
+    return output_path
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    entity: str
+    name: str
+    match: str
+    appearances: int
+    days_present: int
+    first_seen: date
+    last_seen: date
+    best_rank: int
+
+
+def _trigrams(value: str) -> set[str]:
+    return {value[i : i + TRIGRAM_LENGTH] for i in range(len(value) - TRIGRAM_LENGTH + 1)}
+
+
+class NameSearchIndex:
+    """Trigram and prefix index over distinct repository, owner and developer names."""
+
+    def __init__(self, rows: list[dict]) -> None:
+        self._entities: list[str] = []
+        self._names: list[str] = []
+        self._folded: list[str] = []
+        self._appearances = array("q")
+        self._days_present = array("q")
+        self._first_seen: list[date] = []
+        self._last_seen: list[date] = []
+        self._best_rank = array("i")
+        self._postings: dict[str, array] = {}
+        for row in rows:
+            index = len(self._names)
+            folded = row["name"].lower()
+            self._entities.append(row["entity"])
+            self._names.append(row["name"])
+            self._folded.append(folded)
+            self._appearances.append(row["appearances"])
+            self._days_present.append(row["days_present"])
+            self._first_seen.append(row["first_seen"])
+            self._last_seen.append(row["last_seen"])
+            self._best_rank.append(row["best_rank"])
+            for gram in _trigrams(folded):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array("i")
+                postings.append(index)
+        self._sorted = sorted(range(len(self._folded)), key=self._folded.__getitem__)
+        self._sorted_keys = [self._folded[index] for index in self._sorted]
+
+    @classmethod
+    def load(cls, analytics_root: Path, kinds: list[str]) -> NameSearchIndex:
+        import pyarrow.parquet as pq
+
+        merged: dict[tuple[str, str], dict] = {}
+        for kind in kinds:
+            for path in sorted(
+                (analytics_root / "search" / kind).glob(f"year=*/{SEARCH_TABLE}.parquet")
+            ):
+                for row in pq.read_table(path, schema=_name_index_schema()).to_pylist():
+                    key = (row["entity"], row["name"])
+                    current = merged.get(key)
+                    if current is None:
+                        merged[key] = row
+                        continue
+                    current["appearances"] += row["appearances"]
+                    current["days_present"] += row["days_present"]
+                    current["first_seen"] = min(current["first_seen"], row["first_seen"])
+                    current["last_seen"] = max(current["last_seen"], row["last_seen"])
+                    current["best_rank"] = min(current["best_rank"], row["best_rank"])
+        return cls(list(merged.values()))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _prefix_candidates(self, folded_query: str) -> list[int]:
+        start = bisect_left(self._sorted_keys, folded_query)
+        matches: list[int] = []
+        for position in range(start, len(self._sorted_keys)):
+            if not self._sorted_keys[position].startswith(folded_query):
+                break
+            matches.append(self._sorted[position])
+        return matches
+
+    def _substring_candidates(self, folded_query: str) -> list[int]:
+        postings = []
+        for gram in _trigrams(folded_query):
+            current = self._postings.get(gram)
+            if current is None:
+                return []
+            postings.append(current)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for current in postings[1:]:
+            candidates.intersection_update(current)
+            if not candidates:
+                return []
+        return [index for index in candidates if folded_query in self._folded[index]]
+
+    def search(self, query: str, *, entities: set[str] | None = None) -> list[NameMatch]:
+        """Return every name matching ``query``, best match first.
+
+        Queries shorter than a trigram are answered from the sorted prefix index;
+        longer ones intersect trigram postings and verify the substring.
+        """
+        folded_query = query.strip().lower()
+        if len(folded_query) < MIN_QUERY_LENGTH:
+            raise ValidationError(f"Search query must be at least {MIN_QUERY_LENGTH} characters")
+        if len(folded_query) < TRIGRAM_LENGTH:
+            candidates = self._prefix_candidates(folded_query)
+        else:
+            candidates = self._substring_candidates(folded_query)
+
+        matches: list[NameMatch] = []
+        for index in candidates:
+            if entities is not None and self._entities[index] not in entities:
+                continue
+            folded = self._folded[index]
+            if folded == folded_query:
+                match = MATCH_EXACT
+            elif folded.startswith(folded_query):
+                match = MATCH_PREFIX
+            else:
+                match = MATCH_SUBSTRING
+            matches.append(
+                NameMatch(
+                    entity=self._entities[index],
+                    name=self._names[index],
+                    match=match,
+                    appearances=self._appearances[index],
+                    days_present=self._days_present[index],
+                    first_seen=self._first_seen[index],
+                    last_seen=self._last_seen[index],
+                    best_rank=self._best_rank[index],
+                )
+            )
+        matches.sort(key=lambda item: (MATCH_ORDER[item.match], -item.appearances, item.name))
+        return matches
+
+
+class NameSearchIndexLoader:
+    """Lazily loads and memoizes the name index for a given analytics root."""
+
+    def __init__(self, analytics_root: Path) -> None:
+        self._analytics_root = analytics_root
+        self._lock = threading.Lock()
+        self._index: NameSearchIndex | None = None
+
+    def get(self) -> NameSearchIndex:
+        if self._index is not None:
+            return self._index
+        with self._lock:
+            if self._index is None:
+                self._index = NameSearchIndex.load(self._analytics_root, sorted(KIND_ENTITIES))
+        return self._index
+
+    def reset(self) -> None:
+        with self._lock:
+            self._index = None
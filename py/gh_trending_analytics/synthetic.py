@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import json
+import random
+from bisect import bisect_left
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+from .utils import ensure_dir
+
+KINDS = ("repository", "developer")
+LANGUAGE_NAMES = (
+    "python",
+    "javascript",
+    "typescript",
+    "go",
+    "rust",
+    "java",
+    "c++",
+    "c",
+    "c#",
+    "php",
+    "ruby",
+    "swift",
+    "kotlin",
+    "dart",
+    "shell",
+    "html",
+    "css",
+    "vue",
+    "svelte",
+    "scala",
+    "lua",
+    "zig",
+    "elixir",
+    "haskell",
+    "julia",
+    "r",
+    "jupyter-notebook",
+    "objective-c",
+    "webassembly",
+    "dockerfile",
+)
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """Shape of a generated trending archive.
+
+    Popularity within each list is Zipfian over the entity pool, ``carryover`` is the
+    chance an entry on yesterday's list trends again today (which produces streaks),
+    and ``language_churn`` is the daily chance an active language list disappears.
+    Language lists vary between ``min_list_length`` and ``list_length`` entries; the
+    all-languages list is always full.
+    """
+
+    start: date = date(2025, 1, 1)
+    days: int = 90
+    languages: int = 30
+    repositories: int = 20_000
+    owners: int = 8_000
+    developers: int = 5_000
+    list_length: int = 25
+    min_list_length: int = 0
+    zipf_exponent: float = 1.1
+    carryover: float = 0.6
+    language_churn: float = 0.02
+    seed: int = 0
+
+    def scaled(self, factor: float) -> SyntheticSpec:
+        """Scale the date span and entity pools by ``factor`` (e.g. ``10`` for 10x)."""
+        return replace(
+            self,
+            days=max(1, round(self.days * factor)),
+            repositories=max(self.list_length, round(self.repositories * factor)),
+            owners=max(1, round(self.owners * factor)),
+            developers=max(self.list_length, round(self.developers * factor)),
+        )
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=self.days - 1)
+
+
+# Roughly the production archive: 14 years of daily lists across ~30 languages.
+REAL_ARCHIVE_SPEC = SyntheticSpec(
+    start=date(2013, 1, 1),
+    days=14 * 365,
+    repositories=250_000,
+    owners=90_000,
+    developers=60_000,
+)
+
+
+@dataclass(frozen=True)
+class SyntheticSummary:
+    files: int
+    entries: int
+    start: date
+    end: date
+
+
+class _ZipfSampler:
+    def __init__(self, size: int, exponent: float) -> None:
+        self._cumulative = list(accumulate(1.0 / (rank + 1) ** exponent for rank in range(size)))
+        self._total = self._cumulative[-1]
+
+    def draw(self, rng: random.Random) -> int:
+        return bisect_left(self._cumulative, rng.random() * self._total)
+
+
+def _entity_names(kind: str, spec: SyntheticSpec, rng: random.Random) -> list[str]:
+    if kind == "developer":
+        return [f"dev{index}" for index in range(spec.developers)]
+    owner_sampler = _ZipfSampler(spec.owners, spec.zipf_exponent)
+    return [f"owner{owner_sampler.draw(rng)}/repo{index}" for index in range(spec.repositories)]
+
+
+def _file_name(language: str | None) -> str:
+    return "(null).json" if language is None else f"{language}.json"
+
+
+def _language_names(count: int) -> list[str]:
+    names = list(LANGUAGE_NAMES[:count])
+    names.extend(f"lang{index}" for index in range(len(names), count))
+    return names
+
+
+def _next_list(
+    previous: list[int],
+    length: int,
+    spec: SyntheticSpec,
+    sampler: _ZipfSampler,
+    offset: int,
+    pool: int,
+    rng: random.Random,
+) -> list[int]:
+    chosen = [entity for entity in previous if rng.random() < spec.carryover][:length]
+    seen = set(chosen)
+    attempts = 0
+    while len(chosen) < length and attempts < length * 20:
+        attempts += 1
+        entity = (sampler.draw(rng) + offset) % pool
+        if entity not in seen:
+            seen.add(entity)
+            chosen.append(entity)
+    # Rank by popularity with jitter so carried-over entries can move up or down.
+    return sorted(
+        chosen, key=lambda entity: ((entity - offset) % pool + 1) * rng.lognormvariate(0, 0.75)
+    )
+
+
+def write_archive(
+    archive_root: Path,
+    spec: SyntheticSpec,
+    *,
+    kinds: tuple[str, ...] = KINDS,
+) -> SyntheticSummary:
+    """Write a deterministic archive for ``spec`` in the scraper's on-disk layout."""
+    rng = random.Random(spec.seed)
+    languages = _language_names(spec.languages)
+    files = 0
+    entries = 0
+    for kind in kinds:
+        names = _entity_names(kind, spec, rng)
+        pool = len(names)
+        sampler = _ZipfSampler(pool, spec.zipf_exponent)
+        offsets: dict[str | None, int] = {None: 0}
+        for language in languages:
+            offsets[language] = rng.randrange(pool)
+        active = set(languages)
+        previous: dict[str | None, list[int]] = {}
+        for day_index in range(spec.days):
+            current = spec.start + timedelta(days=day_index)
+            day_dir = archive_root / kind / str(current.year) / current.isoformat()
+            ensure_dir(day_dir)
+            for language in languages:
+                if language in active and rng.random() < spec.language_churn:
+                    active.discard(language)
+                elif language not in active and rng.random() < 0.25:
+                    active.add(language)
+            for language in [None, *sorted(active)]:
+                if language is None or rng.random() < 0.5:
+                    length = spec.list_length
+                else:
+                    length = rng.randint(spec.min_list_length, spec.list_length)
+                ranked = _next_list(
+                    previous.get(language, []),
+                    length,
+                    spec,
+                    sampler,
+                    offsets[language],
+                    pool,
+                    rng,
+                )
+                previous[language] = ranked
+                payload = {
+                    "date": current.isoformat(),
+                    "language": language,
+                    "list": [names[entity] for entity in ranked],
+                }
+                (day_dir / _file_name(language)).write_text(json.dumps(payload))
+                files += 1
+                entries += len(ranked)
+            for language in set(previous) - active - {None}:
+                previous.pop(language)
+    return SyntheticSummary(files=files, entries=entries, start=spec.start, end=spec.end)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import io
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+TABLE_METADATA_KEY = b"gh_trending"
+
+
+def fetch_table(result: Any) -> pa.Table:
+    """Fetch a DuckDB result as an Arrow table across DuckDB releases."""
+    fetch = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+    return fetch()
+
+
+def stringify_dates(table: pa.Table) -> pa.Table:
+    """Cast date columns to ISO ``YYYY-MM-DD`` strings in one vectorized pass."""
+    import pyarrow as pa
+
+    for index, column in enumerate(table.schema):
+        if pa.types.is_date(column.type):
+            table = table.set_column(index, column.name, table.column(index).cast(pa.string()))
+    return table
+
+
+def table_to_records(table: pa.Table) -> list[dict[str, Any]]:
+    """Convert a result table to JSON-ready row dicts without per-row Python formatting."""
+    return stringify_dates(table).to_pylist()
+
+
+def fetch_batches(result: Any, rows_per_batch: int) -> pa.RecordBatchReader:
+    """Stream a DuckDB result as Arrow record batches of at most ``rows_per_batch`` rows."""
+    fetch = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+    return fetch(rows_per_batch)
+
+
+def ndjson_chunks(batches: Iterable[pa.RecordBatch]) -> Iterator[bytes]:
+    """Encode record batches as newline-delimited JSON, one chunk per batch."""
+    import pyarrow as pa
+
+    from .encoding import encode_json
+
+    for batch in batches:
+        records = table_to_records(pa.Table.from_batches([batch]))
+        if records:
+            yield b"".join(encode_json(record) + b"\n" for record in records)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._chunks)
+        self._chunks.clear()
+        return chunk
+
+
+def arrow_stream_chunks(reader: pa.RecordBatchReader) -> Iterator[bytes]:
+    """Encode a record batch reader as an Arrow IPC stream, one chunk per batch."""
+    import pyarrow as pa
+
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _with_metadata(table: pa.Table, metadata: dict[str, Any] | None) -> pa.Table:
+    if not metadata:
+        return table
+    from .encoding import encode_json
+
+    merged = dict(table.schema.metadata or {})
+    merged[TABLE_METADATA_KEY] = encode_json(metadata)
+    return table.replace_schema_metadata(merged)
+
+
+def encode_table(table: pa.Table, media_type: str, metadata: dict[str, Any] | None = None) -> bytes:
+    """Serialize a typed result table as an Arrow IPC stream or a Parquet file.
+
+    ``metadata`` (the JSON response envelope without its rows) rides along in the schema
+    metadata under ``gh_trending``.
+    """
+    import pyarrow as pa
+
+    from .encoding import ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE
+
+    table = _with_metadata(table, metadata)
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if media_type == PARQUET_MEDIA_TYPE:
+        import pyarrow.parquet as pq
+
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink)
+        return sink.getvalue().to_pybytes()
+    raise ValueError(f"Unsupported table media type: {media_type}")
+
+
+def parquet_chunks(reader: pa.RecordBatchReader) -> Iterator[bytes]:
+    """Encode a record batch reader as a Parquet file, one row group chunk per batch."""
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
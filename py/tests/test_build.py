@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pyarrow.parquet as pq
 from gh_trending_analytics.build import KIND_TABLES
+from gh_trending_analytics.manifest import Manifest, ManifestKind
 from helpers import build_fixture, load_manifest
 
 
@@ -37,3 +42,103 @@ def test_build_manifest_and_parquet(tmp_path: Path) -> None:
 
     assert pq.read_metadata(repo_path).num_rows == 11
     assert pq.read_metadata(dev_path).num_rows == 9
+
+
+def test_manifest_kind_indexes() -> None:
+    manifest_kind = ManifestKind(
+        min_date="2025-01-01",
+        max_date="2025-01-10",
+        dates=["2025-01-01", "2025-01-02", "2025-01-05", "2025-01-10"],
+        languages=[None, "python", "rust"],
+        languages_by_date={"2025-01-01": [None, "python"], "2025-01-02": [None, "python"]},
+        row_counts_by_year={},
+    )
+    assert manifest_kind.has_date("2025-01-05")
+    assert not manifest_kind.has_date("2025-01-04")
+    assert manifest_kind.neighbors("2025-01-02") == ("2025-01-01", "2025-01-05")
+    assert manifest_kind.neighbors("2025-01-01") == (None, "2025-01-02")
+    assert manifest_kind.neighbors("2025-01-10") == ("2025-01-05", None)
+    assert manifest_kind.clamp_range("2024-12-01", "2025-01-07") == ("2025-01-01", "2025-01-05")
+    assert manifest_kind.clamp_range("2025-01-06", "2025-01-09") is None
+    assert manifest_kind.has_language("python", day="2025-01-01")
+    assert not manifest_kind.has_language("rust", day="2025-01-01")
+    assert manifest_kind.has_language("rust")
+    assert manifest_kind.first_unrolled("2025-01-01", "2025-01-02") == "2025-01-01"
+    manifest_kind.rollup_coverage["2025"] = ["2025-01-01", "2025-01-02"]
+    assert manifest_kind.first_unrolled("2024-12-01", "2025-01-02") is None
+    assert manifest_kind.first_unrolled("2025-01-02", "2025-01-09") == "2025-01-05"
+
+
+def test_manifest_compact_roundtrip_and_lazy_sections(tmp_path: Path) -> None:
+    analytics_root = build_fixture(tmp_path)
+    manifest_path = analytics_root / "parquet" / "manifest.json"
+    # The compact layout is still one valid JSON document.
+    document = json.loads(manifest_path.read_bytes())
+    assert document["format"] == 3
+    assert document["sections"]["repository"]["max_date"] == "2025-01-02"
+    assert document["kinds"]["repository"]["spans"] == [["2025-01-01", 2]]
+
+    manifest = Manifest.load(manifest_path)
+    assert not manifest.kinds.is_loaded("repository")
+    version = manifest.version
+    assert not manifest.kinds.is_loaded("repository")
+
+    repo_manifest = manifest.kinds["repository"]
+    assert manifest.kinds.is_loaded("repository")
+    assert not manifest.kinds.is_loaded("developer")
+    assert repo_manifest.dates == ["2025-01-01", "2025-01-02"]
+    assert repo_manifest.languages_by_date["2025-01-02"] == ["c#", "python", None]
+    assert manifest.version == version
+
+
+def test_manifest_sections_decode_once_across_threads(tmp_path: Path) -> None:
+    manifest = Manifest.load(build_fixture(tmp_path) / "parquet" / "manifest.json")
+    kinds = manifest.kinds
+    loader, fingerprint = kinds._pending["repository"]
+    calls = []
+
+    def slow_loader() -> ManifestKind:
+        calls.append(1)
+        time.sleep(0.05)
+        return loader()
+
+    kinds.add_pending("repository", slow_loader, fingerprint)
+    barrier = threading.Barrier(8)
+
+    def read() -> list[str]:
+        barrier.wait()
+        assert "repository" in kinds
+        return kinds["repository"].dates
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: read(), range(8)))
+    assert results == [["2025-01-01", "2025-01-02"]] * 8
+    assert calls == [1]
+
+
+def test_manifest_loads_legacy_json(tmp_path: Path) -> None:
+    analytics_root = build_fixture(tmp_path)
+    manifest_path = analytics_root / "parquet" / "manifest.json"
+    compact = Manifest.load(manifest_path)
+    legacy_path = tmp_path / "legacy_manifest.json"
+    legacy_path.write_text(json.dumps(compact.to_dict(), indent=2, sort_keys=True))
+
+    legacy = Manifest.load(legacy_path)
+    assert legacy.to_dict() == compact.to_dict()
+    assert legacy.version == compact.version
+
+    # Reformatting a compact manifest (say with jq) drops the line layout, not the data.
+    reformatted_path = tmp_path / "reformatted_manifest.json"
+    reformatted_path.write_text(json.dumps(json.loads(manifest_path.read_bytes()), indent=2))
+    assert Manifest.load(reformatted_path).to_dict() == compact.to_dict()
+
+    # Line-sectioned manifests written before the layout was made valid JSON.
+    sections, body = {}, b""
+    for key in sorted(compact.kinds):
+        encoded = json.dumps(compact.kinds[key].to_compact()).encode()
+        sections[key] = {"offset": len(body), "length": len(encoded)}
+        body += encoded + b"\n"
+    header = {"format": 2, "generated_at": compact.generated_at, "sections": sections}
+    line_path = tmp_path / "line_manifest.json"
+    line_path.write_bytes(json.dumps(header).encode() + b"\n" + body)
+    assert Manifest.load(line_path).to_dict() == compact.to_dict()
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+import gzip
+import json
+import threading
 import time
 
-from gh_trending_analytics.cache import ResultCache
+import pytest
+from gh_trending_analytics.cache import CachedResponse, ResultCache
+from gh_trending_analytics.canonical import canonical_toplist
+from gh_trending_analytics.encoding import negotiate_encoding
+from gh_trending_analytics.manifest import Manifest
 from gh_trending_analytics.utils import CacheKey
 
 
@@ -18,3 +25,191 @@ def test_cache_key_collision() -> None:
     key_a = CacheKey("day", {"kind": "repository", "date": "2025-01-01"}).as_str()
     key_b = CacheKey("day", {"kind": "repository", "date": "2025-01-02"}).as_str()
     assert key_a != key_b
+
+
+def test_cached_response_compresses_once_above_threshold() -> None:
+    body = b'{"rank":1,"full_name":"alpha/one"},' * 100
+    cached = CachedResponse(body=body, media_type="application/json")
+    compressed = cached.variant("gzip")
+    assert compressed is not None
+    assert gzip.decompress(compressed) == body
+    assert cached.variant("gzip") is compressed
+
+    small = CachedResponse(body=b"{}", media_type="application/json")
+    assert small.variant("gzip") is None
+    assert small.variant(None) is None
+
+
+def test_encode_json_uses_orjson_with_stdlib_compatible_output(monkeypatch) -> None:
+    pytest.importorskip("orjson")
+    from gh_trending_analytics import encoding
+
+    assert encoding.orjson is not None
+    payload = {"name": "café/☕", "rank": 1, "score": 0.5, "language": None, "tags": [True]}
+    fast = encoding.encode_json(payload)
+    monkeypatch.setattr(encoding, "orjson", None)
+    assert encoding.encode_json(payload) == fast
+
+
+def test_negotiate_encoding() -> None:
+    available = ["zstd", "br", "gzip"]
+    assert negotiate_encoding(None, available) is None
+    assert negotiate_encoding("gzip, deflate", available) == "gzip"
+    assert negotiate_encoding("gzip;q=0.5, br", available) == "br"
+    assert negotiate_encoding("br;q=0, gzip;q=0", available) is None
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+
+
+def test_canonical_toplist_normalizes_equivalent_requests() -> None:
+    manifest = Manifest.empty()
+    manifest.update_kind(
+        "repository",
+        dates=["2025-01-01", "2025-01-02"],
+        languages=[None, "python"],
+        languages_by_date={},
+        row_counts_by_year={},
+    )
+    first = canonical_toplist(
+        manifest,
+        "top_streaks",
+        kind="repository",
+        start="2024-06-01",
+        end="2025-12-31",
+        limit=10,
+        language="__all__",
+    )
+    second = canonical_toplist(
+        manifest,
+        "top_streaks",
+        kind="repository",
+        start="2025-01-01",
+        end="2025-01-02",
+        limit=50,
+        language=None,
+    )
+    assert first.key() == second.key()
+    assert first.params["start"] == "2025-01-01"
+    assert first.params["end"] == "2025-01-02"
+    assert first.slice(list(range(20))) == list(range(10))
+
+
+def test_access_log_ranks_by_decayed_frequency(tmp_path) -> None:
+    from gh_trending_analytics.access_log import AccessLog
+
+    day = 24 * 3600.0
+    log = AccessLog(tmp_path / "log.json", half_life=day)
+    for _ in range(4):
+        log.record("old", {"op": "day"}, now=0.0)
+    log.record("recent", {"op": "streaks"}, now=3 * day)
+    log.record("recent", {"op": "streaks"}, now=3 * day)
+    assert [key for key, _ in log.top(2, now=3 * day)] == ["recent", "old"]
+    assert [key for key, _ in log.top(2, now=0.0)] == ["old", "recent"]
+
+    log.flush()
+    reloaded = AccessLog.load(tmp_path / "log.json", half_life=day)
+    assert reloaded.top(1, now=3 * day) == [("recent", {"op": "streaks"})]
+
+
+def test_access_log_flushes_off_the_recording_thread(tmp_path) -> None:
+    from gh_trending_analytics.access_log import AccessLog
+
+    log = AccessLog(tmp_path / "log.json", flush_every=2)
+    release = threading.Event()
+    write = log.flush
+
+    def blocked_flush() -> None:
+        release.wait(5)
+        write()
+
+    log.flush = blocked_flush
+    for index in range(6):
+        log.record(f"key-{index}", {"op": "day"})
+    flusher = log._flusher
+    assert flusher is not None
+    assert not (tmp_path / "log.json").exists()
+
+    release.set()
+    flusher.join(5)
+    assert len(AccessLog.load(tmp_path / "log.json")) >= 2
+
+
+def test_access_log_load_survives_malformed_files(tmp_path) -> None:
+    from gh_trending_analytics.access_log import ACCESS_LOG_VERSION, AccessLog
+
+    path = tmp_path / "log.json"
+    for payload in ("[]", "null", '{"version": 1, "entries": {}}', "not json"):
+        path.write_text(payload)
+        assert len(AccessLog.load(path)) == 0
+
+    path.write_text(
+        json.dumps(
+            {
+                "version": ACCESS_LOG_VERSION,
+                "entries": [
+                    ["good", {"op": "day"}, 2.0, 10.0],
+                    ["short", {"op": "day"}, 1.0],
+                    ["bad-spec", "day", 1.0, 10.0],
+                    ["bad-count", {"op": "day"}, "many", 10.0],
+                    "not-a-list",
+                ],
+            }
+        )
+    )
+    log = AccessLog.load(path)
+    assert log.top(5, now=10.0) == [("good", {"op": "day"})]
+
+
+def test_cache_serves_stale_and_refreshes_once() -> None:
+    submitted: list = []
+    cache = ResultCache(
+        default_ttl=0.01, hard_ttl=60.0, submit=lambda key, fn: submitted.append((key, fn))
+    )
+    calls = []
+
+    def rebuild():
+        calls.append(1)
+        return {"value": 2}
+
+    cache.set("alpha", {"value": 1}, refresh=rebuild)
+    time.sleep(0.02)
+    assert cache.get("alpha") == {"value": 1}
+    assert cache.get("alpha") == {"value": 1}
+    assert cache.stats.stale_serves == 2
+    assert cache.stats.expirations == 0
+    assert [key for key, _ in submitted] == ["alpha"]
+    assert "alpha" not in cache
+
+    submitted[0][1]()
+    assert calls == [1]
+    assert cache.stats.refreshes == 1
+    assert "alpha" in cache
+    assert cache.get("alpha") == {"value": 2}
+
+    # Without ``submit`` the refresh runs on its own thread; loads inside a refresh
+    # never see stale values.
+    seen = []
+    done = threading.Event()
+    inline = ResultCache(default_ttl=0.01, hard_ttl=60.0)
+    inline.set("rows", [1], refresh=lambda: [2])
+
+    def rebuild_response():
+        seen.append(inline.get("rows"))
+        done.set()
+        return "response"
+
+    inline.set("response", "stale", refresh=rebuild_response)
+    time.sleep(0.02)
+    assert inline.get("response") == "stale"
+    assert done.wait(5)
+    assert seen == [None]
+
+
+def test_cache_expires_at_hard_ttl_or_without_refresh() -> None:
+    cache = ResultCache(default_ttl=0.001, hard_ttl=0.005, submit=lambda key, fn: None)
+    cache.set("refreshable", 1, refresh=lambda: 2)
+    cache.set("plain", 1)
+    time.sleep(0.01)
+    assert cache.get("refreshable") is None
+    assert cache.get("plain") is None
+    assert cache.stats.expirations == 2
+    assert cache.stats.stale_serves == 0
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import socket
 import threading
 import time
@@ -108,3 +109,40 @@ def test_e2e_missing_manifest(tmp_path: Path) -> None:
         assert response.status_code == 404
     finally:
         _stop_server(server, thread)
+
+
+def test_load_test_reports_each_level(tmp_path: Path) -> None:
+    from gh_trending_analytics.manifest import Manifest
+    from gh_trending_web.loadtest import run
+
+    analytics_root = build_fixture(tmp_path)
+    server, thread, base_url = _start_server(analytics_root)
+    try:
+        manifest = Manifest.load(analytics_root / "parquet" / "manifest.json")
+        reports = run(base_url, manifest, levels=(1, 4), duration=0.5, seed=3)
+    finally:
+        _stop_server(server, thread)
+    assert [report.concurrency for report in reports] == [1, 4]
+    for report in reports:
+        assert report.requests > 0
+        assert report.errors == 0
+        assert report.p50_ms <= report.p95_ms <= report.p99_ms
+        assert report.cache_hit_ratio is not None
+    assert reports[1].cache_hit_ratio > 0
+
+
+def test_load_test_serves_from_a_child_process(tmp_path: Path) -> None:
+    from gh_trending_analytics.manifest import Manifest
+    from gh_trending_web.loadtest import run, start_server, stop_server
+
+    analytics_root = build_fixture(tmp_path)
+    process, base_url = start_server(analytics_root)
+    try:
+        assert process.poll() is None and process.pid != os.getpid()
+        manifest = Manifest.load(analytics_root / "parquet" / "manifest.json")
+        [report] = run(base_url, manifest, levels=(2,), duration=0.5, seed=1)
+    finally:
+        stop_server(process)
+    assert process.poll() is not None
+    assert report.requests > 0
+    assert report.errors == 0
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 
 from fastapi.testclient import TestClient
+from gh_trending_analytics.cache import CachedResponse
+from gh_trending_analytics.rollup import rollup_kind
+from gh_trending_web import app as app_module
 from gh_trending_web.app import create_app
 from helpers import build_fixture
 
@@ -171,3 +175,404 @@ def test_invalid_range_returns_400(tmp_path: Path) -> None:
     assert response.status_code == 400
     payload = response.json()
     assert payload["error"] == "invalid_request"
+
+
+def test_cache_stores_encoded_response(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    params = {"start": "2025-01-01", "end": "2025-01-02", "include_all_languages": "true"}
+    first = client.get("/api/v1/top/owners", params=params)
+    second = client.get("/api/v1/top/owners", params=params)
+    assert first.status_code == 200
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+
+    cache = client.app.state.cache
+    key = next(key for key in cache.keys() if key.startswith("top_owners:"))
+    cached = cache.get(key)
+    assert isinstance(cached, CachedResponse)
+    assert cached.body == first.content
+
+
+def test_conditional_request_returns_304(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    params = {"kind": "repository", "date": "2025-01-01", "language": "python"}
+    first = client.get("/api/v1/day", params=params)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"].endswith("GMT")
+    assert first.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    def fail_get_day(*_args, **_kwargs):
+        raise AssertionError("conditional hit must not query")
+
+    client.app.state.cache.clear()
+    client.app.state.query_service.get_day = fail_get_day
+    second = client.get("/api/v1/day", params=params, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+
+def test_wildcard_if_none_match_does_not_hide_missing_resources(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    wildcard = {"If-None-Match": "*"}
+    missing_day = client.get(
+        "/api/v1/day", params={"kind": "repository", "date": "2019-01-01"}, headers=wildcard
+    )
+    assert missing_day.status_code == 404
+    assert "immutable" not in missing_day.headers.get("cache-control", "")
+    missing_language = client.get(
+        "/api/v1/day",
+        params={"kind": "repository", "date": "2025-01-01", "language": "cobol"},
+        headers=wildcard,
+    )
+    assert missing_language.status_code == 400
+    # An existing day is served in full rather than matched by the wildcard.
+    existing = client.get(
+        "/api/v1/day", params={"kind": "repository", "date": "2025-01-01"}, headers=wildcard
+    )
+    assert existing.status_code == 200
+
+
+def test_latest_date_is_revalidated(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    response = client.get(
+        "/api/v1/top/streaks",
+        params={"kind": "repository", "start": "2025-01-01", "end": "2025-01-02"},
+    )
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["etag"]
+
+
+def test_historical_range_uses_canonical_end(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    response = client.get("/api/v1/top/owners", params={"start": "20250101", "end": "20250101"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+def test_response_compression_negotiated(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr("gh_trending_analytics.cache.COMPRESSION_MIN_BYTES", 64)
+    client = _client(tmp_path)
+    params = {
+        "kind": "repository",
+        "start": "2025-01-01",
+        "end": "2025-01-02",
+        "include_all_languages": "true",
+    }
+    identity = client.get(
+        "/api/v1/top/reappearing", params=params, headers={"Accept-Encoding": "identity"}
+    )
+    compressed = client.get(
+        "/api/v1/top/reappearing", params=params, headers={"Accept-Encoding": "gzip"}
+    )
+    assert "content-encoding" not in identity.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept, Accept-Encoding"
+    assert compressed.headers["etag"] != identity.headers["etag"]
+    assert compressed.json() == identity.json()
+
+    revalidated = client.get(
+        "/api/v1/top/reappearing",
+        params=params,
+        headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == compressed.headers["etag"]
+    assert "Accept-Encoding" in revalidated.headers["vary"]
+    unknown_variant = compressed.headers["etag"][:-1] + "x" + '"'
+    mismatched = client.get(
+        "/api/v1/top/reappearing",
+        params=params,
+        headers={"Accept-Encoding": "gzip", "If-None-Match": unknown_variant},
+    )
+    assert mismatched.status_code == 200
+
+
+def test_equivalent_toplists_share_canonical_rows(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    calls = []
+    original = client.app.state.query_service.top_reappearing_table
+
+    def counting(*args, **kwargs):
+        calls.append((args, kwargs))
+        return original(*args, **kwargs)
+
+    client.app.state.query_service.top_reappearing_table = counting
+    base = {"kind": "repository", "start": "2025-01-01", "include_all_languages": "true"}
+    variants = [
+        {**base, "end": "2025-01-02", "limit": "10"},
+        {**base, "end": "2030-12-31", "limit": "2"},
+        {**base, "end": "2025-01-02", "language": "__all__"},
+    ]
+    responses = [client.get("/api/v1/top/reappearing", params=params) for params in variants]
+    assert all(response.status_code == 200 for response in responses)
+    assert len(calls) == 1
+    assert calls[0][0][2] == "2025-01-02"
+    assert calls[0][1]["limit"] == 500
+
+    full = responses[0].json()["results"]
+    assert responses[1].json()["results"] == full[:2]
+    assert responses[2].json()["results"] == full
+
+
+def test_batch_shares_scan_and_matches_single_endpoints(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    service = client.app.state.query_service
+    scans = []
+    original_scan = service.scan_range
+
+    def counting_scan(*args, **kwargs):
+        scans.append(args)
+        columns.append(set(kwargs["columns"]))
+        return original_scan(*args, **kwargs)
+
+    columns = []
+    service.scan_range = counting_scan
+    span = {"start": "2025-01-01", "end": "2025-01-02", "include_all_languages": True}
+    queries = [
+        {"op": "reappearing", "kind": "repository", **span},
+        {"op": "owners", **span},
+        {"op": "streaks", "kind": "repository", **span},
+        {"op": "newcomers", "kind": "repository", **span},
+        {"op": "owners", **span, "limit": 1},
+        {"op": "reappearing", "kind": "bogus", **span},
+        {"op": "nope"},
+    ]
+    response = client.post("/api/v1/batch", json={"queries": queries})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["status"] for item in results] == [200, 200, 200, 200, 200, 400, 400]
+    assert scans == [("repository", "2025-01-01", "2025-01-02")]
+    assert columns == [{"date", "rank", "language", "full_name", "owner"}]
+    entries = client.app.state.cache._data.values()
+    assert all(entry.refresh is not None for entry in entries)
+    engines = {plan["method"]: plan["engine"] for plan in service.recent_plans()}
+    assert engines == {"top_reappearing": "scan", "top_owners": "scan", "top_streaks": "scan"}
+
+    params = {key: str(value).lower() for key, value in span.items()}
+    single = client.get("/api/v1/top/owners", params=params).json()
+    assert results[1]["body"] == single
+    assert results[4]["body"]["results"] == single["results"][:1]
+    streaks = client.get("/api/v1/top/streaks", params={**params, "kind": "repository"})
+    assert results[2]["body"] == streaks.json()
+
+
+def test_batch_scans_only_short_spans(tmp_path: Path, monkeypatch) -> None:
+    client = _client(tmp_path)
+    service = client.app.state.query_service
+    scans = []
+    original_scan = service.scan_range
+
+    def counting_scan(*args, **kwargs):
+        scans.append(args)
+        return original_scan(*args, **kwargs)
+
+    service.scan_range = counting_scan
+    monkeypatch.setattr(app_module, "BATCH_SCAN_MAX_DAYS", 1)
+    span = {"start": "2025-01-01", "end": "2025-01-02"}
+    queries = [{"op": "owners", **span}, {"op": "languages", "kind": "repository", **span}]
+    response = client.post("/api/v1/batch", json={"queries": queries})
+    assert [item["status"] for item in response.json()["results"]] == [200, 200]
+    assert scans == []
+    assert {plan["engine"] for plan in service.recent_plans()} == {"raw"}
+
+
+def test_batch_runs_rollup_answerable_specs_without_scanning(tmp_path: Path) -> None:
+    analytics_root = build_fixture(tmp_path)
+    rollup_kind(analytics_root=analytics_root, kind="repository", from_date=None)
+    client = TestClient(create_app(analytics_root=analytics_root))
+    service = client.app.state.query_service
+    scans = []
+    original_scan = service.scan_range
+
+    def counting_scan(*args, **kwargs):
+        scans.append(args)
+        return original_scan(*args, **kwargs)
+
+    service.scan_range = counting_scan
+    span = {"start": "2025-01-01", "end": "2025-01-02", "include_all_languages": True}
+    queries = [
+        {"op": "reappearing", "kind": "repository", **span},
+        {"op": "owners", **span},
+        {"op": "streaks", "kind": "repository", **span},
+    ]
+    response = client.post("/api/v1/batch", json={"queries": queries})
+    assert [item["status"] for item in response.json()["results"]] == [200, 200, 200]
+    assert scans == []
+    assert {plan["engine"] for plan in service.recent_plans()} == {"rollup"}
+
+    # Language filters are raw-only, so those specs still share one scan.
+    queries = [
+        {"op": "reappearing", "kind": "repository", "language": "python", **span},
+        {"op": "owners", "language": "python", **span},
+    ]
+    response = client.post("/api/v1/batch", json={"queries": queries})
+    assert [item["status"] for item in response.json()["results"]] == [200, 200]
+    assert scans == [("repository", "2025-01-01", "2025-01-02")]
+    assert [plan["engine"] for plan in service.recent_plans()[:2]] == ["scan", "scan"]
+
+
+def test_batch_reports_unexpected_failures_per_spec(tmp_path: Path) -> None:
+    import duckdb
+
+    client = _client(tmp_path)
+    service = client.app.state.query_service
+
+    def broken(*_args, **_kwargs):
+        raise duckdb.IOException("corrupt partition")
+
+    service.top_newcomers_table = broken
+    service.scan_range = broken
+    span = {"start": "2025-01-01", "end": "2025-01-02"}
+    queries = [
+        {"op": "newcomers", "kind": "repository", **span},
+        {"op": "owners", **span},
+        {"op": "reappearing", "kind": "repository", **span},
+    ]
+    response = client.post("/api/v1/batch", json={"queries": queries})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["status"] for item in results] == [500, 200, 200]
+    assert results[0]["body"] == {"error": "internal_error", "message": "Query failed"}
+    # The failed shared scan left the other specs to load on their own.
+    assert results[1]["body"] == client.get("/api/v1/top/owners", params=span).json()
+
+
+def test_batch_ops_accept_their_endpoint_parameters(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    paths = client.get("/openapi.json").json()["paths"]
+    span = {"start": "2025-01-01", "end": "2025-01-02"}
+    for op in ("reappearing", "owners", "languages", "streaks", "newcomers"):
+        names = {item["name"] for item in paths[f"/api/v1/top/{op}"]["get"]["parameters"]}
+        assert {"start", "end", "limit"} <= names
+        spec = {"op": op, **span, **{name: None for name in names - set(span)}}
+        if "kind" in names:
+            spec["kind"] = "repository"
+        queries = [spec, {"op": op, **span, "kind": "repository", "bogus": "1"}]
+        response = client.post("/api/v1/batch", json={"queries": queries})
+        statuses = [item["status"] for item in response.json()["results"]]
+        assert statuses == [200, 400], op
+
+
+def test_batch_rejects_malformed_body(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    assert client.post("/api/v1/batch", json={"queries": []}).status_code == 400
+    assert client.post("/api/v1/batch", json=[1]).status_code == 400
+
+
+def test_days_streams_ndjson_in_rank_order(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    response = client.get(
+        "/api/v1/days",
+        params={"kind": "repository", "start": "2025-01-01", "end": "2025-01-02"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    keys = [
+        (row["date"], row["language"] is None, row["language"] or "", row["rank"]) for row in rows
+    ]
+    assert keys == sorted(keys)
+    assert {row["date"] for row in rows} == {"2025-01-01", "2025-01-02"}
+
+    day = client.get(
+        "/api/v1/day", params={"kind": "repository", "date": "2025-01-01", "language": "python"}
+    ).json()
+    python_rows = [
+        row for row in rows if row["date"] == "2025-01-01" and row["language"] == "python"
+    ]
+    assert [row["full_name"] for row in python_rows] == [
+        entry["full_name"] for entry in day["entries"]
+    ]
+
+
+def test_days_streams_arrow_ipc(tmp_path: Path) -> None:
+    import pyarrow as pa
+
+    client = _client(tmp_path)
+    response = client.get(
+        "/api/v1/days",
+        params={"kind": "developer", "start": "2025-01-01", "end": "2025-01-01"},
+        headers={"Accept": "application/vnd.apache.arrow.stream"},
+    )
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names[:3] == ["date", "language", "rank"]
+    assert table.num_rows > 0
+
+    bad = client.get(
+        "/api/v1/days",
+        params={"kind": "developer", "start": "2025-01-02", "end": "2025-01-01"},
+    )
+    assert bad.status_code == 400
+
+
+def test_tabular_responses_negotiated_by_accept(tmp_path: Path) -> None:
+    import io
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    client = _client(tmp_path)
+    params = {
+        "kind": "repository",
+        "start": "2025-01-01",
+        "end": "2025-01-02",
+        "include_all_languages": "true",
+    }
+    as_json = client.get("/api/v1/top/streaks", params=params)
+    as_arrow = client.get(
+        "/api/v1/top/streaks",
+        params=params,
+        headers={"Accept": "application/vnd.apache.arrow.stream"},
+    )
+    assert as_arrow.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert as_arrow.headers["etag"] != as_json.headers["etag"]
+    table = pa.ipc.open_stream(as_arrow.content).read_all()
+    assert pa.types.is_date(table.schema.field("streak_start").type)
+    assert json.loads(table.schema.metadata[b"gh_trending"])["kind"] == "repository"
+    assert len(table) == len(as_json.json()["results"])
+
+    day = client.get(
+        "/api/v1/day",
+        params={"kind": "repository", "date": "2025-01-01"},
+        headers={"Accept": "application/vnd.apache.parquet"},
+    )
+    assert day.headers["content-type"] == "application/vnd.apache.parquet"
+    entries = pq.read_table(io.BytesIO(day.content))
+    assert entries.column("rank").to_pylist() == sorted(entries.column("rank").to_pylist())
+
+    dates = client.get(
+        "/api/v1/dates",
+        params={"kind": "developer"},
+        headers={"Accept": "application/vnd.apache.arrow.stream"},
+    )
+    assert pa.types.is_date(pa.ipc.open_stream(dates.content).read_all().schema[0].type)
+
+
+def test_debug_slow_queries_endpoint(tmp_path: Path) -> None:
+    app = create_app(
+        analytics_root=build_fixture(tmp_path), slow_query_seconds=0.0, admin_token="secret"
+    )
+    client = TestClient(app)
+    params = {"kind": "repository", "date": "2025-01-01"}
+    assert client.get("/api/v1/day", params=params).status_code == 200
+    assert client.get("/debug/slow-queries").status_code == 403
+    payload = client.get("/debug/slow-queries", headers={"x-profile-token": "secret"}).json()
+    assert payload["threshold_seconds"] == 0.0
+    assert payload["queries"][0]["method"] == "get_day"
+    assert payload["queries"][0]["profile"] is None
+
+
+def test_debug_query_plans_endpoint(tmp_path: Path) -> None:
+    client = TestClient(create_app(analytics_root=build_fixture(tmp_path), admin_token="secret"))
+    params = {"kind": "repository", "start": "2025-01-01", "end": "2025-01-02"}
+    assert client.get("/api/v1/top/streaks", params=params).status_code == 200
+    assert client.get("/debug/query-plans").status_code == 403
+    headers = {"x-profile-token": "secret"}
+    plans = client.get("/debug/query-plans", headers=headers).json()["plans"]
+    assert plans[0]["method"] == "top_streaks"
+    assert plans[0]["engine"] == "raw"
+    assert plans[0]["fallbacks"] == []
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = {"pyarrow", "duckdb", "fastapi", "uvicorn", "jinja2"}
+# Cumulative import time allowed for the package itself, in microseconds.
+IMPORT_BUDGET_US = int(os.environ.get("GH_TRENDING_IMPORT_BUDGET_US", "100000"))
+# Wall-clock budget for the whole `--help` process, including interpreter startup.
+WALL_BUDGET_S = float(os.environ.get("GH_TRENDING_STARTUP_BUDGET_S", "2.0"))
+
+
+def _run_importtime(module: str) -> tuple[dict[str, int], float]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(ROOT / "py"), str(ROOT / "legacy")])
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", module, "--help"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    cumulative: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        total = total.strip()
+        if total.isdigit():
+            cumulative[name.strip()] = int(total)
+    return cumulative, elapsed
+
+
+@pytest.mark.parametrize(
+    ("module", "package"),
+    [("gh_trending_analytics", "gh_trending_analytics"), ("gh_trending_web", "gh_trending_web")],
+)
+def test_cli_help_cold_start_budget(module: str, package: str) -> None:
+    cumulative, elapsed = _run_importtime(module)
+
+    heavy = sorted(name for name in cumulative if name.split(".")[0] in HEAVY_MODULES)
+    assert not heavy, f"{module} --help imported heavy dependencies: {heavy[:5]}"
+
+    package_us = max(
+        (value for name, value in cumulative.items() if name.split(".")[0] == package),
+        default=0,
+    )
+    assert package_us < IMPORT_BUDGET_US, f"{package} import took {package_us / 1000:.1f}ms"
+    assert elapsed < WALL_BUDGET_S, f"{module} --help took {elapsed:.2f}s"
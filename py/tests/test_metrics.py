@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from gh_trending_analytics.metrics import LoopLagMonitor, MetricsRegistry
+from gh_trending_web.app import create_app
+from helpers import build_fixture
+
+
+def test_registry_renders_text_exposition() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs.", ("state",))
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    counter.inc(state='a"b')
+    counter.inc(2, state='a"b')
+    histogram.observe(0.05)
+    histogram.observe(5.0)
+
+    text = registry.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{state="a\\"b"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "latency_seconds_count 2" in text
+    assert registry.counter("jobs_total", "Jobs.", ("state",)) is counter
+
+
+def test_metrics_endpoint_reports_routes_queries_and_cache(tmp_path: Path) -> None:
+    client = TestClient(create_app(analytics_root=build_fixture(tmp_path)))
+    params = {"kind": "repository", "start": "2025-01-01", "end": "2025-01-02"}
+    for _ in range(2):
+        assert client.get("/api/v1/top/streaks", params=params).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert (
+        "gh_trending_http_request_duration_seconds_count"
+        '{route="/api/v1/top/streaks",method="GET",status="200"} 2'
+    ) in text
+    assert 'gh_trending_query_duration_seconds_count{method="top_streaks"} 1' in text
+    assert 'gh_trending_query_path_total{method="top_streaks",path="raw"} 1' in text
+    assert 'gh_trending_cache_events_total{event="hit"}' in text
+    assert "gh_trending_event_loop_lag_seconds " in text
+    assert "gh_trending_executor_queue_depth" not in text
+    assert "gh_trending_queries_in_flight 0" in text
+
+
+def test_loop_lag_monitor_reports_a_blocked_loop() -> None:
+    monitor = LoopLagMonitor(interval=0.01)
+
+    async def stall() -> tuple[float, float]:
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        idle = monitor.lag()
+        time.sleep(0.3)  # Blocks the loop the way a synchronous query does.
+        stalled = monitor.lag()
+        task.cancel()
+        return idle, stalled
+
+    idle, stalled = asyncio.run(stall())
+    assert idle < 0.1
+    assert stalled >= 0.25
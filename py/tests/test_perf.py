@@ -1,39 +1,20 @@
 from __future__ import annotations
 
-import json
 import time
-from datetime import date, timedelta
+from datetime import date
 from pathlib import Path
 
 from fastapi.testclient import TestClient
 from gh_trending_analytics.build import build_kind
 from gh_trending_analytics.query import DuckDBQueryService, QueryConfig
+from gh_trending_analytics.synthetic import SyntheticSpec, write_archive
 from gh_trending_web.app import create_app
 
 
-def _write_archive(root: Path, start: date, days: int) -> None:
-    languages = ["python", "c++", None]
-    for offset in range(days):
-        current = start + timedelta(days=offset)
-        day_str = current.isoformat()
-        year = str(current.year)
-        for kind in ["repository", "developer"]:
-            for language in languages:
-                dir_path = root / kind / year / day_str
-                dir_path.mkdir(parents=True, exist_ok=True)
-                filename = f"{language}.json" if language is not None else "(null).json"
-                items = [f"item{idx}" for idx in range(10)]
-                if kind == "repository":
-                    entries = [f"owner{idx}/{items[idx]}" for idx in range(10)]
-                else:
-                    entries = [f"user{idx}" for idx in range(10)]
-                payload = {"date": day_str, "language": language, "list": entries}
-                (dir_path / filename).write_text(json.dumps(payload))
-
-
 def test_perf_cached_day_and_toplists(tmp_path: Path) -> None:
     archive_root = tmp_path / "archive"
-    _write_archive(archive_root, date(2025, 1, 1), 90)
+    spec = SyntheticSpec(start=date(2025, 1, 1), days=90, languages=10, language_churn=0.0)
+    write_archive(archive_root, spec)
 
     analytics_root = tmp_path / "analytics"
     build_kind(
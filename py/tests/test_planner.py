@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+from gh_trending_analytics.build import build_kind
+from gh_trending_analytics.query import DuckDBQueryService, QueryConfig
+from gh_trending_analytics.rollup import rollup_kind
+from helpers import FIXTURE_ARCHIVE, build_fixture
+
+TOPLIST = {"language": None, "include_all_languages": True, "limit": 10}
+
+
+def _rolled_up(tmp_path: Path) -> Path:
+    analytics_root = build_fixture(tmp_path)
+    for kind in ("repository", "developer"):
+        rollup_kind(analytics_root=analytics_root, kind=kind, from_date=None)
+    return analytics_root
+
+
+def _reappearing(service: DuckDBQueryService) -> list[dict]:
+    return service.top_reappearing(
+        "repository", "2025-01-01", "2025-01-02", presence="day", **TOPLIST
+    )
+
+
+def test_planner_picks_cheapest_valid_engine(tmp_path: Path) -> None:
+    service = DuckDBQueryService(QueryConfig(analytics_root=_rolled_up(tmp_path)))
+    _reappearing(service)
+    plan = service.recent_plans()[0]
+    assert plan["method"] == "top_reappearing"
+    assert plan["engine"] == "rollup"
+    assert [item["engine"] for item in plan["candidates"]] == ["rollup", "raw"]
+    assert plan["candidates"][0]["cost"] < plan["candidates"][1]["cost"]
+    assert plan["fallbacks"] == []
+
+    assert service.load_presence_matrix("repository")
+    _reappearing(service)
+    assert service.recent_plans()[0]["engine"] == "matrix"
+
+    # Occurrence counts and language filters are raw-only query shapes.
+    service.top_reappearing(
+        "repository", "2025-01-01", "2025-01-02", presence="occurrence", **TOPLIST
+    )
+    assert [item["engine"] for item in service.recent_plans()[0]["candidates"]] == ["raw"]
+
+
+def test_planner_skips_stale_engines(tmp_path: Path) -> None:
+    # Roll up 2025-01-01 only, then build 2025-01-02 without rolling it up.
+    archive_root = tmp_path / "archive"
+    analytics_root = tmp_path / "analytics"
+    shutil.copytree(FIXTURE_ARCHIVE, archive_root)
+    day_dir = archive_root / "repository" / "2025" / "2025-01-02"
+    held = tmp_path / "held"
+    day_dir.rename(held)
+    build_kind(archive_root=archive_root, analytics_root=analytics_root, kind="repository")
+    rollup_kind(analytics_root=analytics_root, kind="repository", from_date=None)
+    held.rename(day_dir)
+    build_kind(
+        archive_root=archive_root,
+        analytics_root=analytics_root,
+        kind="repository",
+        rebuild_year=True,
+    )
+
+    service = DuckDBQueryService(QueryConfig(analytics_root=analytics_root))
+    raw = DuckDBQueryService(QueryConfig(analytics_root=analytics_root, use_rollups=False))
+    assert service.manifest.kinds["repository"].rollup_coverage == {
+        "2025": ["2025-01-01", "2025-01-01"]
+    }
+    assert service.load_presence_matrix("repository")
+
+    assert _reappearing(service) == _reappearing(raw)
+    plan = service.recent_plans()[0]
+    assert plan["fallbacks"][0] == {"engine": "matrix", "reason": "stale"}
+    rollup = next(item for item in plan["candidates"] if item["engine"] == "rollup")
+    assert rollup["reason"] is None
+    assert rollup["detail"] == "raw tail from 2025-01-02"
+    fallbacks = service.metrics.counter(
+        "gh_trending_query_fallback_total", "", ("method", "engine", "reason")
+    )
+    assert fallbacks.value(method="top_reappearing", engine="matrix", reason="stale") == 1
+
+    # A range the rollups do not reach at all is answered from Parquet.
+    service.top_streaks("repository", "2025-01-02", "2025-01-02", **TOPLIST)
+    plan = service.recent_plans()[0]
+    assert plan["engine"] == "raw"
+    rollup = next(item for item in plan["candidates"] if item["engine"] == "rollup")
+    assert rollup["reason"] == "stale"
+
+
+def test_planner_falls_back_on_broken_rollup(tmp_path: Path) -> None:
+    analytics_root = _rolled_up(tmp_path)
+    service = DuckDBQueryService(QueryConfig(analytics_root=analytics_root))
+    raw = DuckDBQueryService(QueryConfig(analytics_root=analytics_root, use_rollups=False))
+    rollup = analytics_root / "rollups" / "repository" / "year=2025" / "repo_day_presence.parquet"
+    rollup.write_bytes(b"not parquet")
+
+    assert service.top_streaks("repository", "2025-01-01", "2025-01-02", **TOPLIST) == (
+        raw.top_streaks("repository", "2025-01-01", "2025-01-02", **TOPLIST)
+    )
+    plan = service.recent_plans()[0]
+    assert plan["engine"] == "raw"
+    assert [item["engine"] for item in plan["fallbacks"]] == ["rollup"]
+    assert plan["fallbacks"][0]["reason"].startswith("error:")
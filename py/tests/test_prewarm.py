@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import json
+import threading
 from pathlib import Path
 
 from fastapi.testclient import TestClient
+from gh_trending_analytics.prewarm import PrewarmPolicy, PrewarmPool
 from gh_trending_web.app import create_app
 from helpers import build_fixture
 
@@ -26,6 +28,7 @@ def test_prewarm_skips_out_of_range(tmp_path: Path) -> None:
         params={"kind": "repository", "date": "2025-01-01", "language": "python"},
     )
     assert response.status_code == 200
+    assert client.app.state.prewarm_pool.drain(timeout=10)
     cache = client.app.state.cache
     keys = [_decode_key(key) for key in cache.keys()]
     dates = {item["date"] for item in keys if item.get("kind") == "repository"}
@@ -50,4 +53,187 @@ def test_prewarm_failure_safe(tmp_path: Path) -> None:
         params={"kind": "repository", "date": "2025-01-01", "language": "python"},
     )
     assert response.status_code == 200
+    assert app.state.prewarm_pool.drain(timeout=10)
     assert app.state.cache.stats.prewarm_failure >= 1
+
+
+def test_prewarmed_entries_refresh_while_prewarm_pool_is_busy(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    app = client.app
+    params = {"kind": "repository", "date": "2025-01-01", "language": "python"}
+    assert client.get("/api/v1/day", params=params).status_code == 200
+    assert app.state.prewarm_pool.drain(timeout=10)
+    cache = app.state.cache
+    entries = dict(cache._data)
+    assert len(entries) > 1
+    assert all(entry.refresh is not None for entry in entries.values())
+
+    gate = threading.Event()
+    app.state.prewarm_pool.submit("blocker", gate.wait)
+    for entry in entries.values():
+        entry.expires_at = 0.0
+    for key in entries:
+        assert cache.get(key) is not None
+    app.state.refresh_executor.shutdown(wait=True)
+    gate.set()
+    assert cache.stats.stale_serves == len(entries)
+    assert cache.stats.refreshes == len(entries)
+
+
+def test_access_log_replay_prewarms_popular_requests(tmp_path: Path) -> None:
+    analytics_root = build_fixture(tmp_path)
+    log_path = tmp_path / "access-log.json"
+    top_params = {"kind": "repository", "start": "2025-01-01", "end": "2025-01-02"}
+    day_params = {"kind": "developer", "date": "2025-01-02"}
+
+    with TestClient(create_app(analytics_root=analytics_root, access_log_path=log_path)) as client:
+        for _ in range(3):
+            assert client.get("/api/v1/top/reappearing", params=top_params).status_code == 200
+        assert client.get("/api/v1/day", params=day_params).status_code == 200
+    assert log_path.exists()
+
+    app = create_app(analytics_root=analytics_root, access_log_path=log_path)
+    assert [spec["op"] for _, spec in app.state.access_log.top(10)] == ["reappearing", "day"]
+    app.state.prewarm_from_access_log()
+    assert app.state.cache.stats.prewarm_success == 2
+    assert app.state.cache.stats.prewarm_failure == 0
+
+    client = TestClient(app)
+    hits = app.state.cache.stats.hits
+    assert client.get("/api/v1/top/reappearing", params=top_params).status_code == 200
+    assert client.get("/api/v1/day", params=day_params).status_code == 200
+    assert app.state.cache.stats.hits == hits + 2
+
+
+def test_app_starts_with_a_corrupt_access_log(tmp_path: Path) -> None:
+    analytics_root = build_fixture(tmp_path)
+    log_path = tmp_path / "access.json"
+    log_path.write_text(json.dumps({"version": 1, "entries": [["key", {}, 1.0]]}))
+    app = create_app(analytics_root=analytics_root, access_log_path=log_path)
+    with TestClient(app) as client:
+        assert client.get("/api/v1/dates", params={"kind": "repository"}).status_code == 200
+    assert len(app.state.access_log) == 0
+
+
+def test_access_log_records_served_requests_by_canonical_key(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    access_log = client.app.state.access_log
+    params = {"start": "2025-01-01", "end": "2025-01-02"}
+    assert client.get("/api/v1/top/owners", params=params).status_code == 200
+    # Past-the-data ranges and the all-languages sentinel share the canonical rows.
+    wider = {"start": "2024-12-01", "end": "2025-01-02", "language": "__all__", "limit": "5"}
+    assert client.get("/api/v1/top/owners", params=wider).status_code == 200
+    assert (
+        client.get("/api/v1/top/owners", params={**params, "language": "nope"}).status_code == 400
+    )
+    bad_day = {"kind": "repository", "date": "2024-01-01"}
+    assert client.get("/api/v1/day", params=bad_day).status_code == 404
+    batch = {"queries": [{"op": "owners", **params}, {"op": "owners", "start": "x", "end": "y"}]}
+    assert client.post("/api/v1/batch", json=batch).status_code == 200
+
+    [(key, spec)] = access_log.top(10)
+    assert key.startswith("rows.top_owners:")
+    assert spec["op"] == "owners"
+    assert access_log._records[key].count > 2
+
+
+def test_prewarm_pool_dedups_cancels_and_bounds() -> None:
+    gate = threading.Event()
+    started = threading.Event()
+    done: list[str] = []
+    pool = PrewarmPool(workers=1, max_queue=3)
+    pool.submit("blocker", lambda: (started.set(), gate.wait()))
+    assert started.wait(5)
+    assert pool.submit("a", lambda: done.append("a"), group="day")
+    assert not pool.submit("a", lambda: done.append("a"), group="day")
+    assert pool.submit("b", lambda: done.append("b"), group="day")
+    assert pool.cancel_group("day", keep=["b"]) == 1
+    for key in ("c", "d", "e"):
+        pool.submit(key, lambda key=key: done.append(key))
+    gate.set()
+    assert pool.drain(timeout=10)
+    assert done == ["c", "d", "e"]
+    assert pool.stats.deduplicated == 1
+    assert pool.stats.cancelled == 1
+    assert pool.stats.dropped == 1
+    pool.shutdown()
+
+
+def test_prewarm_pool_defers_to_busy_requests() -> None:
+    busy = threading.Event()
+    busy.set()
+    ran = threading.Event()
+    pool = PrewarmPool(workers=1, busy=busy.is_set, max_defer=5.0)
+    pool.submit("day", ran.set)
+    assert not ran.wait(0.1)
+    busy.clear()
+    assert ran.wait(5)
+    pool.shutdown()
+
+
+def test_day_prewarm_cancels_stale_neighbors(tmp_path: Path) -> None:
+    analytics_root = build_fixture(tmp_path)
+    app = create_app(analytics_root=analytics_root)
+    pool = app.state.prewarm_pool
+    gate = threading.Event()
+    started = threading.Barrier(3)
+    for worker in range(2):
+        pool.submit(f"blocker-{worker}", lambda: (started.wait(), gate.wait()))
+    started.wait(5)
+    client = TestClient(app)
+    for date in ("2025-01-01", "2025-01-02"):
+        params = {"kind": "repository", "date": date, "language": "python"}
+        assert client.get("/api/v1/day", params=params).status_code == 200
+    gate.set()
+    assert pool.drain(timeout=10)
+    # Each view queues its day's other languages plus two neighbour lists.
+    assert pool.stats.cancelled == 3
+    assert pool.stats.submitted == 8
+
+
+def test_day_request_prewarms_all_languages_of_that_day(tmp_path: Path) -> None:
+    analytics_root = build_fixture(tmp_path)
+    app = create_app(
+        analytics_root=analytics_root, prewarm_policy=PrewarmPolicy(neighbor_days=False)
+    )
+    client = TestClient(app)
+    params = {"kind": "repository", "date": "2025-01-01", "language": "python"}
+    assert client.get("/api/v1/day", params=params).status_code == 200
+    assert app.state.prewarm_pool.drain(timeout=10)
+
+    dates = {_decode_key(key)["date"] for key in app.state.cache.keys()}
+    assert dates == {"2025-01-01"}
+    for language in ("__all__", "c++"):
+        hits = app.state.cache.stats.hits
+        response = client.get("/api/v1/day", params={**params, "language": language})
+        assert response.status_code == 200
+        assert app.state.cache.stats.hits == hits + 1
+
+
+def test_startup_prewarms_latest_day_and_rolling_toplists(tmp_path: Path) -> None:
+    analytics_root = build_fixture(tmp_path)
+    policy = PrewarmPolicy(windows=(7,), toplists=("reappearing", "owners"))
+    app = create_app(analytics_root=analytics_root, prewarm_policy=policy)
+    specs = policy.startup_specs(app.state.manifest)
+    assert {"op": "owners", "start": "2024-12-27", "end": "2025-01-02", "limit": 10} in specs
+    assert not any(spec["op"] == "owners" and "kind" in spec for spec in specs)
+
+    with TestClient(app) as client:
+        assert app.state.prewarm_pool.drain(timeout=30)
+        assert app.state.cache.stats.prewarm_failure == 0
+        hits = app.state.cache.stats.hits
+        response = client.get(
+            "/api/v1/top/reappearing",
+            params={
+                "kind": "developer",
+                "start": "2025-01-01",
+                "end": "2025-01-02",
+                "presence": "day",
+                "include_all_languages": "false",
+                "limit": "10",
+            },
+        )
+        assert response.status_code == 200
+        day = client.get("/api/v1/day", params={"kind": "developer", "date": "2025-01-02"})
+        assert day.status_code == 200
+        assert app.state.cache.stats.hits == hits + 2
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from gh_trending_analytics.profiling import RequestProfiler, propagate
+from gh_trending_web.app import create_app
+from helpers import build_fixture
+
+TOKEN = "s3cret"
+
+
+def _client(tmp_path: Path) -> TestClient:
+    return TestClient(create_app(analytics_root=build_fixture(tmp_path), admin_token=TOKEN))
+
+
+def test_profiled_request_reports_stages_and_profile(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    params = {
+        "kind": "repository",
+        "start": "2025-01-01",
+        "end": "2025-01-02",
+        "language": "python",
+    }
+    response = client.get("/api/v1/top/streaks", params=params, headers={"X-Profile-Token": TOKEN})
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    for name in ("planning", "cache_lookup", "validation", "fetch", "serialization"):
+        assert f"{name};dur=" in timing
+    profile_id = response.headers["x-profile-id"]
+    assert profile_id in response.headers["link"]
+
+    speedscope = client.get(f"/debug/profiles/{profile_id}", params={"profile_token": TOKEN}).json()
+    assert speedscope["profiles"][0]["type"] == "sampled"
+    summary = client.get(
+        f"/debug/profiles/{profile_id}",
+        params={"format": "summary"},
+        headers={"X-Profile-Token": TOKEN},
+    ).json()
+    assert set(summary["stages"]) >= {"fetch", "serialization"}
+    collapsed = client.get(
+        f"/debug/profiles/{profile_id}",
+        params={"format": "collapsed"},
+        headers={"X-Profile-Token": TOKEN},
+    )
+    assert collapsed.status_code == 200
+
+
+def test_profiling_requires_admin_token(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    params = {"kind": "repository", "date": "2025-01-01"}
+    response = client.get("/api/v1/day", params=params, headers={"X-Profile-Token": "wrong"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert client.get("/debug/profiles/missing").status_code == 403
+    forbidden = client.get("/debug/profiles/missing", params={"profile_token": "wrong"})
+    assert forbidden.status_code == 403
+    missing = client.get("/debug/profiles/missing", params={"profile_token": TOKEN})
+    assert missing.status_code == 404
+
+
+def _spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def other_request_work() -> None:
+    _spin(0.05)
+
+
+def profiled_work() -> None:
+    _spin(0.05)
+
+
+def pooled_work() -> None:
+    _spin(0.05)
+
+
+def test_profiler_samples_only_the_serving_task_and_its_workers() -> None:
+    async def other_request() -> None:
+        await asyncio.sleep(0)
+        other_request_work()
+
+    async def profiled_request() -> str:
+        with RequestProfiler("/profiled", interval=0.001) as profiler:
+            other = asyncio.create_task(other_request())
+            await asyncio.sleep(0.01)
+            await other
+            profiled_work()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(propagate(pooled_work)).result()
+        return profiler.result().collapsed()
+
+    collapsed = asyncio.run(profiled_request())
+    assert "profiled_work" in collapsed
+    assert "pooled_work" in collapsed
+    assert "other_request_work" not in collapsed
+
+
+def test_profiled_batch_samples_its_worker_threads(tmp_path: Path) -> None:
+    client = _client(tmp_path)
+    span = {"start": "2025-01-01", "end": "2025-01-02"}
+    queries = [{"op": "owners", **span}, {"op": "streaks", "kind": "repository", **span}]
+    response = client.post(
+        "/api/v1/batch", json={"queries": queries}, headers={"X-Profile-Token": TOKEN}
+    )
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    collapsed = client.get(
+        f"/debug/profiles/{profile_id}",
+        params={"format": "collapsed"},
+        headers={"X-Profile-Token": TOKEN},
+    ).text
+    assert "_run_batch" in collapsed
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
 
 import pytest
@@ -64,3 +65,99 @@ def test_sql_injection_rejected(tmp_path: Path) -> None:
     service = _service(tmp_path)
     with pytest.raises(InvalidRequestError):
         service.get_day("repository", "2025-01-01", "python' OR 1=1 --")
+
+
+def test_streak_tables_are_typed_and_records_are_iso(tmp_path: Path) -> None:
+    service = _service(tmp_path)
+    table = service.top_streaks_table(
+        "repository",
+        "2025-01-01",
+        "2025-01-02",
+        language=None,
+        include_all_languages=True,
+        limit=10,
+    )
+    assert str(table.schema.field("streak_start").type) == "date32[day]"
+    records = service.top_streaks(
+        "repository",
+        "2025-01-01",
+        "2025-01-02",
+        language=None,
+        include_all_languages=True,
+        limit=10,
+    )
+    assert records[0]["streak_start"] == "2025-01-01"
+    assert len(records) == table.num_rows
+
+
+def test_slow_queries_logged_with_profile(tmp_path: Path, caplog) -> None:
+    analytics_root = build_fixture(tmp_path)
+    service = DuckDBQueryService(
+        QueryConfig(
+            analytics_root=analytics_root,
+            slow_query_seconds=0.0,
+            profile_slow_queries=True,
+            slow_query_log_size=2,
+        )
+    )
+    with caplog.at_level("WARNING", logger="gh_trending_analytics.query"):
+        for limit in (1, 2, 3):
+            service.top_newcomers(
+                "repository",
+                "2025-01-01",
+                "2025-01-02",
+                language=None,
+                include_all_languages=True,
+                limit=limit,
+            )
+    assert "slow_query method=top_newcomers path=raw" in caplog.text
+    entries = service.slow_queries()
+    assert len(entries) == 2
+    assert entries[0]["params"][-1] == 3
+    assert "2025-01-01" in entries[0]["params"]
+    assert service.wait_for_profiles(timeout=10)
+    entries = service.slow_queries()
+    assert all(isinstance(entry["profile"], dict) for entry in entries)
+
+
+def test_slow_query_profiles_run_off_the_calling_thread(tmp_path: Path) -> None:
+    service = DuckDBQueryService(
+        QueryConfig(
+            analytics_root=build_fixture(tmp_path),
+            slow_query_seconds=0.0,
+            profile_slow_queries=True,
+        )
+    )
+    threads = []
+    original = service._profile
+
+    def recording_profile(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return original(*args, **kwargs)
+
+    service._profile = recording_profile
+    service.get_day("repository", "2025-01-01", "python")
+    assert service.wait_for_profiles(timeout=10)
+    assert threads and threading.current_thread() not in threads
+
+
+def test_get_day_tables_matches_per_language_queries(tmp_path: Path) -> None:
+    service = DuckDBQueryService(QueryConfig(analytics_root=build_fixture(tmp_path)))
+    tables = service.get_day_tables("repository", "2025-01-01")
+    assert "__all__" in tables and "python" in tables
+    for language, table in tables.items():
+        assert table.equals(service.get_day_table("repository", "2025-01-01", language))
+
+
+def test_scan_range_projects_requested_columns(tmp_path: Path) -> None:
+    service = _service(tmp_path)
+    table = service.scan_range("repository", "2025-01-01", "2025-01-02", columns=["language"])
+    assert table.column_names == ["language"]
+    assert service.scan_range("developer", "2025-01-01", "2025-01-01").column_names == [
+        "date",
+        "rank",
+        "language",
+        "username",
+    ]
+    with pytest.raises(InvalidRequestError):
+        service.scan_range("repository", "2025-01-01", "2025-01-02", columns=["stars"])
@@ -19,6 +19,10 @@ def test_rollup_builder_outputs_files(tmp_path: Path) -> None:
         analytics_root / "rollups" / "repository" / "year=2025" / "repo_day_presence.parquet"
     )
     assert output_path.exists()
+    for name in ("month_presence", "day_languages", "month_languages"):
+        assert (output_path.parent / f"repo_{name}.parquet").exists()
+    # The week of 2025-01-01 starts on Monday 2024-12-30.
+    assert (output_path.parents[1] / "year=2024" / "repo_week_presence.parquet").exists()
 
 
 def test_rollup_invalid_kind(tmp_path: Path) -> None:
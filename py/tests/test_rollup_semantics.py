@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from datetime import date
 from pathlib import Path
 
+from gh_trending_analytics.build import build_kind
 from gh_trending_analytics.query import DuckDBQueryService, QueryConfig
 from gh_trending_analytics.rollup import rollup_kind
+from gh_trending_analytics.synthetic import KINDS, SyntheticSpec, write_archive
 from helpers import build_fixture
 
 
@@ -54,3 +57,150 @@ def test_rollup_matches_raw(tmp_path: Path) -> None:
         limit=5,
     )
     assert rollup_dev == raw_dev
+
+
+def _synthetic_analytics(tmp_path: Path, *, unrolled_from: str | None = None) -> Path:
+    """Build and roll up a synthetic archive; days from ``unrolled_from`` are built only."""
+    archive_root = tmp_path / "archive"
+    held_root = tmp_path / "held"
+    analytics_root = tmp_path / "analytics"
+    spec = SyntheticSpec(
+        start=date(2024, 11, 20),
+        days=130,
+        languages=6,
+        repositories=300,
+        owners=60,
+        developers=200,
+        list_length=10,
+        seed=7,
+    )
+    write_archive(archive_root, spec)
+    held = []
+    if unrolled_from is not None:
+        for day_dir in sorted(archive_root.glob("*/*/*")):
+            if day_dir.name >= unrolled_from:
+                target = held_root / day_dir.relative_to(archive_root)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                day_dir.rename(target)
+                held.append((target, day_dir))
+    for kind in KINDS:
+        build_kind(
+            archive_root=archive_root, analytics_root=analytics_root, kind=kind, rebuild_year=True
+        )
+        rollup_kind(analytics_root=analytics_root, kind=kind, from_date=None)
+    if held:
+        for target, day_dir in held:
+            target.rename(day_dir)
+        for kind in KINDS:
+            build_kind(
+                archive_root=archive_root,
+                analytics_root=analytics_root,
+                kind=kind,
+                rebuild_year=True,
+            )
+    return analytics_root
+
+
+def test_period_rollups_match_raw_over_long_ranges(tmp_path: Path) -> None:
+    analytics_root = _synthetic_analytics(tmp_path)
+    with_rollups = DuckDBQueryService(QueryConfig(analytics_root=analytics_root))
+    raw = DuckDBQueryService(QueryConfig(analytics_root=analytics_root, use_rollups=False))
+    ranges = [
+        ("2024-11-20", "2025-03-29"),
+        ("2024-11-27", "2025-02-05"),
+        ("2024-12-01", "2025-01-31"),
+        ("2024-12-30", "2025-01-12"),
+        ("2025-01-08", "2025-01-10"),
+    ]
+    for start, end in ranges:
+        for include_all in (False, True):
+            toplist = {"include_all_languages": include_all, "limit": 500}
+            for kind in KINDS:
+                assert with_rollups.top_reappearing(
+                    kind, start, end, language=None, presence="day", **toplist
+                ) == raw.top_reappearing(kind, start, end, language=None, presence="day", **toplist)
+            assert with_rollups.top_owners(start, end, language=None, **toplist) == (
+                raw.top_owners(start, end, language=None, **toplist)
+            )
+            for kind in (*KINDS, None):
+                assert with_rollups.top_languages(start, end, kind=kind, **toplist) == (
+                    raw.top_languages(start, end, kind=kind, **toplist)
+                )
+
+    paths = with_rollups.metrics.counter("gh_trending_query_path_total", "", ("method", "path"))
+    for method in ("top_reappearing", "top_owners", "top_languages"):
+        assert paths.value(method=method, path="rollup") > 0
+    assert "gh_trending_query_fallback_total{" not in with_rollups.metrics.render()
+
+
+def test_presence_matrix_matches_sql(tmp_path: Path) -> None:
+    analytics_root = _synthetic_analytics(tmp_path)
+    with_matrix = DuckDBQueryService(QueryConfig(analytics_root=analytics_root))
+    sql = DuckDBQueryService(QueryConfig(analytics_root=analytics_root))
+    raw = DuckDBQueryService(QueryConfig(analytics_root=analytics_root, use_rollups=False))
+    for kind in KINDS:
+        assert with_matrix.load_presence_matrix(kind)
+    ranges = [
+        ("2024-11-01", "2025-05-01"),
+        ("2024-12-01", "2025-01-31"),
+        ("2025-01-08", "2025-01-10"),
+        ("2025-02-14", "2025-02-14"),
+    ]
+    for start, end in ranges:
+        for include_all in (False, True):
+            for limit in (3, 500):
+                args = {"language": None, "include_all_languages": include_all, "limit": limit}
+                for kind in KINDS:
+                    reappearing = with_matrix.top_reappearing_table(
+                        kind, start, end, presence="day", **args
+                    )
+                    assert reappearing.equals(
+                        sql.top_reappearing_table(kind, start, end, presence="day", **args)
+                    )
+                    assert reappearing.equals(
+                        raw.top_reappearing_table(kind, start, end, presence="day", **args)
+                    )
+                    streaks = with_matrix.top_streaks_table(kind, start, end, **args)
+                    assert streaks.equals(sql.top_streaks_table(kind, start, end, **args))
+                    assert streaks.equals(raw.top_streaks_table(kind, start, end, **args))
+
+    paths = with_matrix.metrics.counter("gh_trending_query_path_total", "", ("method", "path"))
+    for method in ("top_reappearing", "top_streaks"):
+        assert paths.value(method=method, path="matrix") > 0
+        assert paths.value(method=method, path="rollup") == 0
+
+
+def test_rollups_with_raw_tail_match_raw(tmp_path: Path) -> None:
+    analytics_root = _synthetic_analytics(tmp_path, unrolled_from="2025-03-20")
+    with_rollups = DuckDBQueryService(QueryConfig(analytics_root=analytics_root))
+    raw = DuckDBQueryService(QueryConfig(analytics_root=analytics_root, use_rollups=False))
+    for kind in KINDS:
+        manifest_kind = with_rollups.manifest.kinds[kind]
+        assert manifest_kind.max_date == "2025-03-29"
+        assert manifest_kind.rollup_coverage == {
+            "2024": ["2024-11-20", "2024-12-31"],
+            "2025": ["2025-01-01", "2025-03-19"],
+        }
+
+    ranges = [("2024-11-20", "2025-03-29"), ("2025-01-06", "2025-03-24")]
+    for start, end in ranges:
+        for include_all in (False, True):
+            toplist = {"include_all_languages": include_all, "limit": 500}
+            for kind in KINDS:
+                assert with_rollups.top_reappearing(
+                    kind, start, end, language=None, presence="day", **toplist
+                ) == raw.top_reappearing(kind, start, end, language=None, presence="day", **toplist)
+                assert with_rollups.top_streaks(kind, start, end, language=None, **toplist) == (
+                    raw.top_streaks(kind, start, end, language=None, **toplist)
+                )
+            assert with_rollups.top_owners(start, end, language=None, **toplist) == (
+                raw.top_owners(start, end, language=None, **toplist)
+            )
+            assert with_rollups.top_languages(start, end, kind=None, **toplist) == (
+                raw.top_languages(start, end, kind=None, **toplist)
+            )
+
+    plans = with_rollups.recent_plans()
+    assert {plan["engine"] for plan in plans} == {"rollup"}
+    rollup = next(item for item in plans[0]["candidates"] if item["engine"] == "rollup")
+    assert rollup["detail"] == "raw tail from 2025-03-20"
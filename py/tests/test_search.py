@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from gh_trending_analytics.errors import InvalidRequestError
+from gh_trending_analytics.query import DuckDBQueryService, QueryConfig
+from gh_trending_web.app import create_app
+from helpers import build_fixture
+
+
+def _service(tmp_path: Path) -> DuckDBQueryService:
+    analytics_root = build_fixture(tmp_path)
+    return DuckDBQueryService(QueryConfig(analytics_root=analytics_root))
+
+
+def test_build_writes_name_index(tmp_path: Path) -> None:
+    analytics_root = build_fixture(tmp_path)
+    index_path = analytics_root / "search" / "repository" / "year=2025" / "name_index.parquet"
+    assert index_path.exists()
+
+
+def test_search_ranks_exact_prefix_substring(tmp_path: Path) -> None:
+    service = _service(tmp_path)
+    results = service.search("alpha", kind=None, start=None, end=None, language=None, limit=10)
+    assert [(item["type"], item["name"], item["match"]) for item in results] == [
+        ("owner", "alpha", "exact"),
+        ("repository", "alpha/one", "prefix"),
+    ]
+    assert results[1]["appearances"] == 5
+    assert results[1]["days_present"] == 2
+
+    substring = service.search(
+        "one", kind="repository", start=None, end=None, language=None, limit=10
+    )
+    assert [item["name"] for item in substring] == ["alpha/one"]
+    assert substring[0]["match"] == "substring"
+
+
+def test_search_short_query_uses_prefix(tmp_path: Path) -> None:
+    service = _service(tmp_path)
+    results = service.search("al", kind="developer", start=None, end=None, language=None, limit=10)
+    assert [item["name"] for item in results] == ["alice"]
+    # Two characters only match prefixes; three or more match anywhere in the name.
+    search = {"kind": "developer", "start": None, "end": None, "language": None, "limit": 10}
+    assert service.search("ce", **search) == []
+    assert [item["name"] for item in service.search("ice", **search)] == ["alice"]
+
+
+def test_search_filters_range_and_language(tmp_path: Path) -> None:
+    service = _service(tmp_path)
+    results = service.search(
+        "alpha/one",
+        kind="repository",
+        start="2025-01-02",
+        end="2025-01-02",
+        language="python",
+        limit=10,
+    )
+    assert len(results) == 1
+    assert results[0]["appearances"] == 1
+    assert results[0]["first_seen"] == "2025-01-02"
+
+    missing = service.search(
+        "gamma", kind="repository", start="2025-01-02", end=None, language=None, limit=10
+    )
+    assert missing == []
+
+
+def test_search_rejects_short_query(tmp_path: Path) -> None:
+    service = _service(tmp_path)
+    with pytest.raises(InvalidRequestError):
+        service.search("a", kind=None, start=None, end=None, language=None, limit=10)
+
+
+def test_search_endpoint(tmp_path: Path) -> None:
+    client = TestClient(create_app(analytics_root=build_fixture(tmp_path)))
+    response = client.get("/api/v1/search", params={"q": "ali", "kind": "developer"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["count"] == 1
+    assert payload["results"][0]["name"] == "alice"
+
+    invalid = client.get("/api/v1/search", params={"q": "ali", "kind": "repos"})
+    assert invalid.status_code == 400
+    assert invalid.json()["error"] == "invalid_request"
+
+    parameters = client.get("/openapi.json").json()["paths"]["/api/v1/search"]["get"]
+    q = next(item for item in parameters["parameters"] if item["name"] == "q")
+    assert "2-character query only matches names starting with it" in q["description"]
+
+
+def test_search_index_is_built_at_startup(tmp_path: Path) -> None:
+    app = create_app(analytics_root=build_fixture(tmp_path))
+    loader = app.state.query_service._search_index
+    with TestClient(app):
+        assert app.state.prewarm_pool.drain(timeout=10)
+        assert loader._index is not None and len(loader._index) > 0
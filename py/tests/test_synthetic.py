@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from datetime import date
+from itertools import pairwise
+from pathlib import Path
+
+from gh_trending_analytics.benchmark import compare, measure
+from gh_trending_analytics.build import build_kind
+from gh_trending_analytics.synthetic import REAL_ARCHIVE_SPEC, SyntheticSpec, write_archive
+
+SPEC = SyntheticSpec(start=date(2024, 12, 20), days=20, languages=6, seed=7)
+
+
+def _lists(root: Path, kind: str) -> dict[tuple[str, str], list[str]]:
+    lists = {}
+    for path in sorted((root / kind).glob("*/*/*.json")):
+        payload = json.loads(path.read_text())
+        lists[(payload["date"], path.name)] = payload["list"]
+    return lists
+
+
+def test_archive_is_deterministic_and_realistic(tmp_path: Path) -> None:
+    first = write_archive(tmp_path / "a", SPEC)
+    write_archive(tmp_path / "b", SPEC)
+    lists = _lists(tmp_path / "a", "repository")
+    assert lists == _lists(tmp_path / "b", "repository")
+    assert first.files == len(lists) + len(_lists(tmp_path / "a", "developer"))
+    assert (tmp_path / "a" / "repository" / "2025").is_dir()
+
+    full = [names for (day, name), names in lists.items() if name == "(null).json"]
+    assert len(full) == SPEC.days
+    assert all(len(names) == SPEC.list_length for names in full)
+    assert all(len(set(names)) == len(names) for names in lists.values())
+    assert all(len(names) <= SPEC.list_length for names in lists.values())
+
+    appearances = Counter(name for names in full for name in names)
+    assert appearances.most_common(1)[0][1] >= SPEC.days // 2
+    streaks = sum(len(set(today) & set(yesterday)) for yesterday, today in pairwise(full))
+    assert streaks > 0
+
+
+def test_archive_builds_and_scales(tmp_path: Path) -> None:
+    write_archive(tmp_path / "archive", SPEC, kinds=("repository",))
+    result = build_kind(
+        archive_root=tmp_path / "archive",
+        analytics_root=tmp_path / "analytics",
+        kind="repository",
+        rebuild_year=True,
+    )
+    assert result.parquet_paths
+    scaled = REAL_ARCHIVE_SPEC.scaled(10)
+    assert scaled.days == REAL_ARCHIVE_SPEC.days * 10
+    assert scaled.repositories == REAL_ARCHIVE_SPEC.repositories * 10
+
+
+def test_benchmark_compare_flags_regressions() -> None:
+    result = measure("noop", lambda: None, repeats=3)
+    assert result.repeats == 3 and result.min <= result.median <= result.p95
+    baseline = {"a": {"median": 0.100}, "b": {"median": 0.001}, "c": {"median": 0.1}}
+    current = {"a": {"median": 0.200}, "b": {"median": 0.003}, "c": {"median": 0.11}}
+    regressions = compare(current, baseline, tolerance=0.25, min_delta=0.005)
+    assert [regression.name for regression in regressions] == ["a"]
+    assert regressions[0].ratio == 2.0